@@ -1,4 +1,10 @@
 import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "utilities"))
+
+from tree_walk import map_tree
 
 # Specify the input and output file paths
 input_file_path = (
@@ -11,7 +17,7 @@ with open(input_file_path, "r") as infile:
     data = json.load(infile)
 
 
-# Function to recursively modify each entry in the JSON
+# Function to modify a single entry; map_tree applies it to every entry in the JSON
 def modify_entry(entry):
     # Create a new dictionary to store the modified entry
     # Create a new dictionary to store the modified entry
@@ -26,18 +32,12 @@ def modify_entry(entry):
     # Add your desired fields to the modified entry
     modified_entry["links"] = entry.get("links", {"Link": ""})
 
-    # Check if the entry has a "children" field
-    if "children" in entry and isinstance(entry["children"], list):
-        # Recursively modify each child entry
-        modified_entry["children"] = [
-            modify_entry(child) for child in entry["children"]
-        ]
-
+    # "children" lists are rebuilt by map_tree without recursion
     return modified_entry
 
 
 # Modify each entry in the data
-modified_data = modify_entry(data)
+modified_data = map_tree(data, modify_entry)
 
 # Write the modified data to the output file
 with open(output_file_path, "w") as outfile:
@@ -2,50 +2,512 @@
 """
 Build script to merge taxonomy categories into single file for d3
 """
+import argparse
+import hashlib
 import json
 import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
 
-def build_taxonomy():
-    """Merge all category files into main taxonomy file"""
-    
+# Shared taxonomy helpers live in utilities/
+sys.path.append(str(Path(__file__).parent / "utilities"))
+
+from compact_format import COMPACT_NAME, dumps_block, pack_block, write_compact_blocks
+from metrics import metrics, start_run
+from patch_log import load_document, log_path, log_signature, parse_source, read_source
+from path_index import category_paths, node_name, write_path_index
+from search_index import SEARCH_INDEX_NAME, category_entries, write_search_index
+from sidecars import ANALYSIS_PATH, CANDIDATES_PATH, category_facts, source_signature, write_sidecars
+from tree_layout import LAYOUT_NAME, tree_shape, write_layout
+
+DATA_DIR = 'taxonomy-data'
+OUTPUT_PATH = 'public/Creative_Tech_Taxonomy_data.json'
+CACHE_DIR = '.taxonomy-cache'
+MANIFEST_VERSION = 4
+# Lazy-loading output for the visualizer, written next to OUTPUT_PATH
+SKELETON_NAME = 'Creative_Tech_Taxonomy_skeleton.json'
+SHARD_DIR_NAME = 'taxonomy-shards'
+SHARD_HASH_LENGTH = 12
+COPY_CHUNK_SIZE = 64 * 1024
+# --watch: how often sources are polled, and how long they must stay unchanged before rebuilding
+WATCH_INTERVAL = 0.05
+WATCH_DEBOUNCE = 0.05
+
+def serialize_category(category_data):
+    """Serialize a category exactly as it appears inside the merged children list"""
+    text = json.dumps(category_data, indent=2, ensure_ascii=False)
+    # json.dumps escapes newlines inside strings, so splitting on "\n" is safe
+    return "\n".join("    " + line for line in text.split("\n"))
+
+def render_head(taxonomy):
+    """Everything in the merged file before the first category fragment.
+
+    Together with render_tail() this produces the same bytes as
+    json.dump(taxonomy_with_children, indent=2).
+    """
+    root = {key: value for key, value in taxonomy.items() if key != 'children'}
+    if not root:
+        return '{\n  "children": ['
+    head = json.dumps(root, indent=2, ensure_ascii=False)
+    return head[:-2] + ',\n  "children": ['
+
+def render_tail(category_count):
+    """Everything in the merged file after the last category fragment"""
+    return "\n  ]\n}" if category_count else "]\n}"
+
+def load_manifest(manifest_path):
+    """Load the build manifest, discarding it if it was written by another format version"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"version": MANIFEST_VERSION, "categories": {}}
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "categories": {}}
+    return manifest
+
+def stat_signature(path):
+    """Cheap change detector used before falling back to hashing (the patch log's included)"""
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "log": log_signature(path)}
+
+def cache_paths(cache_dir, filename):
+    """Per-category cache files: serialized fragment, path index and search index entries, tree shape,
+    compact block, quality columns and enhancement candidates for the sidecars"""
+    return {
+        "fragment": cache_dir / 'fragments' / filename,
+        "paths": cache_dir / 'paths' / filename,
+        "search": cache_dir / 'search' / filename,
+        "shape": cache_dir / 'shapes' / filename,
+        "compact": cache_dir / 'compact' / filename,
+        "columns": cache_dir / 'columns' / filename,
+        "candidates": cache_dir / 'candidates' / filename,
+    }
+
+def outputs_exist(cached, cached_files, shard_dir):
+    """True when everything a manifest entry points at is still on disk"""
+    return (
+        all(path.exists() for path in cached_files.values())
+        and (shard_dir / cached["shard"]["file"]).exists()
+    )
+
+def is_fresh(cached, signature, cached_files, shard_dir):
+    """True when size + mtime (of the file and its patch log) match the manifest and the cached outputs are still there"""
+    return (
+        cached is not None
+        and cached.get("size") == signature["size"]
+        and cached.get("mtime_ns") == signature["mtime_ns"]
+        and cached.get("log") == signature["log"]
+        and outputs_exist(cached, cached_files, shard_dir)
+    )
+
+def write_atomic(path, text):
+    """Write via a temp file so readers (and Vite's watcher) never see a partial file"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+def category_stub(category_data, shard_key):
+    """Collapsed stand-in for a category in the skeleton file"""
+    stub = {key: value for key, value in category_data.items() if key != 'children'}
+    stub["shard"] = shard_key
+    stub["childCount"] = len(category_data.get("children", []))
+    return stub
+
+def write_shard(category_data, shard_dir, shard_key):
+    """Write a compact, content-hashed copy of one category for lazy loading"""
+    text = json.dumps(category_data, ensure_ascii=False, separators=(',', ':'))
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    shard_file = f"{shard_key}.{digest[:SHARD_HASH_LENGTH]}.json"
+    if not (shard_dir / shard_file).exists():
+        write_atomic(shard_dir / shard_file, text)
+    return {"file": shard_file, "sha256": digest}
+
+def refresh_category(filepath, cached, cached_files, shard_dir, incremental):
+    """Re-hash a category file (with its patch log) and regenerate its cached outputs and shard if needed.
+
+    Runs inside the worker pool, so it takes and returns only plain values and
+    never hands the parsed category back to the parent process.
+    Returns (manifest_entry, reused).
+    """
+    filepath = Path(filepath)
+    cached_files = {key: Path(path) for key, path in cached_files.items()}
+    shard_dir = Path(shard_dir)
+
+    raw, log_raw = read_source(filepath)
+    entry = {"sha256": hashlib.sha256(raw + log_raw).hexdigest(), **stat_signature(filepath)}
+
+    # Touched but identical content (e.g. git checkout, editor re-save)
+    if (incremental and cached and cached.get("sha256") == entry["sha256"]
+            and outputs_exist(cached, cached_files, shard_dir)):
+        return {**cached, **entry}, True
+
+    category_data = parse_source(raw, log_raw, filepath.name)
+    write_atomic(cached_files["fragment"], serialize_category(category_data))
+    write_atomic(cached_files["paths"], json.dumps(list(category_paths(category_data)), ensure_ascii=False))
+    write_atomic(cached_files["search"], json.dumps(category_entries(category_data), ensure_ascii=False,
+                                                    separators=(',', ':')))
+    write_atomic(cached_files["shape"], json.dumps(tree_shape(category_data), separators=(',', ':')))
+    write_atomic(cached_files["compact"], dumps_block(pack_block(category_data)))
+    columns, candidates, entry["quality"] = category_facts(category_data)
+    write_atomic(cached_files["columns"], json.dumps(columns, ensure_ascii=False, separators=(',', ':')))
+    write_atomic(cached_files["candidates"], json.dumps(candidates, ensure_ascii=False, separators=(',', ':')))
+    entry["shard"] = write_shard(category_data, shard_dir, filepath.stem)
+    entry["stub"] = category_stub(category_data, filepath.stem)
+    return entry, False
+
+def write_lazy_outputs(taxonomy, category_entries, output_path):
+    """Write the skeleton and shard manifest and drop shards no longer referenced.
+
+    The skeleton is the root from _metadata.json plus one stub per category,
+    enough for the visualizer's first paint. Shard URLs are relative to the
+    public directory and change only when the category's content changes.
+    """
+    shard_dir = output_path.parent / SHARD_DIR_NAME
+    skeleton = {key: value for key, value in taxonomy.items() if key != 'children'}
+    skeleton["children"] = [entry["stub"] for entry in category_entries]
+    shards = {
+        entry["stub"]["shard"]: f"{SHARD_DIR_NAME}/{entry['shard']['file']}"
+        for entry in category_entries
+    }
+
+    write_atomic(output_path.parent / SKELETON_NAME, json.dumps(skeleton, indent=2, ensure_ascii=False))
+    write_atomic(shard_dir / 'manifest.json', json.dumps({"shards": shards}, indent=2))
+
+    referenced = {entry["shard"]["file"] for entry in category_entries} | {'manifest.json'}
+    for shard_path in shard_dir.glob('*.json'):
+        if shard_path.name not in referenced:
+            shard_path.unlink()
+
+class MergedWriter:
+    """Streams the merged taxonomy to a temp file while hashing what was written"""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.tmp_path = output_path.with_name(output_path.name + '.tmp')
+        self.hasher = hashlib.sha256()
+        self.count = 0
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.tmp_path, 'wb')
+
+    def write(self, text):
+        data = text.encode('utf-8')
+        self.hasher.update(data)
+        self.file.write(data)
+
+    def append_fragment(self, fragment_path):
+        """Copy one cached category fragment into the output in fixed-size chunks"""
+        self.write("\n" if self.count == 0 else ",\n")
+        with open(fragment_path, 'rb') as f:
+            while chunk := f.read(COPY_CHUNK_SIZE):
+                self.hasher.update(chunk)
+                self.file.write(chunk)
+        self.count += 1
+
+    def abort(self):
+        """Drop the partial output and leave the previous file in place"""
+        self.file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def finish(self, previous_output):
+        """Close the temp file and move it into place unless the output is already identical.
+
+        Returns (output_manifest_entry, unchanged).
+        """
+        self.file.close()
+        digest = self.hasher.hexdigest()
+        unchanged = (
+            self.output_path.exists()
+            and previous_output.get("sha256") == digest
+            and previous_output.get("size") == self.output_path.stat().st_size
+        )
+        if unchanged:
+            self.tmp_path.unlink()
+        else:
+            os.replace(self.tmp_path, self.output_path)
+        return {"sha256": digest, "size": self.output_path.stat().st_size}, unchanged
+
+def build_taxonomy(incremental=False, data_dir=DATA_DIR, output_path=OUTPUT_PATH, cache_dir=CACHE_DIR,
+                   workers=1, verbose=True, layout=False, compact=False):
+    """Merge all category files into main taxonomy file.
+
+    Categories are parsed on a pool of `workers` processes, serialized into
+    the fragment cache and streamed into the output in _index.json order, so
+    the merged tree is never held in memory. With incremental=True only
+    categories whose source changed since the last build are parsed; the rest
+    are spliced in from the cached fragments recorded in the build manifest.
+
+    Alongside the merged file it writes the lazy-loading skeleton and one
+    content-hashed shard per category (see write_lazy_outputs), plus the
+    path index used to apply enhancements (see utilities/path_index.py) and
+    the full-text search index (see utilities/search_index.py). The quality
+    scores, aggregates and enhancement candidates computed while parsing
+    are spliced into the sidecars read by `enhance.py analyze` and
+    `enhance.py plan` (see utilities/sidecars.py).
+
+    With layout=True it also precomputes the visualizer's tree layout (see
+    utilities/tree_layout.py). Once a layout file exists, later builds keep
+    it up to date whether or not layout is passed. compact=True does the same
+    for the compact copy of the merged file (see utilities/compact_format.py).
+    """
+    data_dir = Path(data_dir)
+    output_path = Path(output_path)
+    cache_dir = Path(cache_dir)
+    shard_dir = output_path.parent / SHARD_DIR_NAME
+    manifest_path = cache_dir / 'build_manifest.json'
+    manifest = load_manifest(manifest_path)
+
+    # Sources (and patch logs, None when absent) as they were read, recorded in the sidecars
+    sources = {name: source_signature(data_dir / name) for name in ('_metadata.json', '_index.json')}
+    sources[log_path('_metadata.json').name] = log_signature(data_dir / '_metadata.json')
+
     # Load metadata
-    with open('taxonomy-data/_metadata.json', 'r') as f:
-        taxonomy = json.load(f)
-    
+    taxonomy = load_document(data_dir / '_metadata.json')
+
     # Load category index to get proper order
-    with open('taxonomy-data/_index.json', 'r') as f:
+    with open(data_dir / '_index.json', 'r', encoding='utf-8') as f:
         category_index = json.load(f)
-    
+
     # Sort by order
     category_index.sort(key=lambda x: x['order'])
-    
-    # Load and merge categories in order
-    children = []
-    for category_info in category_index:
-        filename = category_info['filename']
-        filepath = f"taxonomy-data/{filename}"
-        
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    # Bound how far the pool may run ahead of the writer
+    window = max(1, workers) * 2
+    pending = deque()
+    writer = MergedWriter(output_path)
+    writer.write(render_head(taxonomy))
+    categories = {}
+    rebuilt = 0
+    # Old manifest entries are taken out as they are replaced, so only one copy of the
+    # per-category bookkeeping is held; this records whether the manifest needs rewriting
+    manifest_changed = False
+
+    def drain_one():
+        nonlocal rebuilt, manifest_changed
+        category_info, cached_files, cached, job = pending.popleft()
         try:
-            with open(filepath, 'r') as f:
-                category_data = json.load(f)
-                children.append(category_data)
-                print(f"✅ Loaded: {category_info['name']}")
+            entry, reused = job.result() if isinstance(job, Future) else job
         except FileNotFoundError:
-            print(f"❌ Missing: {filepath}")
-            continue
-    
+            print(f"❌ Missing: {data_dir / category_info['filename']}")
+            sources[category_info['filename']] = None
+            manifest_changed = manifest_changed or cached is not None
+            return
+
+        writer.append_fragment(cached_files["fragment"])
+        categories[category_info['filename']] = entry
+        manifest_changed = manifest_changed or entry != cached
+        sources[category_info['filename']] = [entry["size"], entry["mtime_ns"]]
+        sources[log_path(category_info['filename']).name] = entry["log"]
+        if not reused:
+            rebuilt += 1
+        if verbose:
+            print(f"{'♻️  Cached' if reused else '✅ Loaded'}: {category_info['name']}")
+
+    try:
+        # Load and merge categories in order
+        for category_info in category_index:
+            filename = category_info['filename']
+            filepath = data_dir / filename
+            cached_files = cache_paths(cache_dir, filename)
+            cached = manifest["categories"].pop(filename, None)
+
+            try:
+                signature = stat_signature(filepath)
+            except FileNotFoundError:
+                print(f"❌ Missing: {filepath}")
+                sources[filename] = None
+                manifest_changed = manifest_changed or cached is not None
+                continue
+
+            if incremental and is_fresh(cached, signature, cached_files, shard_dir):
+                # Untouched file: skip reading it at all
+                job = (cached, True)
+            elif executor:
+                job = executor.submit(refresh_category, str(filepath), cached,
+                                      {key: str(path) for key, path in cached_files.items()},
+                                      str(shard_dir), incremental)
+            else:
+                try:
+                    job = refresh_category(filepath, cached, cached_files, shard_dir, incremental)
+                except FileNotFoundError:
+                    print(f"❌ Missing: {filepath}")
+                    sources[filename] = None
+                    manifest_changed = manifest_changed or cached is not None
+                    continue
+
+            pending.append((category_info, cached_files, cached, job))
+            while len(pending) >= window:
+                drain_one()
+
+        while pending:
+            drain_one()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        if executor:
+            executor.shutdown()
+
     # Combine into final taxonomy
-    taxonomy['children'] = children
-    
-    # Write to public directory
-    output_path = 'public/Creative_Tech_Taxonomy_data.json'
-    with open(output_path, 'w') as f:
-        json.dump(taxonomy, f, indent=2, ensure_ascii=False)
-    
-    print(f"\n🎉 Built taxonomy with {len(children)} categories")
-    print(f"📁 Output: {output_path}")
-    print(f"📊 File size: {os.path.getsize(output_path):,} bytes")
+    writer.write(render_tail(writer.count))
+    # Write to public directory (left untouched when nothing changed)
+    output_entry, output_unchanged = writer.finish(manifest.get("output", {}) if incremental else {})
+
+    # The derived outputs below depend only on the merged content and the category files' names
+    # (sidecars also on the sources' stat signatures), so a build that changed none of those skips them
+    content_key = hashlib.sha256(
+        json.dumps([output_entry["sha256"], list(categories)]).encode('utf-8')).hexdigest()
+    previous_outputs = manifest.get("outputs", {}) if incremental else {}
+    outputs = {}
+
+    def stale(name, paths, key=content_key):
+        outputs[name] = key
+        return previous_outputs.get(name) != key or not all(path.exists() for path in paths)
+
+    if stale("lazy", [output_path.parent / SKELETON_NAME, shard_dir / 'manifest.json']):
+        write_lazy_outputs(taxonomy, list(categories.values()), output_path)
+    if stale("path_index", [cache_dir / 'path_index.json']):
+        write_path_index(cache_dir / 'path_index.json', node_name(taxonomy), (
+            (filename, json.loads(cache_paths(cache_dir, filename)["paths"].read_text(encoding='utf-8')))
+            for filename in categories
+        ))
+    if stale("search", [output_path.parent / SEARCH_INDEX_NAME]):
+        write_search_index(output_path.parent / SEARCH_INDEX_NAME, taxonomy, [
+            (entry["quality"]["nodes"], cache_paths(cache_dir, filename)["search"])
+            for filename, entry in categories.items()
+        ])
+    sidecars_key = hashlib.sha256(
+        json.dumps([content_key, sources, str(data_dir.resolve())]).encode('utf-8')).hexdigest()
+    sidecar_paths = [cache_dir / Path(ANALYSIS_PATH).name, cache_dir / Path(CANDIDATES_PATH).name]
+    if stale("sidecars", sidecar_paths, sidecars_key):
+        with metrics.timer("sidecars"):
+            write_sidecars(cache_dir, data_dir, taxonomy, [
+                (node_name(entry["stub"]), entry["quality"],
+                 cache_paths(cache_dir, filename)["columns"], cache_paths(cache_dir, filename)["candidates"])
+                for filename, entry in categories.items()
+            ], sources)
+    layout_path = output_path.parent / LAYOUT_NAME
+    if (layout or layout_path.exists()) and stale("layout", [layout_path]):
+        with metrics.timer("layout"):
+            write_layout(layout_path, [
+                (entry["stub"]["shard"],
+                 json.loads(cache_paths(cache_dir, filename)["shape"].read_text(encoding='utf-8')))
+                for filename, entry in categories.items()
+            ])
+
+    compact_path = output_path.parent / COMPACT_NAME
+    if (compact or compact_path.exists()) and stale("compact", [compact_path]):
+        with metrics.timer("compact"):
+            metrics.count("bytes_written", write_compact_blocks(
+                compact_path, taxonomy, [cache_paths(cache_dir, filename)["compact"] for filename in categories]))
+
+    # Whatever is left in the old manifest belongs to categories no longer in the index
+    if (manifest_changed or manifest["categories"] or manifest.get("output") != output_entry
+            or manifest.get("outputs") != outputs):
+        # Unindented: the indenting encoder is pure Python and took most of a no-op build at scale
+        write_atomic(manifest_path, json.dumps({
+            "version": MANIFEST_VERSION,
+            "categories": categories,
+            "output": output_entry,
+            "outputs": outputs,
+        }))
+
+    metrics.count("categories_rebuilt", rebuilt)
+    if not output_unchanged:
+        metrics.count("bytes_written", output_entry["size"])
+
+    if verbose:
+        print(f"\n🎉 Built taxonomy with {writer.count} categories ({rebuilt} rebuilt)")
+        print(f"📁 Output: {output_path}{' (unchanged)' if output_unchanged else ''}")
+        print(f"📊 File size: {os.path.getsize(output_path):,} bytes")
+
+def source_signatures(data_dir):
+    """stat_signature of every source file (backups excluded), keyed by filename"""
+    signatures = {}
+    for path in Path(data_dir).glob('*.json'):
+        if path.stem.endswith('_backup'):
+            continue
+        try:
+            signatures[path.name] = stat_signature(path)
+        except FileNotFoundError:
+            # Deleted between glob and stat (e.g. an editor's atomic save)
+            continue
+    return signatures
+
+def watch(data_dir=DATA_DIR, output_path=OUTPUT_PATH, cache_dir=CACHE_DIR,
+          interval=WATCH_INTERVAL, debounce=WATCH_DEBOUNCE, layout=False, compact=False):
+    """Rebuild incrementally whenever the sources change, until interrupted.
+
+    Sources are polled with os.stat (no extra dependencies). A burst of saves
+    is coalesced: the rebuild waits until the files have been quiet for
+    `debounce` seconds. Each rebuild only re-parses the changed categories,
+    so the merged file is usually updated within a few tens of ms. A file that
+    fails to parse mid-edit is reported and the previous output kept.
+    """
+    build_taxonomy(incremental=True, data_dir=data_dir, output_path=output_path, cache_dir=cache_dir,
+                   layout=layout, compact=compact)
+    print(f"\n👀 Watching {data_dir}/ for changes (Ctrl+C to stop)")
+    previous = source_signatures(data_dir)
+    try:
+        while True:
+            time.sleep(interval)
+            current = source_signatures(data_dir)
+            if current == previous:
+                continue
+            while True:
+                time.sleep(debounce)
+                settled = source_signatures(data_dir)
+                if settled == current:
+                    break
+                current = settled
+
+            changed = sorted(name for name in current.keys() | previous.keys()
+                             if current.get(name) != previous.get(name))
+            previous = current
+            start = time.perf_counter()
+            try:
+                with metrics.timer("watch_rebuild"):
+                    build_taxonomy(incremental=True, data_dir=data_dir, output_path=output_path,
+                                   cache_dir=cache_dir, verbose=False)
+            except Exception as e:
+                print(f"❌ {', '.join(changed)}: {e} (keeping the previous output)")
+                continue
+            print(f"🔁 {', '.join(changed)} -> {output_path} in {(time.perf_counter() - start) * 1000:.0f} ms")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Merge taxonomy-data/ category files into the d3 data file')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Only rebuild categories whose source changed since the last build')
+    parser.add_argument('--workers', '-j', type=int, default=1,
+                       help='Worker processes used to parse categories (default: 1, in-process)')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Directory holding the category files')
+    parser.add_argument('--output', default=OUTPUT_PATH, help='Merged taxonomy output file')
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Directory for the build manifest and cached fragments')
+    parser.add_argument('--watch', action='store_true',
+                       help='Keep running and rebuild incrementally whenever a source file changes')
+    parser.add_argument('--layout', action='store_true',
+                       help='Precompute the visualizer tree layout (kept up to date by later builds)')
+    parser.add_argument('--compact', action='store_true',
+                       help=f'Also write {COMPACT_NAME} (kept up to date by later builds)')
+
+    args = parser.parse_args()
+    # Metrics are still recorded under .taxonomy-cache/metrics/, just not printed
+    start_run("watch" if args.watch else "build", quiet=True)
+    if args.watch:
+        watch(args.data_dir, args.output, args.cache_dir, layout=args.layout, compact=args.compact)
+        return
+    with metrics.timer("build"):
+        build_taxonomy(args.incremental, args.data_dir, args.output, args.cache_dir, workers=args.workers,
+                       layout=args.layout, compact=args.compact)
 
 if __name__ == "__main__":
-    build_taxonomy()
\ No newline at end of file
+    main()
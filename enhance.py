@@ -1,59 +1,193 @@
 #!/usr/bin/env python3
 """
 Main enhancement script - convenient entry point for AI-assisted content enhancement.
+
+Commands run in this process; each utility module is imported only when its
+command runs, so read-only commands never load the API client. `shell`
+keeps one loaded taxonomy warm across commands.
 """
 
+import importlib
+import os
+import shlex
 import sys
-import subprocess
+import time
 from pathlib import Path
 
-def main():
+sys.path.append(str(Path(__file__).parent / "utilities"))
+
+# command -> (utilities module whose main(argv) runs it, accepts a shared Workspace)
+COMMANDS = {
+    "analyze": ("analyze_nodes", True),
+    "plan": ("efficient_enhance", True),
+    "batch": ("batch_process", True),
+    "single": ("apply_enhancements", True),
+    "cleanup": ("auto_cleanup", False),
+    "compact": ("patch_log", True),
+    "links": ("link_checker", True),
+    "metrics": ("metrics", False),
+    "search": ("search_index", False),
+    "snapshots": ("snapshot_store", False),
+}
+
+def print_usage():
+    print("Creative Tech Taxonomy AI Enhancement Tools")
+    print("==========================================")
+    print()
+    print("Usage:")
+    print("  python enhance.py analyze          # Analyze current state")
+    print("      [--stats] [--engine columnar|python]")
+    print("  python enhance.py plan             # Generate processing plan")
+    print("  python enhance.py batch [N]        # Process N batches (default: 5)")
+    print("      [--concurrency C] [--rpm R] [--tpm T] [--base-url URL]")
+    print("  python enhance.py single <file>    # Process single batch file")
+    print("  python enhance.py cleanup          # Move old *_backup.json files into snapshots, prune old runs")
+    print("  python enhance.py compact          # Fold enhancement patch logs into their category files")
+    print("      [--status] [FILE...]")
+    print("  python enhance.py snapshots [list|show RUN|restore RUN [FILE...]|prune]")
+    print("                                     # Versions of the source files saved before each write")
+    print("  python enhance.py metrics [file]   # Show the last run's timings and counters")
+    print("  python enhance.py links            # Check every link; report broken and placeholder ones by node")
+    print("      [--concurrency C] [--per-host H] [--connect-to HOST:PORT] [--output FILE]")
+    print("  python enhance.py search <words> # Search names, descriptions and tags (English or Japanese)")
+    print("  python enhance.py shell            # Keep the taxonomy loaded and run commands interactively")
+    print()
+    print("Every command records per-stage timings and counters in .taxonomy-cache/metrics/;")
+    print("add --profile STAGE (e.g. api, load_store, analyze, rebuild) to cProfile one stage.")
+    print()
+    print("Examples:")
+    print("  python enhance.py analyze")
+    print("  python enhance.py batch 3")
+    print("  python enhance.py batch 20 --concurrency 4 --rpm 50")
+    print("  python enhance.py single sample_batch_for_api.json")
+    print("  python enhance.py batch 3 --profile rebuild")
+
+def pop_profile(args):
+    """Strip `--profile STAGE` from args; returns (args, stage or None).
+
+    Raises ValueError when --profile is not followed by a stage name.
+    """
+    if "--profile" not in args:
+        return args, None
+    position = args.index("--profile")
+    if position + 1 == len(args) or args[position + 1].startswith("-"):
+        raise ValueError("--profile needs a stage name, e.g. --profile rebuild")
+    return args[:position] + args[position + 2:], args[position + 1]
+
+def run_command(command, options, workspace=None):
+    """Run one command in this process. Returns False if it is unknown or missing arguments."""
+    if command not in COMMANDS:
+        print(f"Unknown command: {command}")
+        print("Run 'python enhance.py' for usage help")
+        return False
+
+    if command == "batch":
+        max_batches = 5
+        if options and options[0].isdigit():
+            max_batches = int(options[0])
+            options = options[1:]
+        options = ["--max-batches", str(max_batches), *options]
+    elif command == "single" and not options:
+        print("Error: Please specify batch file")
+        print("Usage: python enhance.py single <batch_file>")
+        return False
+
+    module_name, shares_workspace = COMMANDS[command]
+    module = importlib.import_module(module_name)
+    if shares_workspace and workspace is not None:
+        module.main(options, workspace=workspace)
+    else:
+        module.main(options)
+    return True
+
+def shell():
+    """Read commands from stdin and run them against one warm Workspace"""
+    from metrics import PROFILE_ENV, finish_run
+    from workspace import Workspace
+
+    workspace = Workspace()
+    print("Creative Tech Taxonomy shell - commands as for enhance.py, plus 'status', 'reload', 'exit'")
+    while True:
+        try:
+            line = input("taxonomy> ")
+        except EOFError:
+            print()
+            break
+        except KeyboardInterrupt:
+            print()
+            continue
+
+        try:
+            words = shlex.split(line)
+        except ValueError as e:
+            print(f"❌ {e}")
+            continue
+        if not words:
+            continue
+
+        command, options = words[0].lower(), words[1:]
+        if command in ("exit", "quit"):
+            break
+        if command == "help":
+            print_usage()
+            continue
+        if command == "status":
+            print(workspace.describe())
+            continue
+        if command == "reload":
+            workspace.reset()
+            print(f"🔄 {workspace.describe()}")
+            continue
+
+        try:
+            options, profile_stage = pop_profile(options)
+        except ValueError as e:
+            print(f"❌ {e}")
+            continue
+        if profile_stage:
+            os.environ[PROFILE_ENV] = profile_stage
+        workspace.refresh()
+        start = time.perf_counter()
+        try:
+            run_command(command, options, workspace)
+        except SystemExit:
+            # argparse errors and --help exit; the shell keeps going
+            pass
+        except KeyboardInterrupt:
+            print("\n⏹️  Interrupted")
+        except Exception as e:
+            print(f"❌ {command} failed: {e}")
+            # The shared store may be half-updated; start from disk next time
+            workspace.reset()
+        finally:
+            finish_run()
+            if profile_stage:
+                os.environ.pop(PROFILE_ENV, None)
+        print(f"⚡ {command} took {(time.perf_counter() - start) * 1000:.0f} ms")
+
+def main(argv=None):
     """Main enhancement workflow."""
-    if len(sys.argv) < 2:
-        print("Creative Tech Taxonomy AI Enhancement Tools")
-        print("==========================================")
-        print()
-        print("Usage:")
-        print("  python enhance.py analyze          # Analyze current state")
-        print("  python enhance.py plan             # Generate processing plan") 
-        print("  python enhance.py batch [N]        # Process N batches (default: 5)")
-        print("  python enhance.py single <file>    # Process single batch file")
-        print("  python enhance.py cleanup          # Clean up backup files")
-        print()
-        print("Examples:")
-        print("  python enhance.py analyze")
-        print("  python enhance.py batch 3")
-        print("  python enhance.py single sample_batch_for_api.json")
+    from metrics import PROFILE_ENV
+
+    try:
+        args, profile_stage = pop_profile(sys.argv[1:] if argv is None else argv)
+    except ValueError as e:
+        print(f"Error: {e}")
+        print("Run 'python enhance.py' for usage help")
+        sys.exit(2)
+    # Runs that stage under cProfile (see utilities/metrics.py)
+    if profile_stage:
+        os.environ[PROFILE_ENV] = profile_stage
+
+    if not args:
+        print_usage()
         return
-    
-    command = sys.argv[1].lower()
-    utilities_dir = Path("utilities")
-    
-    if command == "analyze":
-        subprocess.run([sys.executable, utilities_dir / "analyze_nodes.py"])
-        
-    elif command == "plan":
-        subprocess.run([sys.executable, utilities_dir / "efficient_enhance.py"])
-        
-    elif command == "batch":
-        max_batches = int(sys.argv[2]) if len(sys.argv) > 2 else 5
-        subprocess.run([sys.executable, utilities_dir / "batch_process.py", 
-                       "--max-batches", str(max_batches)])
-        
-    elif command == "single":
-        if len(sys.argv) < 3:
-            print("Error: Please specify batch file")
-            print("Usage: python enhance.py single <batch_file>")
-            return
-        batch_file = sys.argv[2]
-        subprocess.run([sys.executable, utilities_dir / "apply_enhancements.py", batch_file])
-        
-    elif command == "cleanup":
-        subprocess.run([sys.executable, utilities_dir / "auto_cleanup.py"])
-        
+
+    command = args[0].lower()
+    if command == "shell":
+        shell()
     else:
-        print(f"Unknown command: {command}")
-        print("Run 'python enhance.py' for usage help")
+        run_command(command, args[1:])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
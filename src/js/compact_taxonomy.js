@@ -0,0 +1,94 @@
+// Loader for the compact taxonomy file written by `build_taxonomy.py --compact`
+// (format described in utilities/compact_format.py). rehydrate() returns exactly the tree in
+// Creative_Tech_Taxonomy_data.json: repeated strings come from their block's table, dicts from their shape
+// and elided fields from the defaults.
+const COMPACT_FORMAT = "creative-tech-taxonomy-compact"
+const COMPACT_VERSION = 2
+const LIST = 0
+
+export const isCompact = (data) => data !== null && typeof data === "object" && data.format === COMPACT_FORMAT
+
+// a function returning a fresh copy of a default value, so nodes never share arrays or objects
+const freshDefault = (value) => {
+  if (value === null || typeof value !== "object") return () => value
+  const items = Array.isArray(value) ? value : Object.values(value)
+  if (items.some((item) => item !== null && typeof item === "object")) return () => structuredClone(value)
+  return Array.isArray(value) ? () => value.slice() : () => ({ ...value })
+}
+
+export const rehydrate = (doc) => {
+  if (!isCompact(doc) || doc.version !== COMPACT_VERSION) {
+    throw new Error("Not a compact taxonomy document of a supported version")
+  }
+  const defaults = {}
+  for (const key of Object.keys(doc.defaults)) defaults[key] = freshDefault(doc.defaults[key])
+  // the root block keeps "children" in place as an empty list; each category is a block of its own
+  const tree = rehydrateBlock(doc.root, defaults)
+  if ("children" in tree) tree.children = doc.children.map((block) => rehydrateBlock(block, defaults))
+  return tree
+}
+
+const rehydrateBlock = (block, defaults) => {
+  const strings = block.strings
+  // per shape: [key, default factory or null when the value is stored] in key order.
+  // Masks may be wider than the 32 bits of `>>`, so the bits are read arithmetically
+  const shapes = block.shapes.map(([keys, mask]) =>
+    keys.map((key, i) => [key, Math.floor(mask / 2 ** i) % 2 ? defaults[key] : null])
+  )
+
+  const result = [null]
+  // [encoded value, container, slot]: decode into container[slot] without recursion
+  const stack = [[block.tree, result, 0]]
+  while (stack.length) {
+    const [encoded, container, slot] = stack.pop()
+    if (typeof encoded === "number") {
+      container[slot] = strings[encoded]
+      continue
+    }
+    if (typeof encoded === "string") {
+      container[slot] = encoded
+      continue
+    }
+    const kind = encoded[0]
+    if (kind > 0) {
+      const value = {}
+      let position = 1
+      for (const [key, fresh] of shapes[kind - 1]) {
+        if (fresh) {
+          value[key] = fresh()
+          continue
+        }
+        const item = encoded[position++]
+        if (typeof item === "number") {
+          value[key] = strings[item]
+        } else if (typeof item === "string") {
+          value[key] = item
+        } else {
+          // placeholder keeps the key order; filled in when popped
+          value[key] = null
+          stack.push([item, value, key])
+        }
+      }
+      container[slot] = value
+    } else if (kind === LIST) {
+      const value = new Array(encoded.length - 1)
+      for (let i = 1; i < encoded.length; i++) {
+        const item = encoded[i]
+        if (typeof item === "number") {
+          value[i - 1] = strings[item]
+        } else if (typeof item === "string") {
+          value[i - 1] = item
+        } else {
+          stack.push([item, value, i - 1])
+        }
+      }
+      container[slot] = value
+    } else {
+      container[slot] = encoded[1]
+    }
+  }
+  return result[0]
+}
+
+// Accepts either format, so callers can fetch whichever file is available
+export const loadTaxonomy = (data) => (isCompact(data) ? rehydrate(data) : data)
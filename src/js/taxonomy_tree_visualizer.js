@@ -6,6 +6,7 @@ import { loadDefaultJapaneseParser } from "budoux"
 import { downloadJSON } from "./handle_interactions_panel.js"
 import { getColor, defaultColor, defaultBackgroundColor } from "./color_setting.js"
 import { showModal, showEditModal, showAddChildModal } from "./modal.js"
+import { loadTaxonomy } from "./compact_taxonomy.js"
 
 // use budoux to parse japanese text
 const textParser = loadDefaultJapaneseParser()
@@ -23,23 +24,70 @@ let windowHeight = window.visualViewport.height
 // Check if the screen is mobile
 let isMobile = windowWidth < 768
 
-// json loader
-fetch("./Creative_Tech_Taxonomy_data.json")
-  .then((response) => {
+// lazy loading state: shard key -> url, and shard key -> fetched category
+let shardUrls = {}
+const shardRequests = new Map()
+const loadedShards = new Map()
+// tree layout precomputed by build_taxonomy.py --layout (null if unavailable or out of date)
+let precomputedLayout = null
+
+const fetchJson = (url) =>
+  fetch(url).then((response) => {
     if (!response.ok) {
       throw new Error("Network response was not ok")
     }
     return response.json()
   })
-  .then((data) => {
-    currentJson = data
-    createEditor()
+
+// json loader
+// First paint only needs the skeleton (root + collapsed category stubs). Each category's
+// subtree lives in a content-hashed shard that is fetched when the category is expanded.
+Promise.all([
+  fetchJson("./Creative_Tech_Taxonomy_skeleton.json"),
+  fetchJson("./taxonomy-shards/manifest.json"),
+  // optional: without it d3 lays out every state
+  fetchJson("./Creative_Tech_Taxonomy_layout.json").catch(() => null)
+])
+  .then(([skeleton, manifest, layout]) => {
+    shardUrls = manifest.shards
+    precomputedLayout = layout
+    currentJson = skeleton
     createVisualization()
+    // The JSON editor needs the whole tree, so fill in the remaining shards after first paint
+    return ensureAllShards().then(createEditor)
+  })
+  .catch((error) => {
+    console.warn("Lazy loading unavailable, loading the full taxonomy", error)
+    // the regular file first: gzipped it is about the size of the compact copy (build_taxonomy.py --compact),
+    // which also takes longer to decode; the compact copy is only used when the regular file is missing
+    return fetchJson("./Creative_Tech_Taxonomy_data.json")
+      .catch(() => fetchJson("./Creative_Tech_Taxonomy_data.compact.json"))
+      .then((data) => {
+        currentJson = loadTaxonomy(data)
+        createEditor()
+        createVisualization()
+      })
   })
   .catch((error) => console.error(error))
 
+// fetch a category shard once and swap it in for its stub in currentJson
+const loadShard = (key) => {
+  if (!shardRequests.has(key)) {
+    const request = fetchJson(`./${shardUrls[key]}`).then((category) => {
+      const index = currentJson.children.findIndex((child) => child.shard === key)
+      if (index !== -1) currentJson.children[index] = category
+      loadedShards.set(key, category)
+      return category
+    })
+    shardRequests.set(key, request)
+  }
+  return shardRequests.get(key)
+}
+
+const ensureAllShards = () => Promise.all(Object.keys(shardUrls).map(loadShard))
+
 // Change from the original JSON to make it easier to use for display
-const updateJsonFromLanguage = (json) => {
+const updateJsonFromLanguage = (json, parentColor = defaultColor) => {
   // Switching between languages, etc., can also be complicated when switching by display.
 
   const filterVisibleInfo = (node, color) => {
@@ -60,7 +108,7 @@ const updateJsonFromLanguage = (json) => {
     }
 
     // check for linebreak
-    if (countUpText(node.name) > linebreakThreshold && node.children) {
+    if (countUpText(node.name) > linebreakThreshold && (node.children || node.shard)) {
       node.label = splitText(node.name)
     } else {
       node.label = [node.name]
@@ -85,7 +133,7 @@ const updateJsonFromLanguage = (json) => {
     return node
   }
 
-  json = filterVisibleInfo(json, defaultColor)
+  json = filterVisibleInfo(json, parentColor)
   return json
 }
 
@@ -116,6 +164,98 @@ export function createVisualization() {
   window.root.dy = dy
   const tree = d3.tree().nodeSize([window.root.dx, window.root.dy])
 
+  // Place nodes from the build-time layout when at most one category is open (one level or fully
+  // expanded) or everything is expanded. Returns false for any other state, or when the tree no
+  // longer matches the layout.
+  const applyPrecomputedLayout = (root) => {
+    const layout = precomputedLayout
+    const categories = root.children
+    if (!layout || !categories || layout.nodeSize[0] !== dx || layout.nodeSize[1] !== dy) return false
+    if (categories.length !== layout.categories.length) return false
+
+    const shown = []
+    for (let i = 0; i < categories.length; i++) {
+      const category = categories[i]
+      if (!category.children) continue
+      let count = 0
+      let full = true
+      category.eachBefore((d) => {
+        count++
+        if (!d.children && d._children && d._children.length) full = false
+      })
+      if (full && count === layout.subtrees[i].length) {
+        shown.push({ index: i, full: true })
+      } else if (category.children.every((d) => !d.children) && count === category.children.length + 1) {
+        shown.push({ index: i, full: false })
+      } else {
+        return false
+      }
+    }
+
+    let offsets = layout.default
+    if (shown.length > 1) {
+      const expandable = layout.subtrees.filter((subtree) => subtree.length > 1).length
+      if (shown.length !== expandable || !shown.every((s) => s.full)) return false
+      offsets = layout.expanded
+    }
+
+    root.x = 0
+    root.y = 0
+    categories.forEach((category, i) => {
+      category.x = offsets[i]
+      category.y = category.depth * dy
+    })
+    shown.forEach(({ index, full }) => {
+      const category = categories[index]
+      if (full) {
+        const subtree = layout.subtrees[index]
+        let j = 0
+        category.eachBefore((d) => {
+          d.x = category.x + subtree[j++]
+          d.y = d.depth * dy
+        })
+      } else {
+        // one level open: the children are leaves spaced one node apart, centred on the category
+        const count = category.children.length
+        category.children.forEach((d, j) => {
+          d.x = category.x + (j - (count - 1) / 2) * dx
+          d.y = d.depth * dy
+        })
+      }
+    })
+    return true
+  }
+
+  let nextNodeId = 0
+
+  // Unloaded category stubs get an empty _children so they draw and toggle like collapsed parents
+  const collapsedChildren = (d) => (d.data.shard ? [] : d.children)
+
+  // Replace a category stub with the subtree from its shard
+  const attachShard = (d) =>
+    loadShard(d.data.shard).then((category) => {
+      if (!d.data.shard) return // already attached by an earlier click
+      const data = updateJsonFromLanguage(structuredClone(category), d.parent ? d.parent.data.color : defaultColor)
+      const subtree = d3.hierarchy(data)
+      subtree.descendants().forEach((n) => {
+        n.depth += d.depth
+        n.id = nextNodeId++
+        n._children = n.children
+      })
+      d.data = data
+      d._children = subtree.children || null
+      if (d._children) {
+        d._children.forEach((child) => {
+          child.parent = d
+          handleCollapse(child)
+        })
+      }
+    })
+
+  // Attach every category that is still a stub
+  const attachAllShards = (root) =>
+    Promise.all((root.children || root._children || []).filter((d) => d.data.shard).map(attachShard))
+
   const diagonal = d3
     .linkHorizontal()
     .x((d) => d.y)
@@ -189,8 +329,8 @@ export function createVisualization() {
   function update(event, source) {
     const nodes = window.root.descendants().reverse()
     const links = window.root.links()
-    // Compute the new tree layout.
-    tree(window.root)
+    // Compute the new tree layout, unless the build already did.
+    if (!applyPrecomputedLayout(window.root)) tree(window.root)
 
     const transition = svg
       .transition()
@@ -288,9 +428,12 @@ export function createVisualization() {
       })
       .attr("stroke", (d) => (editMode ? "rgba(255, 50, 50, 0.8)" : d.data.color))
       .attr("stroke-width", strokeWidth)
-      .on("click", (event, d) => {
+      .on("click", async (event, d) => {
         event.stopPropagation()
 
+        // Category subtree not fetched yet: load its shard before toggling
+        if (d.data.shard) await attachShard(d)
+
         if (editMode) {
           // In edit mode
           if (event.shiftKey) {
@@ -437,8 +580,9 @@ export function createVisualization() {
   window.root.y0 = windowHeight / 2
   window.root.descendants().forEach((d, i) => {
     d.id = i
-    d._children = d.children
+    d._children = collapsedChildren(d)
   })
+  nextNodeId = window.root.descendants().length
 
   // close all nodes
   handleCollapse(window.root)
@@ -500,9 +644,11 @@ export function createVisualization() {
         module.expandAllInteraction()
       })
     } else {
-      handleExpand(root)
-      update(null, root)
-      focusNode(root)
+      attachAllShards(root).then(() => {
+        handleExpand(root)
+        update(null, root)
+        focusNode(root)
+      })
     }
   })
 
@@ -518,7 +664,7 @@ export function createVisualization() {
       root.y0 = 0
       root.descendants().forEach((d, i) => {
         d.id = i
-        d._children = d.children
+        d._children = collapsedChildren(d)
       })
       root.children.forEach(handleCollapse)
       update(null, root)
@@ -538,7 +684,8 @@ const handleCollapse = (d) => {
 
 // DONE: fix expand node look
 const handleExpand = (d) => {
-  if (d._children) {
+  // an empty _children marks a category whose shard is not attached yet
+  if (d._children && d._children.length) {
     d.children = d._children
   }
   var children = d.children ? d.children : d._children
@@ -585,7 +732,10 @@ document.getElementById("toggleEditMode").addEventListener("click", function ()
 })
 
 // handle save edits button
-document.getElementById("saveEdits").addEventListener("click", function () {
+document.getElementById("saveEdits").addEventListener("click", async function () {
+  // Unexpanded categories are still stubs; fetch them so the export is complete
+  await ensureAllShards()
+
   // Ensure currentJson is updated with the latest tree data
   updateCurrentJson()
 
@@ -654,6 +804,12 @@ export const updateCurrentJson = () => {
   if (window.root) {
     // We need to convert the d3 hierarchy back to plain JSON
     function restoreOriginalFormat(node) {
+      // Category that was never expanded: keep the fetched shard, or the stub while it is still loading
+      if (node.data.shard) {
+        const loaded = loadedShards.get(node.data.shard)
+        return structuredClone(loaded || currentJson.children.find((child) => child.shard === node.data.shard))
+      }
+
       // Create a new node object with proper multilingual structure
       const jsonNode = {}
 
@@ -729,6 +885,8 @@ const createEditor = () => {
       console.log("json changed and set refresh timer")
 
       currentJson = jsonEdit.get()
+      // the tree may have been restructured
+      precomputedLayout = null
       changedBounceTimer = setTimeout(refreshVisualize, 1000)
     }
   }
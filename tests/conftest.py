@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# The utilities import each other as top-level modules, the way enhance.py runs them
+sys.path.insert(0, str(ROOT / "utilities"))
+sys.path.insert(0, str(ROOT))
@@ -0,0 +1,126 @@
+"""`enhance.py batch` against the local Messages API stand-in (utilities/mock_messages_api.py)"""
+
+import json
+import shutil
+
+import pytest
+
+import async_runner
+import batch_process
+import enhance
+from apply_enhancements import TaxonomyEnhancer, enhancement_updates
+from batch_journal import BatchJournal
+from conftest import ROOT
+from metrics import finish_run
+from mock_messages_api import start_mock_server
+from taxonomy_store import TaxonomyStore
+
+# Network-to-server jitter allowed when checking arrival times against the limits
+SLACK_SECONDS = 0.05
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """A scratch copy of the taxonomy sources as the working directory, so caches and saves stay in it"""
+    shutil.copytree(ROOT / "taxonomy-data", tmp_path / "taxonomy-data")
+    (tmp_path / "public").mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "mock")
+    yield tmp_path
+    # Write this run's metrics while still inside the scratch directory
+    finish_run()
+
+@pytest.fixture
+def mock_api():
+    servers = []
+
+    def start(latency):
+        server, base_url, state = start_mock_server(latency=latency)
+        servers.append(server)
+        return base_url, state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def run_batch(count, base_url, *options):
+    assert enhance.run_command("batch", [str(count), "--base-url", base_url, "--no-cache", *options])
+
+def assert_within_bucket(arrivals, cost, per_minute):
+    """Every window of arrivals spent no more than a full bucket plus its refill (see TokenBucket)"""
+    rate = per_minute / 60.0
+    capacity = rate * async_runner.BURST_SECONDS
+    for first in range(len(arrivals)):
+        for last in range(first, len(arrivals)):
+            spent = (last - first + 1) * cost
+            allowed = capacity + rate * (arrivals[last] - arrivals[first] + SLACK_SECONDS)
+            assert spent <= allowed, f"requests {first}-{last} spent {spent} of {allowed:.0f}"
+
+def test_concurrency_limit(workspace, mock_api):
+    base_url, state = mock_api(latency=0.2)
+
+    run_batch(8, base_url, "--concurrency", "3", "--rpm", "0", "--tpm", "0")
+
+    assert state.requests == 8
+    assert state.peak_concurrency == 3
+
+def test_requests_per_minute_limit(workspace, mock_api, monkeypatch):
+    # A half-second burst: 2 requests at once, then one every 0.25s
+    monkeypatch.setattr(async_runner, "BURST_SECONDS", 0.5)
+    base_url, state = mock_api(latency=0.0)
+
+    run_batch(6, base_url, "--concurrency", "6", "--rpm", "240", "--tpm", "0")
+
+    assert state.requests == 6
+    assert_within_bucket(state.arrivals, 1, 240)
+    assert state.arrivals[-1] - state.arrivals[0] >= (6 - 2) / 4 - SLACK_SECONDS
+
+def test_tokens_per_minute_limit(workspace, mock_api, monkeypatch):
+    # Every request is estimated at 1000 tokens; the bucket holds 2000 and refills 4000 a second
+    monkeypatch.setattr(async_runner, "BURST_SECONDS", 0.5)
+    monkeypatch.setattr(TaxonomyEnhancer, "estimate_tokens", lambda self, batch_data: 1000)
+    base_url, state = mock_api(latency=0.0)
+
+    run_batch(6, base_url, "--concurrency", "6", "--rpm", "0", "--tpm", "240000")
+
+    assert state.requests == 6
+    assert_within_bucket(state.arrivals, 1000, 240000)
+    assert state.arrivals[-1] - state.arrivals[0] >= (6 - 2) / 4 - SLACK_SECONDS
+
+def nodes_by_path(store):
+    """Every node of the store, keyed by its path"""
+    return {path: store.nodes[index] for index, path in store.walk()}
+
+def test_resume_skips_journaled_batches(workspace, mock_api, monkeypatch):
+    base_url, state = mock_api(latency=0.0)
+    original = nodes_by_path(TaxonomyStore.load())
+
+    # A run that dies before saving: its batches only exist in the journal
+    with monkeypatch.context() as patch:
+        patch.setattr(batch_process, "save_store_changes", lambda store: 0)
+        run_batch(3, base_url, "--concurrency", "2", "--rpm", "0", "--tpm", "0")
+    interrupted = BatchJournal().load()
+    assert state.requests == len(interrupted) == 3
+    journaled = {node["path"] for record in interrupted for node in record["nodes"]}
+
+    run_batch(2, base_url, "--concurrency", "2", "--rpm", "0", "--tpm", "0", "--resume")
+
+    # Only the two new batches were requested, none of them for a journaled node
+    assert state.requests == 3 + 2
+    records = BatchJournal().load()
+    assert records[:3] == interrupted
+    resumed = {node["path"] for record in records[3:] for node in record["nodes"]}
+    assert len(records) == 5
+    assert resumed and not resumed & journaled
+
+    # The journaled enhancements were re-applied and saved with the new ones: every weak
+    # field took the enhancement's value and every other field kept its original one
+    saved = nodes_by_path(TaxonomyStore.load())
+    for record in interrupted:
+        enhancements = {item["name"]: item for item in record["enhancements"]["enhancements"]}
+        for node in record["nodes"]:
+            before, after = original[node["path"]], saved[node["path"]]
+            updates = enhancement_updates(before.description_length, before.has_links, enhancements[node["name"]])
+            assert updates
+            assert after.description == updates.get("description", before.description)
+            assert after.links == updates.get("links", before.links)
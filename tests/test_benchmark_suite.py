@@ -0,0 +1,60 @@
+"""Baseline storage and regression checks of utilities/benchmark_suite.py"""
+
+import json
+
+import pytest
+
+import benchmark_suite
+from metrics import finish_run
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """Run from a scratch directory so the generated dataset and baseline stay in it"""
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    finish_run()
+
+def run(*options):
+    benchmark_suite.main(["--sizes", "300", "--stages", "build", "--no-memory", *options])
+
+def test_first_run_stores_the_baseline(workspace):
+    run()
+
+    baseline = json.loads((workspace / benchmark_suite.BASELINE_PATH).read_text(encoding="utf-8"))
+    assert list(baseline) == ["build@300"]
+    assert baseline["build@300"]["seconds"] > 0
+    assert baseline["build@300"]["peak_bytes"] is None
+
+def test_slower_stage_fails_against_the_baseline(workspace, monkeypatch):
+    run()
+    baseline_path = workspace / benchmark_suite.BASELINE_PATH
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    baseline["build@300"]["seconds"] = 1e-6
+    baseline_path.write_text(json.dumps(baseline), encoding="utf-8")
+
+    with monkeypatch.context() as patch, pytest.raises(SystemExit) as exit_info:
+        patch.setattr(benchmark_suite, "MIN_SECONDS_DELTA", 0)
+        run()
+    assert exit_info.value.code == 1
+
+    # Accepting the new numbers clears the regression (checked at the usual noise floor)
+    run("--update-baseline")
+    run()
+
+def test_compare_ignores_noise_and_missing_stages():
+    baseline = {
+        "build@910": {"seconds": 1.0, "peak_bytes": 10_000_000},
+        "load_store@910": {"seconds": 0.01, "peak_bytes": 100_000},
+    }
+    results = {
+        "build@910": {"seconds": 1.5, "peak_bytes": 20_000_000},
+        "load_store@910": {"seconds": 0.03, "peak_bytes": 300_000},
+        "prioritize@910": {"seconds": 9.0, "peak_bytes": None},
+    }
+
+    regressions = benchmark_suite.compare(results, baseline, tolerance=0.3)
+
+    assert len(regressions) == 2
+    assert regressions[0].startswith("build@910 seconds: 1.000s -> 1.500s")
+    assert regressions[1].startswith("build@910 peak_bytes: 10.0 MB -> 20.0 MB")
+    assert benchmark_suite.compare(results, baseline, tolerance=1.5) == []
@@ -0,0 +1,75 @@
+"""Incremental builds (build_taxonomy.py)"""
+
+import json
+
+import pytest
+
+from benchmark_build import check_peak_growth, measure
+from build_taxonomy import build_taxonomy
+from synthetic_taxonomy import generate_taxonomy
+
+@pytest.fixture
+def dirs(tmp_path):
+    data_dir = tmp_path / "taxonomy-data"
+    generate_taxonomy(data_dir, total_nodes=300)
+    return data_dir, tmp_path / "public" / "taxonomy.json", tmp_path / "cache"
+
+def build(dirs, **options):
+    data_dir, output_path, cache_dir = dirs
+    build_taxonomy(data_dir=data_dir, output_path=output_path, cache_dir=cache_dir, verbose=False,
+                   layout=True, compact=True, **options)
+
+def output_mtimes(dirs):
+    _, output_path, cache_dir = dirs
+    files = list(output_path.parent.rglob("*.json"))
+    files += [cache_dir / "path_index.json", cache_dir / "analysis.json", cache_dir / "candidates.json"]
+    return {path: path.stat().st_mtime_ns for path in files}
+
+def test_no_op_build_writes_nothing(dirs):
+    build(dirs)
+    before = output_mtimes(dirs)
+
+    build(dirs, incremental=True)
+
+    assert output_mtimes(dirs) == before
+
+def test_edit_refreshes_every_output(dirs):
+    data_dir, _, _ = dirs
+    build(dirs)
+    before = output_mtimes(dirs)
+
+    path = data_dir / "category-2.json"
+    category = json.loads(path.read_text(encoding="utf-8"))
+    category["children"][0]["description"] = "Edited"
+    path.write_text(json.dumps(category, indent=2), encoding="utf-8")
+    build(dirs, incremental=True)
+
+    after = output_mtimes(dirs)
+    unchanged = {path for path in before if after.get(path) == before[path]}
+    # Only the shards of the untouched categories stay as they were
+    assert all(path.parent.name == "taxonomy-shards" and path.name != "manifest.json" for path in unchanged)
+
+def test_touched_source_refreshes_the_sidecars_only(dirs):
+    data_dir, _, _ = dirs
+    build(dirs)
+    before = output_mtimes(dirs)
+
+    # Same content, new mtime: the sidecars record the sources' stat signatures, nothing else changes
+    path = data_dir / "category-2.json"
+    path.write_bytes(path.read_bytes())
+    build(dirs, incremental=True)
+
+    after = output_mtimes(dirs)
+    changed = {path.name for path in before if after[path] != before[path]}
+    assert changed == {"analysis.json", "candidates.json"}
+
+def test_streaming_peak_grows_slower_than_the_taxonomy(tmp_path):
+    rows = []
+    for total_nodes in (300, 9100):
+        data_dir = tmp_path / f"data-{total_nodes}"
+        nodes = generate_taxonomy(data_dir, total_nodes=total_nodes)
+        _, peak = measure(lambda: build_taxonomy(data_dir=data_dir, output_path=tmp_path / f"{total_nodes}.json",
+                                                 cache_dir=tmp_path / f"cache-{total_nodes}", verbose=False))
+        rows.append({"nodes": nodes, "stream_peak": peak})
+
+    assert check_peak_growth(rows) is None
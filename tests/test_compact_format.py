@@ -0,0 +1,62 @@
+"""Compact taxonomy format: Python and JS loaders reproduce the tree"""
+
+import json
+import shutil
+
+import pytest
+
+from benchmark_compact import node_time
+from build_taxonomy import build_taxonomy
+from compact_format import COMPACT_NAME, DEFAULTS, MASK_BITS, load_compact, pack, rehydrate, write_compact
+from synthetic_taxonomy import generate_taxonomy
+
+def wide_tree(width):
+    """A root whose single child has `width` keys, every third one holding a non-default value"""
+    defaults = {f"field{i}": "" for i in range(width)}
+    child = {key: "" if i % 3 else f"value {i}" for i, key in enumerate(defaults)}
+    child["name"] = "Wide"
+    return {"name": "Root", "description": "", "tags": [], "links": {"Link": ""}, "children": [child]}, defaults
+
+def test_round_trip_elides_defaults():
+    tree = {"name": "Root", "description": "", "tags": [], "links": {"Link": ""},
+            "children": [{"name": "Tool", "description": "A tool", "tags": ["a"], "links": {"Link": ""}}]}
+    document = pack(tree)
+    assert json.dumps(rehydrate(document)) == json.dumps(tree)
+    assert "" not in document["children"][0]["strings"]
+
+def test_mask_stays_within_javascript_integers():
+    tree, defaults = wide_tree(MASK_BITS + 20)
+    document = pack(tree, {**DEFAULTS, **defaults})
+    blocks = [document["root"], *document["children"]]
+    assert all(mask < 2 ** MASK_BITS for block in blocks for _, mask in block["shapes"])
+    assert json.dumps(rehydrate(document)) == json.dumps(tree)
+
+@pytest.mark.skipif(not shutil.which("node"), reason="node is not installed")
+@pytest.mark.parametrize("width", [8, 40, MASK_BITS + 20])
+def test_javascript_loader_decodes_wide_masks(tmp_path, width):
+    # Masks past bit 31 used to be misread by 32-bit shifts in compact_taxonomy.js
+    tree, defaults = wide_tree(width)
+    path = tmp_path / "tree.compact.json"
+    path.write_text(json.dumps(pack(tree, {**DEFAULTS, **defaults})), encoding="utf-8")
+    _, decoded = node_time(path, 1)
+    assert json.dumps(decoded) == json.dumps(tree)
+
+def test_build_splices_cached_blocks(tmp_path):
+    data_dir = tmp_path / "taxonomy-data"
+    generate_taxonomy(data_dir, total_nodes=300)
+    output_path = tmp_path / "public" / "taxonomy.json"
+    build_taxonomy(data_dir=data_dir, output_path=output_path, cache_dir=tmp_path / "cache", verbose=False,
+                   compact=True)
+    tree = json.loads(output_path.read_text(encoding="utf-8"))
+
+    # An incremental build re-packs only the edited category
+    tree["children"][1]["children"][0]["description"] = "Edited"
+    (data_dir / "category-2.json").write_text(json.dumps(tree["children"][1], indent=2), encoding="utf-8")
+    build_taxonomy(incremental=True, data_dir=data_dir, output_path=output_path, cache_dir=tmp_path / "cache",
+                   verbose=False)
+
+    compact_path = output_path.parent / COMPACT_NAME
+    assert load_compact(compact_path) == json.loads(output_path.read_text(encoding="utf-8"))
+    expected_path = tmp_path / "expected.json"
+    write_compact(expected_path, tree)
+    assert compact_path.read_bytes() == expected_path.read_bytes()
@@ -0,0 +1,67 @@
+"""Batch planning (utilities/efficient_enhance.py)"""
+
+import argparse
+import json
+
+from apply_enhancements import TaxonomyEnhancer
+from conftest import ROOT
+from efficient_enhance import (CALIBRATION_MIN_NODES, DEFAULT_CATEGORY_WEIGHTS, OUTPUT_TOKENS_PER_NODE, TokenBudget,
+                               batch_nodes_by_category, calibrated_output_tokens_per_node,
+                               category_weights_from_args, unknown_weight_names)
+from taxonomy_store import TaxonomyStore
+
+# Indented JSON with URLs tokenizes denser than prose; count answers pessimistically
+ANSWER_CHARS_PER_TOKEN = 3
+
+def category_names():
+    with open(ROOT / "taxonomy-data" / "_index.json", "r", encoding="utf-8") as f:
+        return [entry["name"] for entry in json.load(f)]
+
+def test_default_weights_name_existing_categories():
+    assert unknown_weight_names(DEFAULT_CATEGORY_WEIGHTS, category_names()) == []
+
+def test_unknown_weight_names_are_reported(capsys):
+    args = argparse.Namespace(category_weight=["game engines=3", "Web Technologies=2"])
+
+    weights = category_weights_from_args(args, ROOT / "taxonomy-data")
+
+    assert weights == {"game engines": 3.0, "Web Technologies": 2.0}
+    warnings = [line for line in capsys.readouterr().out.splitlines() if "matches no category" in line]
+    assert len(warnings) == 1 and "'Web Technologies'" in warnings[0]
+
+def longest_answer(batch):
+    """The answer a batch asks for, at the longest description and links the prompt allows"""
+    return json.dumps({"enhancements": [{
+        "name": node_info["node"].name,
+        "description": "x" * 150,
+        "links": {"Official": "https://www.example-project.org/",
+                  "Docs": "https://docs.example-project.org/en/latest/"},
+    } for node_info in batch["nodes"]]}, indent=2)
+
+def test_packed_batches_fit_the_answer_limit():
+    batches = batch_nodes_by_category(TaxonomyStore.load(ROOT / "taxonomy-data"), dedupe=True)
+
+    assert max(len(batch["nodes"]) for batch in batches) > 1
+    for batch in batches:
+        assert batch["tokens"]["output"] <= TokenBudget().max_output_tokens
+        assert len(longest_answer(batch)) / ANSWER_CHARS_PER_TOKEN <= TaxonomyEnhancer.MAX_TOKENS
+
+def write_run(metrics_dir, name, counters):
+    metrics_dir.mkdir(exist_ok=True)
+    (metrics_dir / f"{name}.json").write_text(json.dumps({"counters": counters}), encoding="utf-8")
+
+def test_answer_estimate_calibrates_from_recorded_usage(tmp_path):
+    metrics_dir = tmp_path / "metrics"
+    write_run(metrics_dir, "batch-1", {"output_tokens": 4000, "answered_nodes": CALIBRATION_MIN_NODES // 2})
+    write_run(metrics_dir, "plan-1", {"output_tokens": 0})
+    assert calibrated_output_tokens_per_node(metrics_dir) == OUTPUT_TOKENS_PER_NODE
+
+    write_run(metrics_dir, "batch-2", {"output_tokens": 12000, "answered_nodes": CALIBRATION_MIN_NODES // 2})
+    # 16000 tokens over 100 nodes, plus the 25% margin
+    assert calibrated_output_tokens_per_node(metrics_dir) == 200
+
+    store = TaxonomyStore.load(ROOT / "taxonomy-data")
+    default = batch_nodes_by_category(store)
+    calibrated = batch_nodes_by_category(store, budget=TokenBudget(output_tokens_per_node=200))
+    assert max(len(batch["nodes"]) for batch in calibrated) < max(len(batch["nodes"]) for batch in default)
+    assert all(batch["tokens"]["output"] <= TokenBudget().max_output_tokens for batch in calibrated)
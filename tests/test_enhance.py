@@ -0,0 +1,27 @@
+"""Command-line handling of enhance.py"""
+
+import os
+
+import pytest
+
+import enhance
+from metrics import PROFILE_ENV
+
+def test_profile_option_is_stripped():
+    assert enhance.pop_profile(["batch", "--profile", "rebuild", "--rpm", "0"]) == (["batch", "--rpm", "0"], "rebuild")
+    assert enhance.pop_profile(["batch", "3"]) == (["batch", "3"], None)
+
+@pytest.mark.parametrize("args", [["batch", "--profile"], ["batch", "--profile", "--rpm", "0"]])
+def test_profile_without_a_stage_is_a_usage_error(args, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        enhance.main(args)
+
+    assert exit_info.value.code == 2
+    assert "--profile needs a stage name" in capsys.readouterr().out
+
+def test_profile_stage_is_passed_to_metrics(monkeypatch):
+    monkeypatch.delenv(PROFILE_ENV, raising=False)
+
+    enhance.main(["--profile", "load_store"])
+
+    assert os.environ[PROFILE_ENV] == "load_store"
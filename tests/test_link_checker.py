@@ -0,0 +1,105 @@
+"""Link checker against the local stand-in web server (utilities/mock_link_server.py)"""
+
+import pytest
+
+from link_checker import LinkCache, LinkChecker, check_links
+from mock_link_server import start_link_server
+from taxonomy_store import TaxonomyStore
+
+def node(name, links, children=()):
+    return {"name": {"en": name}, "description": "", "tags": [], "links": links, "children": list(children)}
+
+def make_store(links):
+    """A one-category store whose tools carry the given {label: url} links, one tool per link"""
+    tools = [node(f"Tool {i}", {label: url}) for i, (label, url) in enumerate(links.items())]
+    return TaxonomyStore.from_tree(node("Root", {"Link": ""}, [node("Category", {}, tools)]))
+
+@pytest.fixture
+def link_server():
+    server, base_url, state = start_link_server(latency=0.0)
+    yield server, base_url, state
+    server.shutdown()
+    server.server_close()
+
+def test_classifies_broken_and_placeholder_links(link_server):
+    _, base_url, _ = link_server
+    store = make_store({
+        "ok": f"{base_url}/docs",
+        "missing": f"{base_url}/status/404",
+        "head refused": f"{base_url}/no-head/page",
+        "moved": f"{base_url}/redirect/final",
+        "moved away": f"{base_url}/redirect/status/410",
+        "unavailable": f"{base_url}/status/503",
+        "placeholder": "https://example.com/tool",
+        "placeholder subdomain": "https://docs.example.org/",
+    })
+
+    report = check_links(store, LinkChecker(concurrency=4, per_host=2, timeout=5))
+
+    summary = report["summary"]
+    assert summary["links"] == 8
+    assert summary["urls"] == 6
+    assert (summary["ok"], summary["broken"], summary["errors"], summary["placeholders"]) == (3, 2, 1, 2)
+    assert {entry["url"]: entry["status"] for entry in report["broken"]} == {
+        f"{base_url}/status/404": 404,
+        f"{base_url}/redirect/status/410": 410,
+    }
+    assert [(entry["url"], entry["status"]) for entry in report["errors"]] == [(f"{base_url}/status/503", 503)]
+    assert sorted(entry["url"] for entry in report["placeholders"]) == [
+        "https://docs.example.org/", "https://example.com/tool"]
+
+def test_respects_the_per_host_limit():
+    server, base_url, state = start_link_server(latency=0.05)
+    try:
+        port = server.server_address[1]
+        hosts = ["alpha.local", "beta.local", "gamma.local"]
+        urls = [f"http://{host}/page/{i}" for host in hosts for i in range(8)]
+
+        checker = LinkChecker(concurrency=16, per_host=2, timeout=5, connect_to=("127.0.0.1", port))
+        results = checker.check_all(urls)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert all(result["state"] == "ok" for result in results.values())
+    assert set(state.peak_per_host) == set(hosts)
+    assert max(state.peak_per_host.values()) <= 2
+    # Hosts are checked side by side, and each reuses its keep-alive connections
+    assert min(state.peak_per_host.values()) == 2
+    assert state.connections <= len(hosts) * 2
+
+def test_second_run_revalidates_from_the_cache(link_server, tmp_path):
+    _, base_url, state = link_server
+    store = make_store({f"page {i}": f"{base_url}/page/{i}" for i in range(5)} |
+                       {"missing": f"{base_url}/status/404"})
+    # max_age_days=0: every cached result is stale, so the second run asks again with its validators
+    cache = LinkCache(tmp_path / "links.sqlite", max_age_days=0)
+    try:
+        first = check_links(store, LinkChecker(timeout=5, cache=cache))
+        requests_before = state.requests
+        second = check_links(store, LinkChecker(timeout=5, cache=cache))
+    finally:
+        cache.close()
+
+    assert first["summary"]["ok"] == 5
+    assert first["summary"]["revalidated"] == 0
+    assert second["summary"]["ok"] == 5
+    assert second["summary"]["revalidated"] == 5
+    assert state.not_modified == 5
+    assert second["summary"]["broken"] == 1
+    # One conditional HEAD per cached page, plus the broken link checked afresh (HEAD, then GET)
+    assert state.requests - requests_before == 7
+
+def test_fresh_cache_entries_skip_the_network(link_server, tmp_path):
+    _, base_url, state = link_server
+    store = make_store({"ok": f"{base_url}/docs"})
+    cache = LinkCache(tmp_path / "links.sqlite", max_age_days=7)
+    try:
+        check_links(store, LinkChecker(timeout=5, cache=cache))
+        requests_before = state.requests
+        report = check_links(store, LinkChecker(timeout=5, cache=cache))
+    finally:
+        cache.close()
+
+    assert report["summary"]["cached"] == 1
+    assert state.requests == requests_before
@@ -0,0 +1,69 @@
+"""Patch logs beside the source files (utilities/patch_log.py)"""
+
+import shutil
+
+import pytest
+
+import patch_log
+from conftest import ROOT
+from metrics import finish_run
+from taxonomy_store import TaxonomyStore
+from workspace import Workspace
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """A scratch copy of the taxonomy sources; snapshots and metrics go next to it"""
+    shutil.copytree(ROOT / "taxonomy-data", tmp_path / "taxonomy-data")
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path / "taxonomy-data"
+    finish_run()
+
+def category_nodes(store, category):
+    return [index for index, _ in store.walk() if store.nodes[index].category == category]
+
+def descriptions(store, indices):
+    return [store.nodes[index].description for index in indices]
+
+def test_log_lines_replay_on_load(data_dir):
+    store = TaxonomyStore.load(data_dir)
+    first, second = category_nodes(store, 0)[1:3]
+    store.set_fields(first, description="Patched once")
+    store.save_dirty()
+    store.set_fields(second, description="Patched twice")
+    store.save_dirty()
+
+    assert patch_log.log_path(store.source_path(0)).exists()
+    assert descriptions(TaxonomyStore.load(data_dir), [first, second]) == ["Patched once", "Patched twice"]
+
+def test_lines_for_another_base_are_skipped(data_dir, capsys):
+    store = TaxonomyStore.load(data_dir)
+    node = category_nodes(store, 0)[1]
+    original = store.nodes[node].description
+    store.set_fields(node, description="Patched")
+    store.save_dirty()
+
+    # A hand edit of the base shifts what the logged positions would point at
+    path = store.source_path(0)
+    path.write_text(path.read_text(encoding="utf-8") + "\n", encoding="utf-8")
+
+    assert descriptions(TaxonomyStore.load(data_dir), [node]) == [original]
+    assert "skipped 1 patch line" in capsys.readouterr().out
+
+def test_compact_then_save_in_one_workspace(data_dir):
+    # enhance.py shell: a batch, then compact, then another batch against the same warm store
+    workspace = Workspace(data_dir)
+    first, second = category_nodes(workspace.store, 0)[1:3]
+    workspace.store.set_fields(first, description="Before compaction")
+    workspace.store.save_dirty()
+    workspace.saved()
+
+    patch_log.main(["--data-dir", str(data_dir)], workspace=workspace)
+    assert not patch_log.log_path(workspace.store.source_path(0)).exists()
+
+    workspace.refresh()
+    workspace.store.set_fields(second, description="After compaction")
+    workspace.store.save_dirty()
+    workspace.saved()
+
+    reloaded = TaxonomyStore.load(data_dir)
+    assert descriptions(reloaded, [first, second]) == ["Before compaction", "After compaction"]
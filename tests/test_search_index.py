@@ -0,0 +1,59 @@
+"""Search index written by the build (utilities/search_index.py)"""
+
+import json
+
+import pytest
+
+from build_taxonomy import build_taxonomy
+from search_index import SEARCH_INDEX_NAME, SearchIndex, node_fields
+from synthetic_taxonomy import Profile, generate_taxonomy
+from taxonomy_store import TaxonomyStore
+
+@pytest.fixture
+def built(tmp_path):
+    data_dir = tmp_path / "taxonomy-data"
+    generate_taxonomy(data_dir, total_nodes=400, profile=Profile(ja_ratio=0.3))
+    output_path = tmp_path / "public" / "taxonomy.json"
+    build_taxonomy(data_dir=data_dir, output_path=output_path, cache_dir=tmp_path / "cache", verbose=False)
+    return data_dir, output_path, tmp_path / "cache"
+
+def preorder(tree):
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(node.get("children", [])))
+
+def test_matches_a_walk_over_the_tree(built):
+    data_dir, output_path, _ = built
+    index = SearchIndex.load(output_path.parent / SEARCH_INDEX_NAME)
+    nodes = list(preorder(json.loads(output_path.read_text(encoding="utf-8"))))
+    store = TaxonomyStore.load(data_dir)
+
+    assert len(index) == len(nodes) == len(store.nodes)
+    assert [index.path(i) for i in range(len(nodes))] == [path for _, path in sorted(store.walk())]
+    for word in ["sensor", "a", "synthetic"]:
+        expected = {node_id for node_id, node in enumerate(nodes)
+                    if any(term.startswith(word) for terms in node_fields(node) for term in terms)}
+        assert {node_id for node_id, _ in index.search(word, limit=0)} == expected, word
+    # Japanese is matched by character bigrams
+    hits = index.search("インタラクティブ", limit=0)
+    assert hits and all("インタラクティブ" in json.dumps(nodes[node_id], ensure_ascii=False) for node_id, _ in hits)
+
+def test_incremental_build_splices_the_same_index(built):
+    data_dir, output_path, cache_dir = built
+    edited = data_dir / "category-2.json"
+    category = json.loads(edited.read_text(encoding="utf-8"))
+    category["children"][0]["description"] = "Now mentions a theremin"
+    edited.write_text(json.dumps(category, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    build_taxonomy(incremental=True, data_dir=data_dir, output_path=output_path, cache_dir=cache_dir,
+                   verbose=False)
+    incremental = (output_path.parent / SEARCH_INDEX_NAME).read_bytes()
+    build_taxonomy(data_dir=data_dir, output_path=output_path, cache_dir=cache_dir.with_name("fresh"),
+                   verbose=False)
+
+    assert incremental == (output_path.parent / SEARCH_INDEX_NAME).read_bytes()
+    index = SearchIndex.load(output_path.parent / SEARCH_INDEX_NAME)
+    assert [index.path(node_id) for node_id, _ in index.search("theremin")] == [
+        f"Synthetic Taxonomy/Category 2/{category['children'][0]['name']['en']}"]
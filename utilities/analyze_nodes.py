@@ -8,6 +8,40 @@ import json
 import sys
 from pathlib import Path
 
+sys.path.append(str(Path(__file__).parent))
+
+from metrics import metrics, start_run
+from taxonomy_store import TaxonomyStore
+from tree_walk import walk
+
+def quality_score(description_length, has_links, children_count):
+    """Content quality score (0-100) from the three per-node facts."""
+    score = 0
+    
+    # Description scoring (0-60 points)
+    if description_length == 0:
+        score += 0
+    elif description_length < 20:
+        score += 10
+    elif description_length < 50:
+        score += 25
+    elif description_length < 100:
+        score += 40
+    else:
+        score += 60
+    
+    # Links scoring (0-20 points)
+    if has_links:
+        score += 20
+    
+    # Children context scoring (0-20 points)
+    if children_count > 0:
+        score += 10
+    if children_count > 3:
+        score += 10
+    
+    return score
+
 def analyze_node(node, path=""):
     """Analyze a single node and return metrics about its content quality."""
     name = node.get("name", {})
@@ -29,71 +63,89 @@ def analyze_node(node, path=""):
     }
     
     # Calculate content quality score (0-100)
-    score = 0
-    
-    # Description scoring (0-60 points)
-    if metrics["description_length"] == 0:
-        score += 0
-    elif metrics["description_length"] < 20:
-        score += 10
-    elif metrics["description_length"] < 50:
-        score += 25
-    elif metrics["description_length"] < 100:
-        score += 40
-    else:
-        score += 60
-    
-    # Links scoring (0-20 points)
-    if metrics["has_links"]:
-        score += 20
-    
-    # Children context scoring (0-20 points)
-    if metrics["children_count"] > 0:
-        score += 10
-    if metrics["children_count"] > 3:
-        score += 10
-    
-    metrics["score"] = score
+    metrics["score"] = quality_score(metrics["description_length"], metrics["has_links"], metrics["children_count"])
     return metrics
 
+def analyze_record(store, index, path):
+    """Same metrics as analyze_node, for a row of a TaxonomyStore."""
+    node = store.nodes[index]
+    description_length = node.description_length
+    children_count = len(node.children)
+    has_links = node.has_links
+    return {
+        "path": path,
+        "name": node.name,
+        "description_length": description_length,
+        "has_meaningful_description": description_length > 50,
+        "has_links": has_links,
+        "children_count": children_count,
+        "score": quality_score(description_length, has_links, children_count)
+    }
+
+def analyze_store(store):
+    """Analyze every node of a TaxonomyStore in preorder."""
+    return [analyze_record(store, index, path) for index, path in store.walk()]
+
+def iter_analysis(node, path=""):
+    """Yield analyze_node metrics for every node in the tree, in preorder."""
+    for visit in walk(node, path):
+        yield analyze_node(visit.node, visit.parent_path)
+
 def analyze_tree(node, path="", results=None):
-    """Recursively analyze all nodes in the tree."""
+    """Analyze all nodes in the tree (iteratively, so any depth works)."""
     if results is None:
         results = []
-    
-    # Analyze current node
-    metrics = analyze_node(node, path)
-    results.append(metrics)
-    
-    # Recursively analyze children
-    for child in node.get("children", []):
-        analyze_tree(child, metrics["path"], results)
-    
+    results.extend(iter_analysis(node, path))
     return results
 
-def load_taxonomy_data():
-    """Load the main taxonomy data file."""
-    data_file = Path("public/Creative_Tech_Taxonomy_data.json")
-    if not data_file.exists():
-        print(f"Error: {data_file} not found")
+def load_taxonomy_data(data_dir="taxonomy-data"):
+    """Load the taxonomy source files into a TaxonomyStore."""
+    data_dir = Path(data_dir)
+    if not data_dir.exists():
+        print(f"Error: {data_dir} not found")
         sys.exit(1)
     
-    with open(data_file, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    return TaxonomyStore.load(data_dir)
 
 def print_analysis_report(results):
     """Print a detailed analysis report."""
     # Sort by score (lowest first - these need the most help)
     results.sort(key=lambda x: x["score"])
     
+    urgent_nodes = [r for r in results if r["score"] < 30]
+    medium_nodes = [r for r in results if 30 <= r["score"] < 60]
+    high_quality = len([r for r in results if r["score"] >= 60])
+    write_report(len(results), (len(urgent_nodes), len(medium_nodes), high_quality),
+                 urgent_nodes[:20], medium_nodes[:10])
+
+def print_columnar_report(columns, stats=False):
+    """print_analysis_report for NodeColumns; only the displayed rows become dicts."""
+    write_report(len(columns), columns.quality_counts(),
+                 columns.records(columns.ranked(high=30)[:20]),
+                 columns.records(columns.ranked(low=30, high=60)[:10]))
+    
+    if stats:
+        print_stats(columns.histogram(), columns.category_summary())
+
+def print_stats(histogram, category_summary):
+    """Score histogram and per-category aggregates (NodeColumns.category_summary rows)."""
+    print("\n=== SCORE DISTRIBUTION ===")
+    for score, count in histogram.items():
+        print(f"{score:3d}: {count}")
+    
+    print("\n=== BY CATEGORY ===")
+    for row in category_summary:
+        print(f"{row['category']}: {row['nodes']} nodes, mean score {row['mean_score']:.1f}, "
+              f"{row['low_quality']} low quality, {row['missing_descriptions']} without description, "
+              f"{row['missing_links']} without links")
+
+def write_report(total_nodes, quality_counts, urgent_nodes, medium_nodes):
+    """Report body shared by the list and columnar analyses."""
+    low_quality, medium_quality, high_quality = quality_counts
+    
     print("=== TAXONOMY NODE ANALYSIS REPORT ===\n")
     
     # Summary statistics
-    total_nodes = len(results)
-    low_quality = len([r for r in results if r["score"] < 30])
-    medium_quality = len([r for r in results if 30 <= r["score"] < 60])
-    high_quality = len([r for r in results if r["score"] >= 60])
-    
     print(f"Total nodes analyzed: {total_nodes}")
     print(f"Low quality nodes (score < 30): {low_quality}")
     print(f"Medium quality nodes (30-59): {medium_quality}")
@@ -102,9 +154,8 @@ def print_analysis_report(results):
     
     # Nodes needing immediate attention
     print("=== NODES NEEDING IMMEDIATE ATTENTION (Score < 30) ===")
-    urgent_nodes = [r for r in results if r["score"] < 30]
     
-    for i, node in enumerate(urgent_nodes[:20]):  # Show top 20
+    for i, node in enumerate(urgent_nodes):  # Show top 20
         print(f"{i+1:2d}. {node['name']} (Score: {node['score']})")
         print(f"    Path: {node['path']}")
         print(f"    Description length: {node['description_length']} chars")
@@ -112,13 +163,12 @@ def print_analysis_report(results):
         print(f"    Children: {node['children_count']}")
         print()
     
-    if len(urgent_nodes) > 20:
-        print(f"... and {len(urgent_nodes) - 20} more nodes with score < 30")
+    if low_quality > 20:
+        print(f"... and {low_quality - 20} more nodes with score < 30")
     
     print("\n=== NODES FOR IMPROVEMENT (Score 30-59) ===")
-    medium_nodes = [r for r in results if 30 <= r["score"] < 60]
     
-    for i, node in enumerate(medium_nodes[:10]):  # Show top 10
+    for i, node in enumerate(medium_nodes):  # Show top 10
         print(f"{i+1:2d}. {node['name']} (Score: {node['score']})")
         print(f"    Path: {node['path']}")
         print()
@@ -140,16 +190,75 @@ def export_low_quality_nodes(results, threshold=30):
     
     print(f"\nExported {len(low_quality)} low-quality nodes to {output_file}")
 
-def main():
-    """Main function to run the analysis."""
-    print("Loading taxonomy data...")
-    data = load_taxonomy_data()
+def main(argv=None, workspace=None):
+    """Main function to run the analysis.
+    
+    A Workspace (enhance.py shell) supplies the already loaded store and columns.
+    Otherwise the analysis sidecar written by build_taxonomy.py is used while
+    it matches the sources, so nothing has to be walked.
+    """
+    import argparse
+    # NumPy is only needed here, not by the tools that import quality_score
+    import node_columns
     
-    print("Analyzing nodes...")
-    results = analyze_tree(data)
+    parser = argparse.ArgumentParser(description='Analyze taxonomy node quality')
+    parser.add_argument('--engine', choices=['auto', 'columnar', 'python'], default='auto',
+                       help='columnar scores with NumPy arrays; auto uses it when NumPy is installed')
+    parser.add_argument('--stats', action='store_true',
+                       help='Also print the score histogram and per-category aggregates '
+                            '(columnar engine or precomputed analysis)')
+    parser.add_argument('--data-dir', default='taxonomy-data', help='Directory holding the category files')
+    parser.add_argument('--from-sources', action='store_true',
+                       help='Ignore the analysis precomputed by build_taxonomy.py and read the category files')
+    args = parser.parse_args(argv)
+    start_run("analyze")
     
-    print_analysis_report(results)
-    export_low_quality_nodes(results)
+    columnar = args.engine == 'columnar' or (args.engine == 'auto' and node_columns.np is not None)
+    if workspace is not None and Path(args.data_dir) != workspace.data_dir:
+        workspace = None
+    analysis = None
+    if workspace is None and not args.from_sources:
+        from sidecars import ANALYSIS_PATH, load_sidecar
+        with metrics.timer("load_sidecar"):
+            analysis = load_sidecar(ANALYSIS_PATH, args.data_dir)
+    
+    if analysis is not None:
+        print(f"Loading taxonomy data... (precomputed in {ANALYSIS_PATH})")
+    else:
+        print("Loading taxonomy data...")
+    if columnar:
+        with metrics.timer("load_columns"):
+            if workspace is not None:
+                columns = workspace.columns
+            elif analysis is not None:
+                columns = node_columns.NodeColumns.from_analysis(analysis)
+            else:
+                columns = node_columns.NodeColumns.from_sources(args.data_dir)
+        metrics.count("nodes_loaded", len(columns))
+        
+        print("Analyzing nodes...")
+        with metrics.timer("analyze"):
+            print_columnar_report(columns, stats=args.stats and analysis is None)
+            if args.stats and analysis is not None:
+                print_stats(dict(analysis["histogram"]), analysis["categories"])
+            export_low_quality_nodes(columns.records(columns.ranked(high=30)))
+    else:
+        if analysis is not None:
+            from sidecars import analysis_records
+            results = analysis_records(analysis)
+        else:
+            store = workspace.store if workspace is not None else load_taxonomy_data(args.data_dir)
+            results = None
+        
+        print("Analyzing nodes...")
+        with metrics.timer("analyze"):
+            if results is None:
+                results = analyze_store(store)
+            
+            print_analysis_report(results)
+            if args.stats and analysis is not None:
+                print_stats(dict(analysis["histogram"]), analysis["categories"])
+            export_low_quality_nodes(results)
     
     print("\n=== RECOMMENDATIONS ===")
     print("1. Focus on nodes with score < 30 first")
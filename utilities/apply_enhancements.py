@@ -7,30 +7,217 @@ Uses Claude API to enhance nodes in batches and updates the JSON file.
 import json
 import os
 import sys
+import time
 from pathlib import Path
-import anthropic
 from datetime import datetime
 
+sys.path.append(str(Path(__file__).parent))
+
+from metrics import metrics, start_run
+from path_index import PathIndex
+from response_cache import ResponseCache, cache_key
+from snapshot_store import SnapshotStore
+from taxonomy_store import TaxonomyStore
+
+def enhancement_updates(description_length, has_links, enhancement):
+    """Fields an enhancement may fill in: only weak descriptions and missing links."""
+    updates = {}
+    
+    # Update description if provided and current is weak
+    if enhancement.get("description") and description_length < 50:
+        updates["description"] = enhancement["description"]
+    
+    # Update links if provided and current are weak
+    if enhancement.get("links") and not has_links:
+        updates["links"] = enhancement["links"]
+    
+    return updates
+
+def report_updates(name, updates):
+    for field in updates:
+        print(f"  ✓ Updated {field} for: {name}")
+
+def apply_enhancement_to_store(store, index, enhancement):
+    """Apply an enhancement to a TaxonomyStore row. Returns True if the node was changed."""
+    node = store.nodes[index]
+    updates = enhancement_updates(node.description_length, node.has_links, enhancement)
+    if updates:
+        store.set_fields(index, **updates)
+    report_updates(node.name, updates)
+    return bool(updates)
+
+class TargetResolver:
+    """Finds store rows for canonical node paths through the persistent path index.
+    
+    Paths that are missing, shared by sibling nodes, or point at the root are
+    reported rather than matched by suffix.
+    """
+    
+    LABELS = {
+        "missing": "Path not found in taxonomy",
+        "ambiguous": "Path matches several nodes",
+        "stale": "Path index out of date",
+        "root": "Root node lives in _metadata.json, skipped",
+        "unmatched": "Enhancement name not in batch",
+    }
+    
+    def __init__(self, store):
+        self.store = store
+        self.index = PathIndex.load()
+        self.index_is_fresh = False
+        if self.index is None:
+            print("Path index not found - indexing loaded taxonomy (run 'python build_taxonomy.py' to persist it)")
+            self._reindex()
+    
+    def _reindex(self):
+        self.index = PathIndex.from_store(self.store)
+        self.index_is_fresh = True
+    
+    def _lookup(self, path):
+        matches = self.index.resolve(path)
+        if not matches:
+            return None, "missing"
+        if len(matches) > 1:
+            return None, "ambiguous"
+        filename, position = matches[0]
+        if filename.startswith("_"):
+            return None, "root"
+        try:
+            index = self.store.node_at(filename, position)
+        except (IndexError, ValueError):
+            return None, "stale"
+        # Guard against an index built before the sources were edited
+        actual_path = self.store.path(index)
+        if actual_path != path and actual_path != f"{self.index.root_name}/{path}":
+            return None, "stale"
+        return index, None
+    
+    def locate(self, path):
+        """Return (store_index, None), or (None, reason) if the path cannot be used"""
+        index, reason = self._lookup(path)
+        if reason == "stale" and not self.index_is_fresh:
+            print("Path index is out of date - re-indexing loaded taxonomy")
+            self._reindex()
+            index, reason = self._lookup(path)
+        return index, reason
+
+def print_problems(problems):
+    for reason, paths in problems.items():
+        if paths:
+            print(f"⚠️  {TargetResolver.LABELS[reason]} ({len(paths)}):")
+            for path in paths:
+                print(f"    - {path}")
+
+def apply_batch_results(store, batch_data, enhancements, resolver):
+    """Apply one batch's API results to the store in memory.
+    
+    Returns (enhanced_count, problems) where problems maps a reason to the
+    paths that could not be updated.
+    """
+    enhanced_count = 0
+    problems = {}
+    metrics.count("enhancements_received", len(enhancements.get("enhancements", [])))
+    for enhancement in enhancements.get("enhancements", []):
+        # Find the corresponding node in our batch
+        target_node = None
+        for node in batch_data['nodes_to_enhance']:
+            if node['name'] == enhancement['name']:
+                target_node = node
+                break
+        
+        if not target_node:
+            problems.setdefault("unmatched", []).append(enhancement.get('name', '?'))
+            continue
+        
+        # The same tool listed elsewhere in the taxonomy gets the same answer
+        for path in [target_node['path'], *target_node.get('duplicate_paths', [])]:
+            index, reason = resolver.locate(path)
+            if index is None:
+                problems.setdefault(reason, []).append(path)
+                continue
+            
+            if apply_enhancement_to_store(store, index, enhancement):
+                enhanced_count += 1
+    
+    metrics.count("nodes_enhanced", enhanced_count)
+    return enhanced_count, problems
+
+def rebuild_taxonomy(data_dir):
+    """Incrementally rebuild the merged taxonomy file in this process."""
+    sys.path.append(str(Path(__file__).parent.parent))
+    from build_taxonomy import build_taxonomy
+    with metrics.timer("rebuild"):
+        build_taxonomy(incremental=True, data_dir=data_dir)
+
+def save_store_changes(store, snapshots=None):
+    """Snapshot and save every category file the store modified, then rebuild once.
+    
+    The previous and new version of each file and its patch log are recorded
+    as one run in the snapshot store (see snapshot_store.py). Returns the
+    number of files updated.
+    """
+    snapshots = snapshots or SnapshotStore()
+    run = snapshots.begin_run(metrics.command)
+    saved = []
+    paths = store.dirty_paths()
+    with metrics.timer("snapshot"):
+        run.before(paths)
+    
+    with metrics.timer("save"):
+        for filename, path in store.save_dirty():
+            print(f"✓ Updated: {filename}")
+            saved.append(path)
+    saved_files = len(saved)
+    
+    with metrics.timer("snapshot"):
+        run.after(paths)
+        snapshots.prune()
+    if saved_files:
+        print(f"📸 Snapshot {run.id} (undo: python enhance.py snapshots restore {run.id})")
+    
+    if saved_files:
+        print("\n🔄 Now rebuilding main taxonomy file...")
+        
+        # Rebuild the main taxonomy file
+        try:
+            rebuild_taxonomy(store.data_dir)
+            print("✓ Main taxonomy file rebuilt")
+        except Exception as e:
+            print(f"❌ Failed to rebuild main taxonomy file ({e}) - run 'python build_taxonomy.py' manually")
+    
+    return saved_files
+
 class TaxonomyEnhancer:
-    def __init__(self, api_key=None):
-        if api_key:
-            self.client = anthropic.Anthropic(api_key=api_key)
-        elif os.getenv('ANTHROPIC_API_KEY'):
-            self.client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
-        else:
+    MODEL = "claude-3-haiku-20240307"
+    MAX_TOKENS = 2000
+    TEMPERATURE = 0.3
+    SYSTEM_PROMPT = "You are an expert in creative technology tools and frameworks. Provide accurate, concise information about technical tools."
+    
+    def __init__(self, api_key=None, base_url=None, cache=True):
+        """base_url (or ANTHROPIC_BASE_URL) points the client at another Messages API endpoint,
+        e.g. the local stand-in in mock_messages_api.py.
+
+        cache is True for the default on-disk ResponseCache, False for none,
+        or a ResponseCache instance.
+        """
+        api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+        if not api_key:
             print("Error: Claude API key required. Set ANTHROPIC_API_KEY environment variable or pass as argument.")
             sys.exit(1)
+        self.base_url = base_url or os.getenv('ANTHROPIC_BASE_URL')
+        # Imported here so commands that never call the API don't pay for the SDK
+        import anthropic
+        self.client = anthropic.Anthropic(api_key=api_key, base_url=self.base_url)
+        self.cache = ResponseCache() if cache is True else (cache or None)
     
-    def enhance_batch(self, batch_data):
-        """Enhance a batch of nodes using Claude API."""
-        
-        # Create the prompt
+    def build_prompt(self, batch_data):
+        """The user prompt sent for a batch."""
         node_list = []
         for node in batch_data['nodes_to_enhance']:
             current_desc = node['current_description'] or "No description"
             node_list.append(f"- {node['name']}: {current_desc}")
         
-        prompt = f"""
+        return f"""
 Enhance these creative technology tools/concepts with concise, informative descriptions (50-150 characters each). 
 Category: {batch_data['category']}
 
@@ -54,17 +241,55 @@ Return in this JSON format:
   ]
 }}
 """
-        
+    
+    def estimate_tokens(self, batch_data):
+        """Rough upper bound on the tokens a batch request uses (prompt at ~4 chars/token plus max_tokens)."""
+        return (len(self.SYSTEM_PROMPT) + len(self.build_prompt(batch_data))) // 4 + self.MAX_TOKENS
+    
+    def response_key(self, batch_data):
+        return cache_key(self.MODEL, self.SYSTEM_PROMPT, self.build_prompt(batch_data),
+                         self.TEMPERATURE, self.base_url)
+    
+    def cached_response(self, batch_data):
+        """The cached enhancements for a batch, or None (also None when caching is off)"""
+        if self.cache is None:
+            return None
+        return self.cache.get(self.response_key(batch_data))
+    
+    def enhance_batch(self, batch_data):
+        """Enhance a batch of nodes, answering from the response cache when possible."""
+        cached = self.cached_response(batch_data)
+        if cached is not None:
+            return cached
+        return self.request_batch(batch_data)
+    
+    def request_batch(self, batch_data):
+        """Enhance a batch of nodes using Claude API, caching a usable answer."""
+        result = self._call_api(self.build_prompt(batch_data), len(batch_data['nodes_to_enhance']))
+        if self.cache is not None and isinstance(result, dict) and result.get("enhancements"):
+            self.cache.put(self.response_key(batch_data), result)
+        return result
+    
+    def _call_api(self, prompt, node_count=0):
         try:
-            response = self.client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=2000,
-                temperature=0.3,
-                system="You are an expert in creative technology tools and frameworks. Provide accurate, concise information about technical tools.",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+            metrics.count("api_calls")
+            start = time.perf_counter()
+            with metrics.timer("api"):
+                response = self.client.messages.create(
+                    model=self.MODEL,
+                    max_tokens=self.MAX_TOKENS,
+                    temperature=self.TEMPERATURE,
+                    system=self.SYSTEM_PROMPT,
+                    messages=[
+                        {"role": "user", "content": prompt}
+                    ]
+                )
+            metrics.observe("api_latency", time.perf_counter() - start)
+            usage = getattr(response, "usage", None)
+            metrics.record_usage(usage)
+            if getattr(usage, "output_tokens", None):
+                # Paired with output_tokens so batch planning can calibrate its per-node estimate
+                metrics.count("answered_nodes", node_count)
             
             content = response.content[0].text
             
@@ -82,65 +307,21 @@ Return in this JSON format:
                     return None
                     
         except Exception as e:
+            metrics.count("api_errors")
             print(f"API call failed: {e}")
             return None
     
-    def update_node_in_tree(self, tree, target_path, enhancement):
-        """Recursively find and update a node in the tree."""
+    def process_batch(self, batch_data, store, resolver=None, commit=True, journal=None):
+        """Enhance one formatted batch and apply the results to the store.
         
-        def update_recursive(node, current_path=""):
-            name = node.get("name", {})
-            if isinstance(name, dict):
-                node_name = name.get("en", "")
-            else:
-                node_name = str(name)
-            
-            current_full_path = f"{current_path}/{node_name}" if current_path else node_name
-            
-            # Check if this matches our target (handle both full path and partial path matching)
-            # Remove "Creative Tech Taxonomy" prefix if present for matching individual files
-            normalized_target = target_path
-            if target_path.startswith("Creative Tech Taxonomy/"):
-                normalized_target = target_path[len("Creative Tech Taxonomy/"):]
-            
-            # Check exact match or end-of-path match
-            if (current_full_path == target_path or 
-                current_full_path == normalized_target or
-                target_path.endswith(current_full_path) or
-                normalized_target.endswith(current_full_path)):
-                
-                # Update description if provided and current is weak
-                if enhancement.get("description"):
-                    current_desc = node.get("description", "").strip()
-                    if len(current_desc) < 50:
-                        node["description"] = enhancement["description"]
-                        print(f"  ✓ Updated description for: {node_name}")
-                        return True
-                
-                # Update links if provided and current are weak
-                if enhancement.get("links"):
-                    current_links = node.get("links", {})
-                    if not any(v.strip() for v in current_links.values() if v):
-                        node["links"] = enhancement["links"]
-                        print(f"  ✓ Updated links for: {node_name}")
-                        return True
-            
-            # Recursively check children
-            for child in node.get("children", []):
-                if update_recursive(child, current_full_path):
-                    return True
-            
-            return False
-        
-        return update_recursive(tree)
-    
-    def process_batch_file(self, batch_file, data_file):
-        """Process a batch file and update the source taxonomy files."""
-        
-        # Load batch data
-        with open(batch_file, 'r', encoding='utf-8') as f:
-            batch_data = json.load(f)
+        Target nodes are located through the path index written by
+        build_taxonomy.py; paths that are missing or ambiguous are reported,
+        not guessed. With commit=False the changes stay in memory until the
+        caller runs save_store_changes once for the whole run. A BatchJournal
+        records the results so an interrupted run can be resumed.
         
+        Returns the number of nodes enhanced, or None if the API call failed.
+        """
         print(f"Processing batch: {batch_data['batch_id']}")
         print(f"Category: {batch_data['category']}")
         print(f"Nodes to enhance: {len(batch_data['nodes_to_enhance'])}")
@@ -151,103 +332,77 @@ Return in this JSON format:
         
         if not enhancements:
             print("Failed to get enhancements from API")
-            return False
+            return None
         
-        # Load all source files from taxonomy-data/
-        taxonomy_files = {}
-        taxonomy_data_dir = Path("taxonomy-data")
+        # Apply enhancements to the in-memory store
+        enhanced_count, problems = apply_batch_results(
+            store, batch_data, enhancements, resolver or TargetResolver(store))
+        print_problems(problems)
+        if journal is not None:
+            journal.record(batch_data, enhancements, enhanced_count)
         
-        for json_file in taxonomy_data_dir.glob("*.json"):
-            if json_file.name.startswith("_"):  # Skip _index.json and _metadata.json
-                continue
-            
-            with open(json_file, 'r', encoding='utf-8') as f:
-                taxonomy_files[json_file.name] = {
-                    "data": json.load(f),
-                    "path": json_file,
-                    "modified": False
-                }
-        
-        print(f"Loaded {len(taxonomy_files)} source taxonomy files")
+        if enhanced_count == 0:
+            print("No nodes were enhanced")
+        elif commit:
+            # Save modified source files
+            saved_files = save_store_changes(store)
+            print(f"✓ Successfully enhanced {enhanced_count} nodes across {saved_files} files")
+        else:
+            print(f"✓ Enhanced {enhanced_count} nodes (saved at the end of the run)")
         
-        # Apply enhancements to source files
-        enhanced_count = 0
-        for enhancement in enhancements.get("enhancements", []):
-            # Find the corresponding node in our batch
-            target_node = None
-            for node in batch_data['nodes_to_enhance']:
-                if node['name'] == enhancement['name']:
-                    target_node = node
-                    break
-            
-            if target_node:
-                # Try to update in each source file
-                for filename, file_info in taxonomy_files.items():
-                    if self.update_node_in_tree(file_info["data"], target_node['path'], enhancement):
-                        file_info["modified"] = True
-                        enhanced_count += 1
-                        break
+        return enhanced_count
+    
+    def process_batch_file(self, batch_file, store=None, resolver=None):
+        """Process a batch file and update the source taxonomy files.
+
+        Works on a shared TaxonomyStore (loaded from taxonomy-data/ if not
+        given); see process_batch.
+        """
         
-        # Save modified source files
-        saved_files = 0
-        for filename, file_info in taxonomy_files.items():
-            if file_info["modified"]:
-                # Create single backup (overwrite previous backup)
-                backup_file = file_info["path"].parent / f"{file_info['path'].stem}_backup.json"
-                backup_file.write_text(file_info["path"].read_text(), encoding='utf-8')
-                
-                # Save updated file
-                with open(file_info["path"], 'w', encoding='utf-8') as f:
-                    json.dump(file_info["data"], f, indent=2, ensure_ascii=False)
-                
-                print(f"✓ Updated: {filename} (backup: {backup_file.name})")
-                saved_files += 1
+        # Load batch data
+        with open(batch_file, 'r', encoding='utf-8') as f:
+            batch_data = json.load(f)
         
-        if enhanced_count > 0:
-            print(f"✓ Successfully enhanced {enhanced_count} nodes across {saved_files} files")
-            print("\n🔄 Now rebuilding main taxonomy file...")
-            
-            # Rebuild the main taxonomy file
-            import subprocess
-            try:
-                subprocess.run(["python", "build_taxonomy.py"], check=True)
-                print("✓ Main taxonomy file rebuilt")
-            except subprocess.CalledProcessError:
-                print("❌ Failed to rebuild main taxonomy file - run 'python build_taxonomy.py' manually")
-        else:
-            print("No nodes were enhanced")
+        if store is None:
+            store = TaxonomyStore.load()
+            print(f"Loaded {len(store.files)} source taxonomy files")
         
-        return enhanced_count > 0
+        return bool(self.process_batch(batch_data, store, resolver))
 
-def main():
-    """Main function."""
+def main(argv=None, workspace=None):
+    """Main function (a Workspace supplies an already loaded store)."""
     import argparse
     
     parser = argparse.ArgumentParser(description='Apply AI enhancements to taxonomy nodes')
     parser.add_argument('batch_file', help='Batch file to process (e.g., sample_batch_for_api.json)')
     parser.add_argument('--api-key', help='Claude API key (or set ANTHROPIC_API_KEY env var)')
-    parser.add_argument('--data-file', default='public/Creative_Tech_Taxonomy_data.json', 
-                       help='Main taxonomy data file')
+    parser.add_argument('--base-url', help='Messages API base URL (or set ANTHROPIC_BASE_URL env var)')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the API, ignoring cached responses')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    start_run("apply")
     
-    # Check files exist
+    # Check the batch file exists
     batch_file = Path(args.batch_file)
-    data_file = Path(args.data_file)
     
     if not batch_file.exists():
         print(f"Error: Batch file not found: {batch_file}")
         sys.exit(1)
     
-    if not data_file.exists():
-        print(f"Error: Data file not found: {data_file}")
-        sys.exit(1)
-    
     # Initialize enhancer
-    enhancer = TaxonomyEnhancer(args.api_key)
+    enhancer = TaxonomyEnhancer(args.api_key, args.base_url, cache=not args.no_cache)
     
     # Process the batch
-    success = enhancer.process_batch_file(batch_file, data_file)
+    if workspace is not None:
+        try:
+            success = enhancer.process_batch_file(batch_file, workspace.store, workspace.resolver)
+        finally:
+            workspace.saved()
+    else:
+        success = enhancer.process_batch_file(batch_file)
+    if enhancer.cache:
+        print(enhancer.cache.report())
+        enhancer.cache.close()
     
     if success:
         print("\n🎉 Enhancement complete!")
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Concurrent enhancement runner.
+
+Runs TaxonomyEnhancer.enhance_batch for many batches at once on worker
+threads, with a bounded number of requests in flight and a token-bucket
+limiter on requests and tokens per minute. Results are applied to the
+shared TaxonomyStore as each batch finishes; saving is left to the caller.
+"""
+
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from apply_enhancements import TargetResolver, apply_batch_results, print_problems
+
+# Defaults match the lowest published rate-limit tier for the model we use
+DEFAULT_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 50
+DEFAULT_TOKENS_PER_MINUTE = 50000
+# How much of a minute's allowance may be spent at once
+BURST_SECONDS = 10
+
+class TokenBucket:
+    """Refills continuously at per_minute/60 units a second, up to capacity.
+
+    capacity defaults to BURST_SECONDS worth of refill. Waiters are served
+    in arrival order; a request larger than the bucket is clamped to the
+    capacity so it can still run.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or max(1.0, self.rate * BURST_SECONDS)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        async with self.lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+class RateLimiter:
+    """Request and token buckets; either limit may be None to disable it"""
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    async def acquire(self, tokens):
+        if self.requests:
+            await self.requests.acquire(1)
+        if self.tokens:
+            await self.tokens.acquire(tokens)
+
+async def run_batches_async(enhancer, batches, store, concurrency=DEFAULT_CONCURRENCY,
+                            requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                            tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, resolver=None, journal=None):
+    """Enhance formatted batches (see format_batch_for_api) concurrently.
+
+    Each batch's results are applied to the store in memory (and recorded in
+    the journal, if given) as soon as its call returns. Returns a summary
+    dict with per-run counts and timing.
+    """
+    resolver = resolver or TargetResolver(store)
+    limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+    concurrency = max(1, concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    # Own pool so the default executor's size does not cap the concurrency
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    loop = asyncio.get_running_loop()
+
+    async def call(batch_data):
+        # Cached answers cost no API call, so they skip the limiter
+        cached = enhancer.cached_response(batch_data)
+        if cached is not None:
+            return batch_data, cached
+        async with semaphore:
+            await limiter.acquire(enhancer.estimate_tokens(batch_data))
+            return batch_data, await loop.run_in_executor(executor, enhancer.request_batch, batch_data)
+
+    summary = {"batches": len(batches), "succeeded": 0, "failed": 0, "enhanced": 0, "problems": {}}
+    start = time.perf_counter()
+
+    tasks = [asyncio.create_task(call(batch_data)) for batch_data in batches]
+    try:
+        for done, task in enumerate(asyncio.as_completed(tasks), 1):
+            batch_data, enhancements = await task
+            if not enhancements:
+                summary["failed"] += 1
+                print(f"❌ [{done}/{len(batches)}] {batch_data['batch_id']}: no enhancements returned")
+                continue
+
+            enhanced_count, problems = apply_batch_results(store, batch_data, enhancements, resolver)
+            if journal is not None:
+                journal.record(batch_data, enhancements, enhanced_count)
+            summary["succeeded"] += 1
+            summary["enhanced"] += enhanced_count
+            for reason, paths in problems.items():
+                summary["problems"].setdefault(reason, []).extend(paths)
+            print(f"✅ [{done}/{len(batches)}] {batch_data['batch_id']}: {enhanced_count} nodes enhanced")
+    finally:
+        for task in tasks:
+            task.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    summary["elapsed"] = time.perf_counter() - start
+    return summary
+
+def run_batches(enhancer, batches, store, **options):
+    """Synchronous entry point for run_batches_async"""
+    return asyncio.run(run_batches_async(enhancer, batches, store, **options))
+
+def print_summary(summary):
+    elapsed = summary["elapsed"]
+    print(f"\nBatches: {summary['succeeded']} succeeded, {summary['failed']} failed "
+          f"in {elapsed:.1f}s ({summary['batches'] / elapsed if elapsed else 0:.2f} batches/s)")
+    print(f"Nodes enhanced: {summary['enhanced']}")
+    print_problems(summary["problems"])
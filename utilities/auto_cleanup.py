@@ -1,95 +1,90 @@
 #!/usr/bin/env python3
 """
-Automatically clean up taxonomy-data folder by keeping only the most recent version.
+Move legacy backup copies into the snapshot store and apply its retention policy.
+
+Older versions of the tools left `<name>_backup*.json` copies next to the
+category files and the merged file. Each one is recorded as the "before"
+version of the file it copied, in its own "cleanup" run (oldest first),
+and then deleted, so nothing is lost and nothing has to be guessed from
+mtimes: the canonical files are left exactly as they are.
+
+Backups that git tracks (the merged-file copies in public/) are part of
+the repository and are left alone; the snapshot store is local to each
+clone, so moving them there would take them away from everyone else.
 """
 
-import os
-import shutil
+import subprocess
+import sys
 from pathlib import Path
-from datetime import datetime
 
-def auto_cleanup():
-    """Automatically clean up backup files."""
-    
-    taxonomy_dir = Path("taxonomy-data")
-    
-    # Expected base category files
-    expected_files = {
-        "ai-machine-learning.json",
-        "asset-creation.json", 
-        "creative-code-frameworks.json",
-        "display-tech-and-video.json",
-        "game-engines-and-real-time-3d.json",
-        "mobile-technology.json",
-        "physical-computing.json",
-        "physical-output-and-digital-fabrication.json",
-        "professional-av-tools.json",
-        "sensors-and-interaction-methods.json",
-        "uncategorized-tools-and-utilities.json",
-        "web-and-networking-tools.json"
-    }
-    
-    # Get all JSON files (excluding _index.json and _metadata.json)
-    all_files = [f for f in taxonomy_dir.glob("*.json") if not f.name.startswith("_")]
-    
-    print(f"Found {len(all_files)} files in taxonomy-data/")
-    
-    # Find the best version for each expected file
-    for expected_file in expected_files:
-        base_name = expected_file.replace('.json', '')
-        
-        # Find all files that match this category
-        matching_files = []
-        for file_path in all_files:
-            if (file_path.name == expected_file or 
-                file_path.name.startswith(f"{base_name}_backup") or
-                file_path.name.startswith(f"{base_name}.json")):
-                matching_files.append({
-                    'path': file_path,
-                    'mtime': file_path.stat().st_mtime,
-                    'size': file_path.stat().st_size
-                })
-        
-        if not matching_files:
-            print(f"⚠️  No files found for {expected_file}")
-            continue
-            
-        # Sort by modification time (newest first) and file size (larger first as tiebreaker)
-        matching_files.sort(key=lambda x: (x['mtime'], x['size']), reverse=True)
-        
-        # The best file is the most recently modified (and largest if same time)
-        best_file = matching_files[0]
-        target_path = taxonomy_dir / expected_file
-        
-        if best_file['path'] == target_path:
-            print(f"✅ {expected_file} is already correct")
-        else:
-            # Copy the best file to the correct name
-            shutil.copy2(best_file['path'], target_path)
-            mtime = datetime.fromtimestamp(best_file['mtime']).strftime('%Y-%m-%d %H:%M:%S')
-            print(f"✅ Updated {expected_file} from {best_file['path'].name} ({mtime})")
-        
-        # Remove all other versions
-        for file_info in matching_files:
-            if file_info['path'] != target_path:
-                try:
-                    file_info['path'].unlink()
-                    print(f"🗑️  Removed {file_info['path'].name}")
-                except FileNotFoundError:
-                    pass
-    
-    print(f"\n🎉 Cleanup complete!")
-    
-    # Show final state
-    print(f"\nFinal files in taxonomy-data/:")
-    remaining_files = sorted([f for f in taxonomy_dir.glob("*.json")])
-    for file_path in remaining_files:
-        if file_path.name.startswith("_"):
-            print(f"📋 {file_path.name} (metadata)")
-        else:
-            mtime = datetime.fromtimestamp(file_path.stat().st_mtime).strftime('%Y-%m-%d %H:%M:%S')
-            size = file_path.stat().st_size
-            print(f"📄 {file_path.name} - {mtime} ({size:,} bytes)")
+sys.path.append(str(Path(__file__).parent))
+
+from metrics import metrics, start_run
+from snapshot_store import KEEP_RUNS, SnapshotStore
+
+BACKUP_DIRS = ("taxonomy-data", "public")
+
+def legacy_backups(directories=BACKUP_DIRS):
+    """(backup path, file it is a copy of) for every legacy backup, oldest first"""
+    backups = []
+    for directory in directories:
+        for path in Path(directory).glob("*_backup*.json"):
+            original = path.with_name(path.name.split("_backup")[0] + ".json")
+            backups.append((path, original))
+    backups.sort(key=lambda item: item[0].stat().st_mtime)
+    return backups
+
+def tracked_by_git(paths):
+    """The paths among `paths` that git tracks; empty outside a repository or without git"""
+    if not paths:
+        return set()
+    try:
+        output = subprocess.run(["git", "ls-files", "-z", "--", *map(str, paths)],
+                                capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return set()
+    return {Path(name) for name in output.decode('utf-8').split("\0") if name}
+
+def auto_cleanup(store=None, keep=KEEP_RUNS, max_age_days=None, directories=BACKUP_DIRS):
+    """Snapshot and delete legacy backups (except those tracked by git), then prune the store."""
+    store = store or SnapshotStore()
+    backups = legacy_backups(directories)
+    tracked = tracked_by_git([backup for backup, _ in backups])
+    if tracked:
+        print(f"Keeping {len(tracked)} backup file(s) tracked by git: "
+              f"{', '.join(sorted(str(path) for path in tracked))}")
+        backups = [(backup, original) for backup, original in backups if backup not in tracked]
+
+    if backups:
+        # One run per backup, oldest first, so several backups of the same file are all kept
+        for backup, original in backups:
+            run = store.begin_run("cleanup")
+            # "after" is the file as it stands, which cleanup leaves alone
+            run.record(original, "after")
+            run.log["files"][str(original)]["before"] = store.put(backup.read_bytes())
+            run.save()
+            backup.unlink()
+            print(f"📸 {backup} -> run {run.id} ({original})")
+        print("\nRestore one with: python enhance.py snapshots restore <run> --output-dir <dir>")
+    elif not tracked:
+        print("No legacy backup files found")
+
+    runs, objects = store.prune(keep, max_age_days)
+    count, size = store.size()
+    print(f"\n🎉 Cleanup complete: removed {runs} old runs and {objects} unreferenced versions; "
+          f"{count} versions ({size:,} bytes) kept in {store.root}")
+
+def main(argv=None, workspace=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Move legacy backups into the snapshot store and prune it')
+    parser.add_argument('--keep', type=int, default=KEEP_RUNS, help=f'Newest snapshot runs to keep (default: {KEEP_RUNS})')
+    parser.add_argument('--max-age-days', type=float, help='Also drop snapshot runs older than this')
+    args = parser.parse_args(argv)
+
+    start_run("cleanup", quiet=True)
+    with metrics.timer("cleanup"):
+        auto_cleanup(keep=args.keep, max_age_days=args.max_age_days)
 
 if __name__ == "__main__":
-    auto_cleanup()
\ No newline at end of file
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Append-only journal of completed enhancement batches.
+
+Each line of .taxonomy-cache/batch_journal.jsonl records one batch whose
+API call succeeded: its id, the nodes it targeted and the enhancements
+that came back. Lines are flushed and fsynced as they are written, so
+after a crash `enhance.py batch --resume` can re-apply them without
+calling the API and carry on with the nodes that were never attempted.
+"""
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from apply_enhancements import apply_batch_results
+
+JOURNAL_PATH = '.taxonomy-cache/batch_journal.jsonl'
+
+class BatchJournal:
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = Path(path)
+
+    def load(self):
+        """Return the journaled records in order, ignoring a torn final line"""
+        records = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Only the last write can be incomplete
+                        break
+        except FileNotFoundError:
+            pass
+        return records
+
+    def start(self):
+        """Begin a new journal, discarding the previous run's"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text("", encoding='utf-8')
+
+    def record(self, batch_data, enhancements, enhanced_count):
+        record = {
+            "batch_id": batch_data["batch_id"],
+            "category": batch_data["category"],
+            "nodes": [{key: node[key] for key in ("name", "path", "duplicate_paths") if key in node}
+                      for node in batch_data["nodes_to_enhance"]],
+            "enhancements": enhancements,
+            "enhanced": enhanced_count,
+            "time": time.time(),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+def journaled_paths(records):
+    """Canonical paths of every node a journaled batch already covered"""
+    return {path for record in records for node in record["nodes"]
+            for path in [node["path"], *node.get("duplicate_paths", [])]}
+
+def replay_journal(records, store, resolver):
+    """Re-apply journaled enhancements to the store without calling the API.
+
+    Nodes whose file was already saved are left as they are (enhancements
+    only fill weak fields). Returns the number of nodes changed.
+    """
+    enhanced = 0
+    for record in records:
+        batch_data = {"nodes_to_enhance": record["nodes"]}
+        count, _ = apply_batch_results(store, batch_data, record["enhancements"], resolver)
+        enhanced += count
+    return enhanced
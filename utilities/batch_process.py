@@ -3,7 +3,6 @@
 Process multiple batches automatically with rate limiting.
 """
 
-import json
 import time
 import sys
 from pathlib import Path
@@ -11,89 +10,147 @@ from pathlib import Path
 # Add parent directory to path to import other utilities
 sys.path.append(str(Path(__file__).parent))
 
-from apply_enhancements import TaxonomyEnhancer
-from efficient_enhance import batch_nodes_by_category, prioritize_nodes_by_impact
+from apply_enhancements import TargetResolver, TaxonomyEnhancer, save_store_changes
+from async_runner import (DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE,
+                          print_summary, run_batches)
+from batch_journal import BatchJournal, journaled_paths, replay_journal
+from efficient_enhance import (add_planning_arguments, batch_nodes_by_category, budget_from_args,
+                               category_weights_from_args, duplicate_count, fixed_size_call_count,
+                               format_batch_for_api, prioritize_nodes_by_impact)
+from metrics import metrics, start_run
+from taxonomy_store import TaxonomyStore
 
-def process_multiple_batches(max_batches=5, delay_between_calls=2):
-    """Process multiple batches with rate limiting."""
+def process_multiple_batches(max_batches=5, delay_between_calls=2, concurrency=1,
+                             requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                             tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE, base_url=None, use_cache=True,
+                             commit_each=False, resume=False, store=None, resolver=None, budget=None,
+                             category_weights=None, dedupe=True):
+    """Process multiple batches with rate limiting.
+
+    Enhancements accumulate in the shared in-memory store; each touched
+    category file is written once and the taxonomy rebuilt once at the end
+    of the run. commit_each=True saves and rebuilds after every batch instead.
+
+    With concurrency > 1 batches run through the async runner: calls overlap,
+    and the rate is set in requests/tokens per minute instead of a fixed delay.
+
+    Batches answered from the response cache cost no API call and are not
+    rate limited.
+
+    Every completed batch is appended to the batch journal. resume=True
+    re-applies the previous run's journal without calling the API and plans
+    only the nodes it did not cover; otherwise a new journal is started.
+
+    Batches are packed under a TokenBudget (the default one unless given)
+    and the best max_batches are taken from the heap scheduler. With dedupe
+    a tool listed in several categories is requested once and the answer
+    applied to every copy.
+
+    store/resolver let a caller that already holds the loaded taxonomy
+    (enhance.py shell) skip loading it again.
+    """
     
-    # Load main data (go up one directory from utilities/)
-    data_file = Path("../public/Creative_Tech_Taxonomy_data.json")
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Load the taxonomy once and share it with every batch
+    if store is None:
+        store = TaxonomyStore.load()
+    if resolver is None:
+        resolver = TargetResolver(store)
+    journal = BatchJournal()
+    
+    excluded_paths = set()
+    if resume:
+        records = journal.load()
+        excluded_paths = journaled_paths(records)
+        replayed = replay_journal(records, store, resolver)
+        print(f"↩️  Resumed {len(records)} journaled batches ({replayed} nodes re-applied, no API calls)")
+    else:
+        journal.start()
     
     # Generate all batches
-    batches = batch_nodes_by_category(data, max_batch_size=10)
-    prioritized_batches = prioritize_nodes_by_impact(batches)
+    with metrics.timer("plan"):
+        batches = batch_nodes_by_category(store, exclude=excluded_paths, budget=budget, dedupe=dedupe)
+        prioritized_batches = prioritize_nodes_by_impact(batches, category_weights, limit=max_batches)
+    total_batches = len(batches)
     
-    print(f"Found {len(prioritized_batches)} total batches")
+    print(f"Found {total_batches} total batches "
+          f"({fixed_size_call_count(batches)} with fixed batches of 10, "
+          f"{duplicate_count(batches)} repeated tools covered by another copy)")
     print(f"Processing first {max_batches} batches...")
     
     # Initialize enhancer
-    enhancer = TaxonomyEnhancer()
+    enhancer = TaxonomyEnhancer(base_url=base_url, cache=use_cache)
+    
+    if concurrency > 1:
+        batches = [format_batch_for_api(batch) for batch in prioritized_batches]
+        print(f"Running with {concurrency} concurrent calls "
+              f"({requests_per_minute} requests/min, {tokens_per_minute} tokens/min)")
+        try:
+            summary = run_batches(enhancer, batches, store, concurrency=concurrency,
+                                  requests_per_minute=requests_per_minute,
+                                  tokens_per_minute=tokens_per_minute,
+                                  resolver=resolver, journal=journal)
+            print_summary(summary)
+        finally:
+            if store.dirty:
+                saved_files = save_store_changes(store)
+                print(f"✓ Saved {saved_files} files")
+        
+        print(f"\n🎉 BATCH PROCESSING COMPLETE!")
+        print(f"Remaining batches: {total_batches - len(batches)}")
+        report_cache(enhancer)
+        return
     
     total_enhanced = 0
     
-    for i, batch in enumerate(prioritized_batches[:max_batches], 1):
-        print(f"\n{'='*50}")
-        print(f"PROCESSING BATCH {i}/{max_batches}")
-        print(f"Category: {batch['category']}")
-        print(f"Nodes: {len(batch['nodes'])}")
-        print(f"{'='*50}")
-        
-        # Create temporary batch file
-        batch_data = {
-            "batch_id": batch["batch_id"],
-            "category": batch["category"],
-            "nodes_to_enhance": []
-        }
-        
-        for node_info in batch["nodes"]:
-            node = node_info["node"]
-            name = node.get("name", {}).get("en", "Unknown") if isinstance(node.get("name"), dict) else str(node.get("name", ""))
-            
-            batch_data["nodes_to_enhance"].append({
-                "name": name,
-                "current_description": node.get("description", ""),
-                "current_links": node.get("links", {}),
-                "path": node_info["path"]
-            })
-        
-        # Save temp batch file
-        temp_batch_file = Path(f"temp_batch_{i}.json")
-        with open(temp_batch_file, 'w', encoding='utf-8') as f:
-            json.dump(batch_data, f, indent=2, ensure_ascii=False)
-        
-        try:
-            # Process the batch
-            success = enhancer.process_batch_file(temp_batch_file, data_file)
-            
-            if success:
-                total_enhanced += len(batch_data["nodes_to_enhance"])
-                print(f"✅ Batch {i} completed successfully")
-            else:
-                print(f"❌ Batch {i} failed")
+    try:
+        for i, batch in enumerate(prioritized_batches, 1):
+            print(f"\n{'='*50}")
+            print(f"PROCESSING BATCH {i}/{max_batches}")
+            print(f"Category: {batch['category']}")
+            print(f"Nodes: {len(batch['nodes'])}")
+            print(f"{'='*50}")
             
-            # Clean up temp file
-            temp_batch_file.unlink()
+            batch_data = format_batch_for_api(batch)
             
-            # Rate limiting
-            if i < max_batches:
-                print(f"⏱️  Waiting {delay_between_calls} seconds before next batch...")
-                time.sleep(delay_between_calls)
+            try:
+                # Process the batch
+                cache_hits = enhancer.cache.hits if enhancer.cache else 0
+                enhanced_count = enhancer.process_batch(batch_data, store, resolver,
+                                                        commit=commit_each, journal=journal)
+                from_cache = enhancer.cache is not None and enhancer.cache.hits > cache_hits
                 
-        except Exception as e:
-            print(f"❌ Error processing batch {i}: {e}")
-            if temp_batch_file.exists():
-                temp_batch_file.unlink()
-            continue
+                if enhanced_count is not None:
+                    total_enhanced += enhanced_count
+                    print(f"✅ Batch {i} completed successfully")
+                else:
+                    print(f"❌ Batch {i} failed")
+                
+                # Rate limiting
+                if i < len(prioritized_batches) and not from_cache:
+                    print(f"⏱️  Waiting {delay_between_calls} seconds before next batch...")
+                    time.sleep(delay_between_calls)
+                    
+            except Exception as e:
+                print(f"❌ Error processing batch {i}: {e}")
+                continue
+    finally:
+        # Deferred mode: write each touched file and rebuild once, even if the run was interrupted
+        if store.dirty:
+            print(f"\n💾 Saving changes from this run...")
+            save_store_changes(store)
     
     print(f"\n🎉 BATCH PROCESSING COMPLETE!")
-    print(f"Total batches processed: {max_batches}")
+    print(f"Total batches processed: {len(prioritized_batches)}")
     print(f"Total nodes enhanced: {total_enhanced}")
-    print(f"Remaining batches: {len(prioritized_batches) - max_batches}")
+    print(f"Remaining batches: {total_batches - len(prioritized_batches)}")
+    report_cache(enhancer)
 
-if __name__ == "__main__":
+def report_cache(enhancer):
+    if enhancer.cache:
+        print(enhancer.cache.report())
+        enhancer.cache.close()
+
+def main(argv=None, workspace=None):
     import argparse
     
     parser = argparse.ArgumentParser(description='Process multiple enhancement batches')
@@ -101,7 +158,32 @@ if __name__ == "__main__":
                        help='Maximum number of batches to process (default: 5)')
     parser.add_argument('--delay', type=int, default=2,
                        help='Delay between API calls in seconds (default: 2)')
+    parser.add_argument('--concurrency', '-c', type=int, default=1,
+                       help='Concurrent API calls; above 1 uses the rate-limited async runner (default: 1)')
+    parser.add_argument('--rpm', type=int, default=DEFAULT_REQUESTS_PER_MINUTE,
+                       help=f'Requests per minute for the async runner (default: {DEFAULT_REQUESTS_PER_MINUTE})')
+    parser.add_argument('--tpm', type=int, default=DEFAULT_TOKENS_PER_MINUTE,
+                       help=f'Tokens per minute for the async runner (default: {DEFAULT_TOKENS_PER_MINUTE})')
+    parser.add_argument('--base-url', help='Messages API base URL, e.g. a local mock_messages_api.py server')
+    parser.add_argument('--no-cache', action='store_true', help='Always call the API, ignoring cached responses')
+    parser.add_argument('--commit-each', action='store_true',
+                       help='Save and rebuild after every batch instead of once at the end')
+    parser.add_argument('--resume', action='store_true',
+                       help='Re-apply the last run\'s journaled batches and continue with the rest')
+    add_planning_arguments(parser)
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    start_run("batch")
     
-    process_multiple_batches(args.max_batches, args.delay)
\ No newline at end of file
+    shared = {"store": workspace.store, "resolver": workspace.resolver} if workspace is not None else {}
+    try:
+        process_multiple_batches(args.max_batches, args.delay, args.concurrency,
+                                 args.rpm, args.tpm, args.base_url, not args.no_cache, args.commit_each, args.resume,
+                                 budget=budget_from_args(args), category_weights=category_weights_from_args(args),
+                                 dedupe=not args.no_dedupe, **shared)
+    finally:
+        if workspace is not None:
+            workspace.saved()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark build_taxonomy against synthetic taxonomies of increasing size.
+
+Compares the original load-everything-then-json.dump build with the streaming
+build and reports wall time and peak Python heap for each. Exits with an error
+if the streaming build's peak grows more than MAX_PEAK_GROWTH times as fast as
+the taxonomy.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Make build_taxonomy.py (repo root) and sibling utilities importable
+sys.path.append(str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).parent.parent))
+
+from build_taxonomy import build_taxonomy
+from synthetic_taxonomy import generate_taxonomy
+
+# Streaming peak may grow at most this fraction as fast as the node count. What
+# remains is per-category bookkeeping (manifest entries, skeleton stubs, quality
+# summaries); holding the merged tree again would grow it as fast as the nodes.
+MAX_PEAK_GROWTH = 0.5
+# Growth below this is noise: the interpreter's interned-string table (which pathlib fills)
+# can resize during any traced run, adding one allocation of a megabyte or two
+PEAK_NOISE_BYTES = 2 * 1024 * 1024
+
+def legacy_build(data_dir, output_path):
+    """The pre-streaming build: whole merged tree in memory, one json.dump"""
+    data_dir = Path(data_dir)
+    with open(data_dir / '_metadata.json', 'r', encoding='utf-8') as f:
+        taxonomy = json.load(f)
+    with open(data_dir / '_index.json', 'r', encoding='utf-8') as f:
+        category_index = json.load(f)
+    category_index.sort(key=lambda x: x['order'])
+
+    children = []
+    for category_info in category_index:
+        with open(data_dir / category_info['filename'], 'r', encoding='utf-8') as f:
+            children.append(json.load(f))
+    taxonomy['children'] = children
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(taxonomy, f, indent=2, ensure_ascii=False)
+
+def measure(func, trace_memory=True):
+    """Run func and return (seconds, peak traced bytes or None)
+
+    Tracing slows allocation-heavy code several times over, so the time comes
+    from an untraced run and the peak from a second, traced one.
+    """
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak
+
+def check_peak_growth(rows, max_growth=MAX_PEAK_GROWTH):
+    """Return an error message if the streaming peak grew with the taxonomy, else None"""
+    first, last = rows[0], rows[-1]
+    if last['nodes'] <= first['nodes']:
+        return None
+    node_growth = last['nodes'] / first['nodes']
+    limit = first['stream_peak'] * max_growth * node_growth + PEAK_NOISE_BYTES
+    if last['stream_peak'] > limit:
+        return (f"streaming peak grew {last['stream_peak'] / first['stream_peak']:.1f}x "
+                f"({first['stream_peak'] / 1e6:.1f} -> {last['stream_peak'] / 1e6:.1f} MB, limit "
+                f"{limit / 1e6:.1f} MB) for {node_growth:.0f}x the nodes")
+    return None
+
+def run_benchmark(scales, workers):
+    """Benchmark each scale factor (1 = today's 910 nodes) and print a table"""
+    rows = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            data_dir = tmp / 'taxonomy-data'
+            nodes = generate_taxonomy(data_dir, total_nodes=910 * scale)
+
+            legacy_out = tmp / 'legacy.json'
+            stream_out = tmp / 'stream.json'
+
+            legacy_time, legacy_peak = measure(lambda: legacy_build(data_dir, legacy_out))
+            stream_time, stream_peak = measure(lambda: build_taxonomy(
+                data_dir=data_dir, output_path=stream_out, cache_dir=tmp / 'cache-serial', verbose=False))
+            parallel_time, _ = measure(lambda: build_taxonomy(
+                data_dir=data_dir, output_path=tmp / 'parallel.json', cache_dir=tmp / 'cache-parallel',
+                workers=workers, verbose=False), trace_memory=False)
+            incremental_time, _ = measure(lambda: build_taxonomy(
+                incremental=True, data_dir=data_dir, output_path=stream_out, cache_dir=tmp / 'cache-serial',
+                verbose=False), trace_memory=False)
+
+            if legacy_out.read_bytes() != stream_out.read_bytes():
+                print(f"❌ Output mismatch at scale {scale}x")
+                sys.exit(1)
+
+            rows.append({
+                "scale": scale,
+                "nodes": nodes,
+                "output_bytes": os.path.getsize(stream_out),
+                "legacy_s": legacy_time,
+                "legacy_peak": legacy_peak,
+                "stream_s": stream_time,
+                "stream_peak": stream_peak,
+                "parallel_s": parallel_time,
+                "incremental_s": incremental_time,
+            })
+            print(f"✅ {scale}x done ({nodes:,} nodes)")
+
+    print(f"\n{'scale':>6} {'nodes':>9} {'output':>10} | {'legacy s':>9} {'peak MB':>8} | "
+          f"{'stream s':>9} {'peak MB':>8} | {f'-j{workers} s':>8} {'incr s':>7}")
+    for row in rows:
+        print(f"{row['scale']:>5}x {row['nodes']:>9,} {row['output_bytes'] / 1e6:>8.1f}MB | "
+              f"{row['legacy_s']:>9.2f} {row['legacy_peak'] / 1e6:>8.1f} | "
+              f"{row['stream_s']:>9.2f} {row['stream_peak'] / 1e6:>8.1f} | "
+              f"{row['parallel_s']:>8.2f} {row['incremental_s']:>7.2f}")
+    return rows
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark build_taxonomy on synthetic taxonomies')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                       help='Multiples of the current 910-node taxonomy (default: 1 10 100)')
+    parser.add_argument('--workers', '-j', type=int, default=os.cpu_count() or 2,
+                       help='Worker processes for the parallel run (default: CPU count)')
+
+    parser.add_argument('--max-peak-growth', type=float, default=MAX_PEAK_GROWTH,
+                       help=f'Allowed streaming peak growth as a fraction of node growth (default: {MAX_PEAK_GROWTH})')
+
+    args = parser.parse_args()
+    rows = run_benchmark(args.scales, args.workers)
+
+    problem = check_peak_growth(rows, args.max_peak_growth)
+    if problem:
+        print(f"\n❌ MEMORY REGRESSION: {problem}")
+        sys.exit(1)
+    print(f"\n✅ Streaming peak stays within {args.max_peak_growth:.0%} of node growth")
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Compare the merged taxonomy file with its compact form.
+
+For the current file (or a synthetic taxonomy) reports bytes, gzipped
+bytes and the time to get the tree back: json.loads for the regular file,
+json.loads + rehydrate for the compact one, and the same in node with
+JSON.parse + src/js/compact_taxonomy.js when node is installed. Every
+rehydrated tree is checked against the original.
+"""
+
+import gzip
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Make build_taxonomy.py (repo root) and sibling utilities importable
+sys.path.append(str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).parent.parent))
+
+from build_taxonomy import OUTPUT_PATH, build_taxonomy
+from compact_format import pack, rehydrate
+from synthetic_taxonomy import generate_taxonomy
+
+JS_LOADER = Path(__file__).parent.parent / 'src' / 'js' / 'compact_taxonomy.js'
+NODE_SCRIPT = """
+import { readFileSync } from "fs"
+import { loadTaxonomy } from "%s"
+const [file, repeat] = process.argv.slice(1)
+const text = readFileSync(file, "utf8")
+let best = Infinity
+let tree = null
+for (let i = 0; i < Number(repeat); i++) {
+  const start = performance.now()
+  tree = loadTaxonomy(JSON.parse(text))
+  best = Math.min(best, performance.now() - start)
+}
+process.stdout.write(JSON.stringify({ ms: best, tree }))
+"""
+
+def best_time(func, repeat):
+    """Fastest of `repeat` runs, in ms, and the last result"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+def node_time(path, repeat):
+    """(ms, tree) for loading path in node, or None without node"""
+    if not shutil.which('node'):
+        return None
+    script = NODE_SCRIPT % JS_LOADER.resolve().as_uri()
+    output = subprocess.run(['node', '--input-type=module', '-e', script, str(path), str(repeat)],
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output)
+    return result["ms"], result["tree"]
+
+def compare(source_path, repeat):
+    """Print size and load time of the indented, minified and compact encodings of one file"""
+    source_text = Path(source_path).read_text(encoding='utf-8')
+    tree = json.loads(source_text)
+    expected = json.dumps(tree, ensure_ascii=False)
+    variants = [
+        ("indented (current)", source_text, json.loads),
+        ("minified", json.dumps(tree, ensure_ascii=False, separators=(',', ':')), json.loads),
+        ("compact", json.dumps(pack(tree), ensure_ascii=False, separators=(',', ':')),
+         lambda text: rehydrate(json.loads(text))),
+    ]
+
+    print(f"\n{source_path}")
+    print(f"{'format':<20} {'bytes':>12} {'gzip':>10} {'python ms':>10} {'node ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, text, load in variants:
+            data = text.encode('utf-8')
+            python_ms, loaded = best_time(lambda: load(text), repeat)
+            if json.dumps(loaded, ensure_ascii=False) != expected:
+                print(f"❌ {label}: Python loader did not reproduce the tree")
+                sys.exit(1)
+
+            variant_path = Path(tmp) / 'variant.json'
+            variant_path.write_bytes(data)
+            node_result = node_time(variant_path, repeat)
+            node_column = "-"
+            if node_result:
+                node_ms, node_tree = node_result
+                if json.dumps(node_tree, ensure_ascii=False) != expected:
+                    print(f"❌ {label}: JS loader did not reproduce the tree")
+                    sys.exit(1)
+                node_column = f"{node_ms:.1f}"
+
+            print(f"{label:<20} {len(data):>12,} {len(gzip.compress(data)):>10,} "
+                  f"{python_ms:>10.1f} {node_column:>9}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Compare the merged taxonomy file with its compact form')
+    parser.add_argument('--input', default=OUTPUT_PATH, help=f'Merged taxonomy file (default: {OUTPUT_PATH})')
+    parser.add_argument('--synthetic', type=int, nargs='*', default=[], metavar='NODES',
+                       help='Also compare synthetic taxonomies of these sizes')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, fastest kept (default: 5)')
+
+    args = parser.parse_args()
+    compare(args.input, args.repeat)
+    for nodes in args.synthetic:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            generate_taxonomy(tmp / 'taxonomy-data', total_nodes=nodes)
+            build_taxonomy(data_dir=tmp / 'taxonomy-data', output_path=tmp / 'public' / 'data.json',
+                           cache_dir=tmp / 'cache', verbose=False)
+            compare(tmp / 'public' / 'data.json', args.repeat)
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Measure enhancement throughput against the local Messages API stand-in.
+
+Runs the same batches through the async runner at several concurrency
+levels. Each run gets a fresh in-memory copy of taxonomy-data/, and
+nothing is written back to disk.
+"""
+
+import contextlib
+import io
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from apply_enhancements import TaxonomyEnhancer
+from async_runner import run_batches
+from efficient_enhance import batch_nodes_by_category, format_batch_for_api, prioritize_nodes_by_impact
+from mock_messages_api import start_mock_server
+from taxonomy_store import TaxonomyStore
+
+def run_benchmark(batch_count=20, levels=(1, 2, 4, 8), latency=0.5, requests_per_minute=None,
+                  tokens_per_minute=None, data_dir='taxonomy-data'):
+    server, base_url, state = start_mock_server(latency=latency)
+    # No response cache: every run must actually reach the server
+    enhancer = TaxonomyEnhancer(api_key="mock", base_url=base_url, cache=False)
+    results = []
+    try:
+        for concurrency in levels:
+            store = TaxonomyStore.load(data_dir)
+            batches = [format_batch_for_api(batch) for batch in
+                       prioritize_nodes_by_impact(batch_nodes_by_category(store, 10))[:batch_count]]
+            state.peak_concurrency = 0
+            # The per-node progress output is not what is being measured
+            with contextlib.redirect_stdout(io.StringIO()):
+                summary = run_batches(enhancer, batches, store, concurrency=concurrency,
+                                      requests_per_minute=requests_per_minute,
+                                      tokens_per_minute=tokens_per_minute)
+            results.append((concurrency, summary, state.peak_concurrency))
+    finally:
+        server.shutdown()
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark the async enhancement runner against a local mock API')
+    parser.add_argument('--batches', type=int, default=20, help='Batches per run (default: 20)')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Concurrency levels to compare (default: 1 2 4 8)')
+    parser.add_argument('--latency', type=float, default=0.5, help='Mock response latency in seconds (default: 0.5)')
+    parser.add_argument('--rpm', type=int, help='Requests per minute limit (default: unlimited)')
+    parser.add_argument('--tpm', type=int, help='Tokens per minute limit (default: unlimited)')
+
+    args = parser.parse_args()
+
+    print(f"{'concurrency':>11} {'batches':>8} {'nodes':>6} {'seconds':>8} {'batches/s':>10} {'peak':>5}")
+    for concurrency, summary, peak in run_benchmark(args.batches, args.levels, args.latency, args.rpm, args.tpm):
+        print(f"{concurrency:>11} {summary['succeeded']:>8} {summary['enhanced']:>6} "
+              f"{summary['elapsed']:>8.2f} {summary['succeeded'] / summary['elapsed']:>10.2f} {peak:>5}")
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the taxonomy pipeline.
+
+For each requested size a seeded synthetic taxonomy is generated (and kept
+under .taxonomy-cache/bench-data/ for later runs), copied into a scratch
+workspace, and every pipeline stage is timed and, in a second traced run,
+memory-profiled:
+
+    build, build_incremental, load_store, analyze_tree, analyze_columnar,
+    batch_nodes, prioritize, update_nodes, enhance_end_to_end
+
+The enhancement stage runs against the local Messages API stand-in, so the
+whole path (API calls, applying results, saving, rebuilding) is measured
+offline. Results are compared with a stored baseline; any stage that got
+slower or hungrier than the tolerance allows fails the run.
+"""
+
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Make build_taxonomy.py (repo root) and sibling utilities importable
+sys.path.append(str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).parent.parent))
+
+from analyze_nodes import analyze_tree
+from apply_enhancements import (TargetResolver, TaxonomyEnhancer, apply_enhancement_to_store,
+                                save_store_changes)
+from async_runner import run_batches
+from build_taxonomy import OUTPUT_PATH, build_taxonomy
+from efficient_enhance import batch_nodes_by_category, format_batch_for_api, prioritize_nodes_by_impact
+from mock_messages_api import start_mock_server
+from synthetic_taxonomy import generate_taxonomy
+from taxonomy_store import TaxonomyStore
+import node_columns
+
+BASELINE_PATH = '.taxonomy-cache/benchmark_baseline.json'
+DATASET_DIR = '.taxonomy-cache/bench-data'
+DEFAULT_TOLERANCE = 0.3
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS_DELTA = 0.05
+MIN_BYTES_DELTA = 1024 * 1024
+
+UPDATE_TARGETS = 20
+ENHANCE_BATCHES = 10
+
+def dataset(nodes, max_depth, fanout, seed):
+    """Generate (once) and return the directory of a synthetic taxonomy"""
+    path = Path(DATASET_DIR) / f"n{nodes}-d{max_depth}-f{fanout}-s{seed}"
+    if not (path / '_index.json').exists():
+        print(f"🧪 Generating {nodes:,} nodes...")
+        generate_taxonomy(path, total_nodes=nodes, max_depth=max_depth, fanout=fanout, seed=seed)
+    return path
+
+def measure(run, setup=None, trace_memory=False):
+    """Time run(setup()) (setup is not measured); returns (seconds, peak traced bytes or None)"""
+    argument = setup() if setup else None
+    with contextlib.redirect_stdout(io.StringIO()):
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        run(argument) if setup else run()
+        elapsed = time.perf_counter() - start
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return elapsed, peak
+
+def pipeline_stages(enhancer):
+    """(name, setup, run) for every stage; run in the workspace directory"""
+    merged = lambda: json.loads(Path(OUTPUT_PATH).read_text(encoding='utf-8'))
+    store = lambda: TaxonomyStore.load()
+    batches = lambda: batch_nodes_by_category(TaxonomyStore.load(), 10)
+
+    def update_targets():
+        loaded = TaxonomyStore.load()
+        paths = [node["path"] for batch in batch_nodes_by_category(loaded, 10) for node in batch["nodes"]]
+        step = max(1, len(paths) // UPDATE_TARGETS)
+        return loaded, paths[::step][:UPDATE_TARGETS]
+
+    def update_nodes(arguments):
+        # Exact path resolution through the path index, as enhancement runs do
+        loaded, paths = arguments
+        resolver = TargetResolver(loaded)
+        enhancement = {"description": "Benchmark description long enough to replace a weak one.",
+                       "links": {"Official": "https://example.org"}}
+        for path in paths:
+            index, _ = resolver.locate(path)
+            if index is not None:
+                apply_enhancement_to_store(loaded, index, enhancement)
+
+    def enhance_setup():
+        loaded = TaxonomyStore.load()
+        plan = prioritize_nodes_by_impact(batch_nodes_by_category(loaded, 10))[:ENHANCE_BATCHES]
+        return loaded, [format_batch_for_api(batch) for batch in plan]
+
+    def enhance(arguments):
+        loaded, formatted = arguments
+        run_batches(enhancer, formatted, loaded, concurrency=4, requests_per_minute=None, tokens_per_minute=None)
+        save_store_changes(loaded)
+
+    stages = [
+        ("build", None, lambda: build_taxonomy(verbose=False)),
+        ("build_incremental", None, lambda: build_taxonomy(incremental=True, verbose=False)),
+        ("load_store", None, lambda: TaxonomyStore.load()),
+        ("analyze_tree", merged, analyze_tree),
+    ]
+    if node_columns.np is not None:
+        stages.append(("analyze_columnar", store,
+                       lambda loaded: node_columns.NodeColumns.from_store(loaded).quality_counts()))
+    stages += [
+        ("batch_nodes", store, lambda loaded: batch_nodes_by_category(loaded, 10)),
+        ("prioritize", batches, prioritize_nodes_by_impact),
+        ("update_nodes", update_targets, update_nodes),
+        ("enhance_end_to_end", enhance_setup, enhance),
+    ]
+    return stages
+
+def run_suite(sizes, max_depth=5, fanout=8, seed=42, trace_memory=True, only=None):
+    """Run every stage for each size; returns {"stage@nodes": {"seconds", "peak_bytes"}}"""
+    results = {}
+    server, base_url, _ = start_mock_server(latency=0)
+    enhancer = TaxonomyEnhancer(api_key="mock", base_url=base_url, cache=False)
+    repo_dir = Path.cwd()
+    try:
+        for nodes in sizes:
+            source = dataset(nodes, max_depth, fanout, seed).resolve()
+            with tempfile.TemporaryDirectory() as workspace:
+                shutil.copytree(source, Path(workspace) / 'taxonomy-data')
+                (Path(workspace) / 'public').mkdir()
+                os.chdir(workspace)
+                try:
+                    for name, setup, run in pipeline_stages(enhancer):
+                        if only and name not in only and name != "build":
+                            continue
+                        seconds, _ = measure(run, setup)
+                        peak = measure(run, setup, trace_memory=True)[1] if trace_memory else None
+                        results[f"{name}@{nodes}"] = {"seconds": seconds, "peak_bytes": peak}
+                        print(f"  {name:<20} {nodes:>9,} nodes {seconds:>9.3f}s"
+                              + (f" {peak / 1e6:>9.1f} MB" if peak is not None else ""))
+                finally:
+                    os.chdir(repo_dir)
+    finally:
+        server.shutdown()
+    return results
+
+def compare(results, baseline, tolerance):
+    """Return the list of regression messages against the baseline"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if not previous:
+            continue
+        checks = [("seconds", MIN_SECONDS_DELTA, lambda v: f"{v:.3f}s"),
+                  ("peak_bytes", MIN_BYTES_DELTA, lambda v: f"{v / 1e6:.1f} MB")]
+        for field, min_delta, fmt in checks:
+            old, new = previous.get(field), current.get(field)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > min_delta:
+                regressions.append(f"{key} {field}: {fmt(old)} -> {fmt(new)} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Time and memory-profile every taxonomy pipeline stage')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[910, 9100, 91000],
+                        help='Node counts to benchmark (default: 910 9100 91000; up to ~1000000)')
+    parser.add_argument('--max-depth', type=int, default=5, help='Synthetic taxonomy depth (default: 5)')
+    parser.add_argument('--fanout', type=int, default=8, help='Synthetic taxonomy fan-out (default: 8)')
+    parser.add_argument('--seed', type=int, default=42, help='Generator seed (default: 42)')
+    parser.add_argument('--stages', nargs='+', help='Only run these stages (build always runs first)')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the traced memory runs')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help=f'Baseline file (default: {BASELINE_PATH})')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Allowed slowdown/growth before failing (default: {DEFAULT_TOLERANCE:.0%})')
+
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.max_depth, args.fanout, args.seed,
+                        trace_memory=not args.no_memory, only=args.stages)
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8')) if baseline_path.exists() else None
+
+    if baseline is None or args.update_baseline:
+        merged = dict(baseline or {})
+        merged.update(results)
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(merged, indent=2, sort_keys=True), encoding='utf-8')
+        print(f"\n📌 Baseline saved to {baseline_path}")
+        return
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} PERFORMANCE REGRESSION(S) against {baseline_path}:")
+        for regression in regressions:
+            print(f"    - {regression}")
+        sys.exit(1)
+    print(f"\n✅ No regressions against {baseline_path} (tolerance {args.tolerance:.0%})")
+
+if __name__ == "__main__":
+    main()
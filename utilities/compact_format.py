@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Compact storage format for the merged taxonomy.
+
+The canonical files repeat the same boilerplate on most nodes
+("description": "", "tags": [], "links": {"Link": ""}) and the same keys
+on every node. The compact form splits the tree into blocks: one for the
+root (its "children" left as an empty list) and one per category, in
+order. Each block stores:
+
+- "strings": every string value used more than once in the block, most
+  frequent first; in the tree such a string is its index in this table
+  (others stay inline)
+- "shapes": every distinct dict layout as [keys, default mask]; bit i of
+  the mask means keys[i] holds its value from "defaults" and is not stored.
+  Only the first MASK_BITS keys can be elided, so the mask stays an exact
+  integer in JavaScript (a double)
+- "tree": the encoded subtree, where a dict is [shape id + 1, stored
+  values...], a list is [0, items...] and any other non-string scalar is
+  [-1, value]
+
+Blocks share nothing but "defaults", so build_taxonomy.py caches each
+category's block with its fragment and splices the blocks into the file
+(write_compact_blocks) instead of re-packing the whole taxonomy.
+
+rehydrate() restores the exact original structure, key order included, so
+json.dumps(rehydrate(pack(tree))) == json.dumps(tree). src/js/compact_taxonomy.js
+is the browser loader for the same format. Both encoder and decoder use
+explicit stacks, so tree depth is not limited by the recursion limit.
+"""
+
+import copy
+import json
+import shutil
+from collections import Counter
+from pathlib import Path
+
+COMPACT_NAME = 'Creative_Tech_Taxonomy_data.compact.json'
+COMPACT_FORMAT = 'creative-tech-taxonomy-compact'
+COMPACT_VERSION = 2
+# Values left out of the compact file; a key only matches when its value is exactly this
+DEFAULTS = {"description": "", "tags": [], "links": {"Link": ""}}
+# Widest mask a JSON number holds exactly in JavaScript (2**53); later keys are always stored
+MASK_BITS = 53
+LIST = 0
+LITERAL = -1
+
+def stored_items(value, defaults):
+    """(key, value) pairs of a dict that are written out, plus its default mask"""
+    items = []
+    mask = 0
+    for i, (key, item) in enumerate(value.items()):
+        if i < MASK_BITS and key in defaults and item == defaults[key]:
+            mask |= 1 << i
+        else:
+            items.append(item)
+    return items, mask
+
+def pack_block(tree, defaults=DEFAULTS):
+    """One block (a JSON-ready dict) for a subtree: its string table, shapes and encoded tree"""
+    # First pass: count the strings that will be stored
+    counts = Counter()
+    order = {}
+    stack = [tree]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, str):
+            counts[value] += 1
+            order.setdefault(value, len(order))
+        elif isinstance(value, dict):
+            stack.extend(reversed(stored_items(value, defaults)[0]))
+        elif isinstance(value, list):
+            stack.extend(reversed(value))
+    # Strings used once stay inline: a table lookup would only add bytes
+    strings = sorted((text for text, count in counts.items() if count > 1),
+                     key=lambda text: (-counts[text], order[text]))
+    string_ids = {text: i for i, text in enumerate(strings)}
+
+    # Second pass: encode. Each stack entry appends its encoding to `target`;
+    # siblings are pushed in reverse so they are appended in order.
+    shapes = []
+    shape_ids = {}
+    result = []
+    stack = [(tree, result)]
+    while stack:
+        value, target = stack.pop()
+        if isinstance(value, str):
+            target.append(string_ids.get(value, value))
+        elif isinstance(value, dict):
+            items, mask = stored_items(value, defaults)
+            shape = (tuple(value), mask)
+            if shape not in shape_ids:
+                shape_ids[shape] = len(shapes)
+                shapes.append([list(shape[0]), mask])
+            encoded = [shape_ids[shape] + 1]
+            target.append(encoded)
+            stack.extend((item, encoded) for item in reversed(items))
+        elif isinstance(value, list):
+            encoded = [LIST]
+            target.append(encoded)
+            stack.extend((item, encoded) for item in reversed(value))
+        else:
+            target.append([LITERAL, value])
+
+    return {"strings": strings, "shapes": shapes, "tree": result[0]}
+
+def root_block(tree, defaults=DEFAULTS):
+    """The root's block: its own fields, with "children" (if present) kept in place as an empty list"""
+    return pack_block({key: [] if key == "children" else value for key, value in tree.items()}, defaults)
+
+def pack(tree, defaults=DEFAULTS):
+    """Compact document (a JSON-ready dict) for a taxonomy tree"""
+    return {
+        "format": COMPACT_FORMAT,
+        "version": COMPACT_VERSION,
+        "defaults": defaults,
+        "root": root_block(tree, defaults),
+        "children": [pack_block(child, defaults) for child in tree.get("children", [])],
+    }
+
+def fresh_default(value):
+    """Callable returning a new copy of a default value (immutable ones are shared)"""
+    if isinstance(value, (list, dict)):
+        items = value.values() if isinstance(value, dict) else value
+        if any(isinstance(item, (list, dict)) for item in items):
+            return lambda: copy.deepcopy(value)
+        return value.copy
+    return lambda: value
+
+def rehydrate(document):
+    """The original taxonomy tree from a compact document"""
+    if document.get("format") != COMPACT_FORMAT or document.get("version") != COMPACT_VERSION:
+        raise ValueError("not a compact taxonomy document of a supported version")
+    defaults = {key: fresh_default(value) for key, value in document["defaults"].items()}
+    tree = rehydrate_block(document["root"], defaults)
+    if "children" in tree:
+        tree["children"] = [rehydrate_block(block, defaults) for block in document["children"]]
+    return tree
+
+def rehydrate_block(block, defaults):
+    """The subtree of one block; defaults maps each key to a fresh_default factory"""
+    strings = block["strings"]
+    # Per shape: (key, default factory or None if the value is stored) in key order
+    shapes = [[(key, defaults[key] if mask >> i & 1 else None) for i, key in enumerate(keys)]
+              for keys, mask in block["shapes"]]
+
+    result = [None]
+    # (encoded value, container, slot): decode into container[slot]
+    stack = [(block["tree"], result, 0)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        encoded, container, slot = pop()
+        if type(encoded) is int:
+            container[slot] = strings[encoded]
+            continue
+        if type(encoded) is str:
+            container[slot] = encoded
+            continue
+        kind = encoded[0]
+        if kind > 0:
+            value = {}
+            position = 1
+            for key, default in shapes[kind - 1]:
+                if default is not None:
+                    value[key] = default()
+                    continue
+                item = encoded[position]
+                position += 1
+                if type(item) is int:
+                    value[key] = strings[item]
+                elif type(item) is str:
+                    value[key] = item
+                else:
+                    # Placeholder keeps the key order; filled in when popped
+                    value[key] = None
+                    push((item, value, key))
+            container[slot] = value
+        elif kind == LIST:
+            value = [None] * (len(encoded) - 1)
+            for i in range(1, len(encoded)):
+                item = encoded[i]
+                if type(item) is int:
+                    value[i - 1] = strings[item]
+                elif type(item) is str:
+                    value[i - 1] = item
+                else:
+                    push((item, value, i - 1))
+            container[slot] = value
+        else:
+            container[slot] = encoded[1]
+    return result[0]
+
+def write_compact(path, tree):
+    """Write the compact form of tree atomically; returns the bytes written"""
+    text = json.dumps(pack(tree), ensure_ascii=False, separators=(',', ':'))
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    tmp_path.replace(path)
+    return len(text.encode('utf-8'))
+
+def dumps_block(block):
+    """A block's text as cached by the build and spliced by write_compact_blocks"""
+    return json.dumps(block, ensure_ascii=False, separators=(',', ':'))
+
+def write_compact_blocks(path, root, block_paths, defaults=DEFAULTS):
+    """Stream a compact file from the root's fields and the cached category blocks (see dumps_block) in order.
+
+    Produces the same bytes as write_compact(path, tree) for the tree they
+    came from; returns the bytes written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    header = json.dumps({"format": COMPACT_FORMAT, "version": COMPACT_VERSION, "defaults": defaults},
+                        ensure_ascii=False, separators=(',', ':'))[:-1]
+    # The merged file always lists the root's fields first and its children last
+    root = {**{key: value for key, value in root.items() if key != "children"}, "children": []}
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(f'{header},"root":{dumps_block(root_block(root, defaults))},"children":[')
+        for i, block_path in enumerate(block_paths):
+            if i:
+                f.write(',')
+            with open(block_path, 'r', encoding='utf-8') as block:
+                shutil.copyfileobj(block, f)
+        f.write(']}')
+    tmp_path.replace(path)
+    return path.stat().st_size
+
+def load_compact(path):
+    """Read a compact file back into the regular taxonomy tree"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return rehydrate(json.load(f))
+
+def load_taxonomy(path):
+    """Load either format: compact files are recognised by their "format" field"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return rehydrate(data) if data.get("format") == COMPACT_FORMAT else data
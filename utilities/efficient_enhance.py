@@ -4,64 +4,232 @@ Efficient API-based taxonomy enhancement strategies.
 Minimizes API calls while maximizing content quality.
 """
 
+import heapq
 import json
+import math
+import sys
+import unicodedata
+from itertools import islice
 from pathlib import Path
 
-def batch_nodes_by_category(data, max_batch_size=10):
-    """Group related nodes for batch processing to save API calls."""
-    batches = []
+sys.path.append(str(Path(__file__).parent))
+
+from analyze_nodes import quality_score
+from apply_enhancements import TaxonomyEnhancer
+from metrics import METRICS_DIR, metrics, start_run
+from sidecars import CANDIDATE_DESCRIPTION_LENGTH, CandidateSidecar
+from taxonomy_store import TaxonomyStore, coerce_store
+
+# Token estimates for one enhancement request (see TaxonomyEnhancer.build_prompt)
+CHARS_PER_TOKEN = 4
+# System prompt plus the fixed instructions around the node list
+PROMPT_OVERHEAD_TOKENS = 200
+# One answer entry: ~150 char description, 1-2 links and the indented JSON around them, plus
+# the name. About 360 characters; URLs and JSON punctuation run nearer 3 than 4 chars/token.
+OUTPUT_TOKENS_PER_NODE = 110
+OUTPUT_OVERHEAD_TOKENS = 20
+# Plan a quarter under TaxonomyEnhancer.MAX_TOKENS, past which answers are cut off mid-JSON:
+# answers vary from batch to batch around the estimate
+DEFAULT_MAX_OUTPUT_TOKENS = TaxonomyEnhancer.MAX_TOKENS * 3 // 4
+# Recorded usage replaces OUTPUT_TOKENS_PER_NODE once it covers this many answered nodes,
+# plus a margin for batches that answer longer than the average
+CALIBRATION_MIN_NODES = 100
+CALIBRATION_MARGIN = 1.25
+DEFAULT_MAX_INPUT_TOKENS = 4000
+# batch size of the old fixed-size strategy, reported for comparison
+FIXED_BATCH_SIZE = 10
+# Scheduler weight per category (case-insensitive substring match); unlisted categories weigh 1.
+# Names that match nothing in taxonomy-data/_index.json are reported by category_weights_from_args.
+DEFAULT_CATEGORY_WEIGHTS = {
+    "Creative Code Frameworks": 2.0,
+    "Game Engines": 2.0,
+    "AI/Machine Learning": 2.0,
+    "Physical Computing": 2.0,
+    "Web and Networking Tools": 2.0,
+}
+
+class TokenBudget:
+    """Per-request limits that batch_nodes_by_category packs nodes under"""
     
-    def collect_nodes_by_parent(node, parent_name="", nodes_list=None):
-        if nodes_list is None:
-            nodes_list = []
-        
-        name = node.get("name", {}).get("en", "Unknown") if isinstance(node.get("name"), dict) else str(node.get("name", ""))
-        current_path = f"{parent_name}/{name}" if parent_name else name
-        
-        # Add this node to the list
-        nodes_list.append({
-            "node": node,
-            "path": current_path,
-            "parent": parent_name
-        })
-        
-        # Process children
-        for child in node.get("children", []):
-            collect_nodes_by_parent(child, current_path, nodes_list)
-        
-        return nodes_list
+    def __init__(self, max_input_tokens=DEFAULT_MAX_INPUT_TOKENS, max_output_tokens=DEFAULT_MAX_OUTPUT_TOKENS,
+                 max_nodes=None, output_tokens_per_node=OUTPUT_TOKENS_PER_NODE):
+        self.max_input_tokens = max_input_tokens
+        self.max_output_tokens = max_output_tokens
+        self.max_nodes = max_nodes
+        self.output_tokens_per_node = output_tokens_per_node
     
-    all_nodes = collect_nodes_by_parent(data)
+    def fits(self, input_tokens, output_tokens, node_count):
+        return (input_tokens <= self.max_input_tokens and output_tokens <= self.max_output_tokens
+                and (self.max_nodes is None or node_count <= self.max_nodes))
+
+def estimate_node_tokens(node, output_tokens_per_node=OUTPUT_TOKENS_PER_NODE):
+    """(input, output) tokens one store node (or CandidateNode) adds to an enhancement request"""
+    line = f"- {node.name}: {node.description or 'No description'}\n"
+    name_tokens = len(node.name) // CHARS_PER_TOKEN + 1
+    return len(line) // CHARS_PER_TOKEN + 1, output_tokens_per_node + name_tokens
+
+def recorded_output_tokens_per_node(metrics_dir=METRICS_DIR):
+    """Answer tokens per node over the recorded runs (usage.output_tokens / answered_nodes).
     
-    # Group by parent category for batch processing
-    categories = {}
-    for node_info in all_nodes:
-        parent = node_info["parent"].split("/")[0] if "/" in node_info["parent"] else "root"
-        if parent not in categories:
-            categories[parent] = []
-        categories[parent].append(node_info)
+    None until the runs cover CALIBRATION_MIN_NODES answered nodes.
+    """
+    output_tokens = answered_nodes = 0
+    for path in Path(metrics_dir).glob("*.json"):
+        try:
+            counters = json.loads(path.read_text(encoding='utf-8')).get("counters", {})
+        except (OSError, ValueError):
+            continue
+        if counters.get("answered_nodes"):
+            output_tokens += counters.get("output_tokens", 0)
+            answered_nodes += counters["answered_nodes"]
+    if answered_nodes < CALIBRATION_MIN_NODES:
+        return None
+    return output_tokens / answered_nodes
+
+def calibrated_output_tokens_per_node(metrics_dir=METRICS_DIR):
+    """The per-node answer estimate to plan with: recorded usage plus a margin, else the default"""
+    recorded = recorded_output_tokens_per_node(metrics_dir)
+    if recorded is None:
+        return OUTPUT_TOKENS_PER_NODE
+    return math.ceil(recorded * CALIBRATION_MARGIN)
+
+def pack_nodes(nodes, budget):
+    """Split one category's nodes (in preorder) into runs that fit the budget.
+    
+    Next-fit: each node goes into the current batch or starts a new one. The
+    nodes are small next to the budget, so this stays within one node per
+    batch of an optimal packing while keeping siblings together for context.
+    A node too large for any batch on its own gets a batch to itself.
+    """
+    packed = []
+    current, input_tokens, output_tokens = [], PROMPT_OVERHEAD_TOKENS, OUTPUT_OVERHEAD_TOKENS
+    for node_info in nodes:
+        node_input, node_output = node_info["tokens"]
+        if current and not budget.fits(input_tokens + node_input, output_tokens + node_output, len(current) + 1):
+            packed.append((current, input_tokens, output_tokens))
+            current, input_tokens, output_tokens = [], PROMPT_OVERHEAD_TOKENS, OUTPUT_OVERHEAD_TOKENS
+        current.append(node_info)
+        input_tokens += node_input
+        output_tokens += node_output
+    if current:
+        packed.append((current, input_tokens, output_tokens))
+    return packed
+
+def normalize_name(name):
+    """Key under which the same tool listed in several places is recognised"""
+    return " ".join(unicodedata.normalize("NFKC", name).casefold().split())
+
+def dedupe_nodes(categories):
+    """Fold leaf nodes that share a normalized name into their first occurrence.
     
-    # Create batches within each category
+    categories maps a category to its node entries in preorder and is
+    updated in place; the kept entry lists the others under "duplicates".
+    Only leaves are folded: grouping nodes such as "Related Concepts" or
+    "Output" share names across categories but not meaning.
+    """
+    representatives = {}
     for category, nodes in categories.items():
-        # Only process nodes that need enhancement
-        low_quality_nodes = []
+        kept = []
         for node_info in nodes:
-            node = node_info["node"]
-            desc_len = len(node.get("description", "").strip())
-            has_links = bool(node.get("links", {}) and any(v.strip() for v in node.get("links", {}).values() if v))
-            
-            if desc_len < 50 or not has_links:
-                low_quality_nodes.append(node_info)
-        
-        # Split into batches
-        for i in range(0, len(low_quality_nodes), max_batch_size):
-            batch = low_quality_nodes[i:i + max_batch_size]
-            if batch:
-                batches.append({
-                    "category": category,
-                    "nodes": batch,
-                    "batch_id": f"{category}_{i//max_batch_size + 1}"
+            key = None if node_info["children_count"] else normalize_name(node_info["node"].name)
+            representative = representatives.get(key) if key else None
+            if representative is None:
+                if key:
+                    representatives[key] = node_info
+                kept.append(node_info)
+            else:
+                representative.setdefault("duplicates", []).append(node_info)
+        categories[category] = kept
+
+def duplicate_count(batches):
+    """Nodes covered through another node's request"""
+    return sum(len(node_info.get("duplicates", ())) for batch in batches for node_info in batch["nodes"])
+
+def fixed_size_call_count(batches, batch_size=FIXED_BATCH_SIZE):
+    """API calls the same nodes would need in fixed batches of batch_size per category"""
+    per_category = {}
+    for batch in batches:
+        node_count = len(batch["nodes"]) + sum(len(node_info.get("duplicates", ())) for node_info in batch["nodes"])
+        per_category[batch["category"]] = per_category.get(batch["category"], 0) + node_count
+    return sum(-(-count // batch_size) for count in per_category.values())
+
+def collect_candidates(data, exclude=(), output_tokens_per_node=OUTPUT_TOKENS_PER_NODE):
+    """Nodes that need enhancement (short description or no links) by category, in preorder.
+    
+    `data` may be a CandidateSidecar (see sidecars.py), which already lists
+    them, or anything coerce_store accepts, which is walked.
+    """
+    categories = {}
+    if isinstance(data, CandidateSidecar):
+        for category, index, path, parent, node, children_count, subtree_size in data:
+            if path not in exclude:
+                categories.setdefault(category, []).append({
+                    "index": index,
+                    "node": node,
+                    "path": path,
+                    "parent": parent,
+                    "tokens": estimate_node_tokens(node, output_tokens_per_node),
+                    "subtree_size": subtree_size,
+                    "children_count": children_count
                 })
+        return categories
+    
+    store = coerce_store(data)
+    subtree_sizes = store.subtree_sizes()
+    for index, path in store.walk():
+        node = store.nodes[index]
+        # Only process nodes that need enhancement
+        if (node.description_length < CANDIDATE_DESCRIPTION_LENGTH or not node.has_links) and path not in exclude:
+            categories.setdefault(store.category_name(index), []).append({
+                "index": index,
+                "node": node,
+                "path": path,
+                "parent": store.path(node.parent) if node.parent >= 0 else "",
+                "tokens": estimate_node_tokens(node, output_tokens_per_node),
+                "subtree_size": subtree_sizes[index],
+                "children_count": len(node.children)
+            })
+    return categories
+
+def batch_nodes_by_category(data, max_batch_size=None, exclude=(), budget=None, dedupe=False):
+    """Group related nodes for batch processing to save API calls.
+    
+    `data` may be a TaxonomyStore, a merged taxonomy dict, a path to one or
+    a CandidateSidecar (see collect_candidates).
+    Each batch entry carries the node's store index, record and canonical path.
+    Nodes whose path is in `exclude` (e.g. already journaled) are left out.
+    
+    Nodes stay grouped by category and are packed into as few requests as
+    the TokenBudget allows (estimated input and output tokens); every batch
+    records its estimate under "tokens". max_batch_size additionally caps
+    the nodes per batch; given without a budget it reproduces the old
+    fixed-size batches.
+    
+    dedupe=True sends a tool that appears in several places once; its other
+    copies ride along under "duplicates" (see dedupe_nodes).
+    """
+    if budget is None:
+        budget = TokenBudget(float("inf"), float("inf")) if max_batch_size else TokenBudget()
+    if max_batch_size:
+        budget = TokenBudget(budget.max_input_tokens, budget.max_output_tokens, max_batch_size,
+                             budget.output_tokens_per_node)
+    batches = []
+    
+    # Group by top-level category for batch processing
+    categories = collect_candidates(data, exclude, budget.output_tokens_per_node)
+    
+    if dedupe:
+        dedupe_nodes(categories)
+    
+    # Pack batches within each category
+    for category, low_quality_nodes in categories.items():
+        for number, (batch, input_tokens, output_tokens) in enumerate(pack_nodes(low_quality_nodes, budget), 1):
+            batches.append({
+                "category": category,
+                "nodes": batch,
+                "batch_id": f"{category}_{number}",
+                "tokens": {"input": input_tokens, "output": output_tokens}
+            })
     
     return batches
 
@@ -107,57 +275,110 @@ Return JSON with tool names and their links.
     
     return prompts
 
-def prioritize_nodes_by_impact(batches):
-    """Prioritize which batches to process first based on impact."""
-    
-    # Priority categories (higher impact first)
-    priority_categories = [
-        "Creative Code Frameworks",
-        "Game Engines", 
-        "AI/Machine Learning",
-        "Physical Computing",
-        "Web Technologies"
-    ]
-    
-    prioritized = []
+def category_weight(category, weights):
+    """Largest weight whose name occurs in the category name, else 1"""
+    lowered = category.lower()
+    return max((weight for name, weight in weights.items() if name.lower() in lowered), default=1.0)
+
+def unknown_weight_names(weights, categories):
+    """Weight names that occur in none of the category names (they would never apply)"""
+    lowered = [category.lower() for category in categories]
+    return [name for name in weights if not any(name.lower() in category for category in lowered)]
+
+def node_impact(node_info):
+    """Quality deficit (100 minus the analyze_nodes score) scaled up by the size of the node's subtree"""
+    node = node_info["node"]
+    deficit = 100 - quality_score(node.description_length, node.has_links, node_info["children_count"])
+    impact = deficit * (1 + math.log2(node_info.get("subtree_size", 1)))
+    # One answer also fixes every copy folded into this node
+    return impact + sum(node_impact(duplicate) for duplicate in node_info.get("duplicates", ()))
+
+def schedule_batches(batches, category_weights=None):
+    """Yield batches best-first.
     
-    # First add high-priority categories
-    for priority_cat in priority_categories:
-        for batch in batches:
-            if any(priority_cat.lower() in batch["category"].lower() for priority_cat in priority_categories):
-                prioritized.append(batch)
-                batch["priority"] = "high"
+    A batch scores its category weight times the summed impact of its nodes
+    (stored as batch["score"]). Scores are computed once and heapified in
+    O(n); each batch taken costs O(log n), so streaming the top K of n
+    batches is O(n + K log n). Ties keep the planning order.
+    """
+    weights = DEFAULT_CATEGORY_WEIGHTS if category_weights is None else category_weights
+    category_weights_seen = {}
+    heap = []
+    for order, batch in enumerate(batches):
+        category = batch["category"]
+        weight = category_weights_seen.get(category)
+        if weight is None:
+            weight = category_weights_seen[category] = category_weight(category, weights)
+        batch["score"] = weight * sum(node_impact(node_info) for node_info in batch["nodes"])
+        batch["priority"] = "high" if weight > 1 else "medium"
+        heap.append((-batch["score"], order, batch))
+    heapq.heapify(heap)
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+def prioritize_nodes_by_impact(batches, category_weights=None, limit=None):
+    """Batches in the order to process them (only the best `limit` if given); see schedule_batches."""
+    return list(islice(schedule_batches(batches, category_weights), limit))
+
+def format_batch_for_api(batch):
+    """Turn a batch from batch_nodes_by_category into the batch-file format enhance_batch expects."""
+    formatted_batch = {
+        "batch_id": batch["batch_id"],
+        "category": batch["category"],
+        "nodes_to_enhance": []
+    }
     
-    # Then add remaining batches
-    for batch in batches:
-        if batch not in prioritized:
-            prioritized.append(batch)
-            batch["priority"] = "medium"
+    for node_info in batch["nodes"]:
+        node = node_info["node"]
+        entry = {
+            "name": node.name,
+            "current_description": node.description,
+            "current_links": node.links,
+            "path": node_info["path"]
+        }
+        if node_info.get("duplicates"):
+            entry["duplicate_paths"] = [duplicate["path"] for duplicate in node_info["duplicates"]]
+        formatted_batch["nodes_to_enhance"].append(entry)
     
-    return prioritized
+    return formatted_batch
 
-def generate_processing_plan(data_file):
-    """Generate an efficient processing plan for API calls."""
+def generate_processing_plan(data, budget=None, category_weights=None, dedupe=True):
+    """Generate an efficient processing plan for API calls.
     
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    `data` may be a TaxonomyStore, a merged taxonomy dict, a path to one or
+    a CandidateSidecar.
+    """
+    if not isinstance(data, CandidateSidecar):
+        data = coerce_store(data)
     
     # Create batches
-    batches = batch_nodes_by_category(data)
-    prioritized_batches = prioritize_nodes_by_impact(batches)
+    batches = batch_nodes_by_category(data, budget=budget, dedupe=dedupe)
+    prioritized_batches = prioritize_nodes_by_impact(batches, category_weights, limit=10)
+    # The same plan without deduplication, for comparison
+    undeduped = batch_nodes_by_category(data, budget=budget) if dedupe else batches
     
     # Calculate costs and efficiency
-    total_nodes_needing_work = sum(len(batch["nodes"]) for batch in batches)
+    total_nodes_needing_work = sum(len(batch["nodes"]) for batch in batches) + duplicate_count(batches)
     estimated_api_calls = len(batches)  # One call per batch vs one per node
+    fixed_size_calls = fixed_size_call_count(batches)
+    estimated_tokens = sum(batch["tokens"]["input"] + batch["tokens"]["output"] for batch in batches)
     
     plan = {
         "summary": {
             "total_nodes_needing_enhancement": total_nodes_needing_work,
             "estimated_api_calls": estimated_api_calls,
-            "efficiency_improvement": f"{total_nodes_needing_work/estimated_api_calls:.1f}x",
-            "total_batches": len(batches)
+            "efficiency_improvement": f"{total_nodes_needing_work/max(estimated_api_calls, 1):.1f}x",
+            "total_batches": len(batches),
+            "fixed_size_api_calls": fixed_size_calls,
+            "api_calls_saved": fixed_size_calls - estimated_api_calls,
+            "estimated_input_tokens": sum(batch["tokens"]["input"] for batch in batches),
+            "estimated_output_tokens": sum(batch["tokens"]["output"] for batch in batches),
+            "duplicate_nodes": duplicate_count(batches),
+            "dedupe_api_calls_saved": len(undeduped) - estimated_api_calls,
+            "dedupe_tokens_saved": sum(batch["tokens"]["input"] + batch["tokens"]["output"]
+                                       for batch in undeduped) - estimated_tokens
         },
-        "batches": prioritized_batches[:10],  # Show first 10 batches
+        "batches": prioritized_batches,  # Show first 10 batches
         "processing_strategies": [
             "Process high-priority categories first",
             "Batch related nodes together for context",
@@ -170,13 +391,16 @@ def generate_processing_plan(data_file):
     
     return plan
 
-def export_batch_for_processing(batch_id, data_file):
-    """Export a specific batch for API processing."""
+def export_batch_for_processing(batch_id, data, budget=None, dedupe=True):
+    """Export a specific batch for API processing (None if no batch has that id).
     
-    with open(data_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    Pass the budget and dedupe setting the plan was made with, or the batch
+    ids will not match. Deduplicated nodes keep their other copies under
+    "duplicate_paths", so applying the batch updates every copy.
+    """
     
-    batches = batch_nodes_by_category(data)
+    batches = batch_nodes_by_category(data if isinstance(data, CandidateSidecar) else coerce_store(data),
+                                      budget=budget, dedupe=dedupe)
     target_batch = None
     
     for batch in batches:
@@ -188,46 +412,98 @@ def export_batch_for_processing(batch_id, data_file):
         return None
     
     # Format for API processing
-    formatted_batch = {
-        "batch_id": batch_id,
-        "category": target_batch["category"],
-        "nodes_to_enhance": []
-    }
-    
-    for node_info in target_batch["nodes"]:
-        node = node_info["node"]
-        name = node.get("name", {}).get("en", "Unknown") if isinstance(node.get("name"), dict) else str(node.get("name", ""))
-        
-        formatted_batch["nodes_to_enhance"].append({
-            "name": name,
-            "current_description": node.get("description", ""),
-            "current_links": node.get("links", {}),
-            "path": node_info["path"]
-        })
+    return format_batch_for_api(target_batch)
+
+def add_planning_arguments(parser):
+    """Token budget and scheduler options shared by the plan and batch commands"""
+    parser.add_argument('--max-input-tokens', type=int, default=DEFAULT_MAX_INPUT_TOKENS,
+                       help=f'Estimated prompt tokens per request (default: {DEFAULT_MAX_INPUT_TOKENS})')
+    parser.add_argument('--max-output-tokens', type=int, default=DEFAULT_MAX_OUTPUT_TOKENS,
+                       help=f'Estimated answer tokens per request (default: {DEFAULT_MAX_OUTPUT_TOKENS})')
+
+    parser.add_argument('--category-weight', action='append', default=[], metavar='NAME=WEIGHT',
+                       help='Scheduler weight for categories whose name contains NAME (repeatable; '
+                            'replaces the defaults, which favour the core tool categories)')
+    parser.add_argument('--no-dedupe', action='store_true',
+                       help='Enhance every copy of a tool listed in several places separately')
+
+def budget_from_args(args):
+    """The TokenBudget for the options, with the answer estimate calibrated from recorded runs"""
+    return TokenBudget(args.max_input_tokens, args.max_output_tokens,
+                       output_tokens_per_node=calibrated_output_tokens_per_node())
+
+def category_weights_from_args(args, data_dir=Path("taxonomy-data")):
+    """The --category-weight options (None for the defaults), warning about names no category matches"""
+    weights = None
+    if args.category_weight:
+        weights = {}
+        for option in args.category_weight:
+            name, _, weight = option.rpartition('=')
+            try:
+                weights[name] = float(weight)
+            except ValueError:
+                print(f"Error: --category-weight expects NAME=WEIGHT, got {option!r}")
+                sys.exit(1)
     
-    return formatted_batch
+    index_path = Path(data_dir) / '_index.json'
+    if index_path.exists():
+        with open(index_path, 'r', encoding='utf-8') as f:
+            categories = [entry['name'] for entry in json.load(f)]
+        for name in unknown_weight_names(DEFAULT_CATEGORY_WEIGHTS if weights is None else weights, categories):
+            print(f"⚠️  Category weight {name!r} matches no category in {index_path}")
+    return weights
 
-if __name__ == "__main__":
-    data_file = Path("public/Creative_Tech_Taxonomy_data.json")
+def main(argv=None, workspace=None):
+    """Print the processing plan and export its first batch.
+    
+    Reuses a Workspace's store if given; otherwise plans from the candidate
+    list precomputed by build_taxonomy.py while it matches the sources.
+    """
+    import argparse
     
-    if not data_file.exists():
-        print("Error: Creative_Tech_Taxonomy_data.json not found")
+    parser = argparse.ArgumentParser(description='Plan enhancement batches and export the first one')
+    add_planning_arguments(parser)
+    parser.add_argument('--from-sources', action='store_true',
+                       help='Ignore the candidates precomputed by build_taxonomy.py and read the category files')
+    args = parser.parse_args(argv)
+    
+    data_dir = Path("taxonomy-data")
+    
+    if not data_dir.exists():
+        print("Error: taxonomy-data/ not found")
         exit(1)
     
+    start_run("plan")
     print("Generating efficient enhancement plan...")
-    plan = generate_processing_plan(data_file)
+    store = workspace.store if workspace is not None else None
+    if store is None and not args.from_sources:
+        with metrics.timer("load_sidecar"):
+            store = CandidateSidecar.load(data_dir)
+    if store is None:
+        store = TaxonomyStore.load(data_dir)
+    with metrics.timer("plan"):
+        plan = generate_processing_plan(store, budget_from_args(args), category_weights_from_args(args),
+                                        dedupe=not args.no_dedupe)
     
     print(f"\n=== EFFICIENCY ANALYSIS ===")
     print(f"Nodes needing enhancement: {plan['summary']['total_nodes_needing_enhancement']}")
     print(f"Estimated API calls needed: {plan['summary']['estimated_api_calls']}")
     print(f"Efficiency improvement: {plan['summary']['efficiency_improvement']} (vs individual calls)")
+    print(f"Fixed batches of {FIXED_BATCH_SIZE} would need {plan['summary']['fixed_size_api_calls']} calls: "
+          f"token packing saves {plan['summary']['api_calls_saved']}")
+    print(f"Estimated tokens: {plan['summary']['estimated_input_tokens']:,} in, "
+          f"{plan['summary']['estimated_output_tokens']:,} out")
+    print(f"Deduplication: {plan['summary']['duplicate_nodes']} repeated tools ride along with another copy, "
+          f"saving {plan['summary']['dedupe_api_calls_saved']} calls and "
+          f"~{plan['summary']['dedupe_tokens_saved']:,} tokens")
     
     print(f"\n=== PROCESSING BATCHES (showing first 10) ===")
     for i, batch in enumerate(plan['batches'], 1):
         node_count = len(batch['nodes'])
-        print(f"{i:2d}. {batch['batch_id']} ({batch['priority']} priority) - {node_count} nodes")
+        print(f"{i:2d}. {batch['batch_id']} ({batch['priority']} priority, score {batch['score']:.0f}) - {node_count} nodes, "
+              f"~{batch['tokens']['input']} in / {batch['tokens']['output']} out tokens")
         print(f"    Category: {batch['category']}")
-        sample_names = [node['node'].get('name', {}).get('en', 'Unknown') for node in batch['nodes'][:3]]
+        sample_names = [node['node'].name for node in batch['nodes'][:3]]
         print(f"    Sample tools: {', '.join(sample_names)}")
         print()
     
@@ -237,11 +513,17 @@ if __name__ == "__main__":
     
     # Export first batch as example
     if plan['batches']:
-        first_batch_id = plan['batches'][0]['batch_id']
-        sample_batch = export_batch_for_processing(first_batch_id, data_file)
+        # The planned batch itself, so the budget and deduplication match what was printed
+        sample_batch = format_batch_for_api(plan['batches'][0])
         
         with open('sample_batch_for_api.json', 'w', encoding='utf-8') as f:
             json.dump(sample_batch, f, indent=2, ensure_ascii=False)
         
         print(f"\nSample batch exported to: sample_batch_for_api.json")
-        print("Use this format for API processing!")
\ No newline at end of file
+        print("Use this format for API processing!")
+    else:
+        print("\nNo batch to export: nothing needs enhancement")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
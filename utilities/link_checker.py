@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Concurrent link validator for the taxonomy's `links`.
+
+Every distinct URL is checked once, however many nodes share it. Requests
+run on worker threads driven by asyncio, with a global limit on requests
+in flight and a smaller one per host; each host keeps a pool of idle
+keep-alive connections (http.client, no extra dependencies) that later
+requests to it reuse. A HEAD request is tried first and GET only when the
+server rejects or fails it; redirects are followed up to MAX_REDIRECTS.
+
+Results are cached in .taxonomy-cache/links.sqlite keyed by URL. Within
+max_age_days a result is reused without a request; after that the check
+is a conditional request with the stored ETag / Last-Modified, and a 304
+keeps the previous result. Network errors, 5xx and 429 are not cached.
+
+Links on reserved example domains (example.com, *.example.org, .test, ...)
+are reported as placeholders and never fetched.
+"""
+
+import asyncio
+import http.client
+import json
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+sys.path.append(str(Path(__file__).parent))
+
+from metrics import metrics, start_run
+from taxonomy_store import TaxonomyStore
+
+CACHE_PATH = '.taxonomy-cache/links.sqlite'
+DEFAULT_MAX_AGE_DAYS = 7
+DEFAULT_CONCURRENCY = 16
+DEFAULT_PER_HOST = 2
+DEFAULT_TIMEOUT = 10.0
+MAX_REDIRECTS = 5
+# Bytes of a GET body read to keep its connection reusable; larger bodies close the connection
+MAX_DRAIN_BYTES = 256 * 1024
+USER_AGENT = "CreativeTechTaxonomy-LinkChecker/1.0"
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# RFC 2606 / 6761 names that never point at real content
+PLACEHOLDER_DOMAINS = ("example.com", "example.org", "example.net")
+PLACEHOLDER_TLDS = ("example", "test", "invalid")
+
+def placeholder_reason(url):
+    """Why a URL cannot be a real link, or None"""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return "not an http(s) URL"
+    host = parts.hostname.lower().rstrip(".")
+    if host in PLACEHOLDER_DOMAINS or host.endswith(tuple("." + domain for domain in PLACEHOLDER_DOMAINS)):
+        return "example domain"
+    if host.rsplit(".", 1)[-1] in PLACEHOLDER_TLDS:
+        return "reserved domain"
+    return None
+
+def collect_links(store):
+    """(node path, label, url) of every non-empty link, in preorder"""
+    links = []
+    for index, path in store.walk():
+        node_links = store.nodes[index].links
+        if not isinstance(node_links, dict):
+            continue
+        for label, url in node_links.items():
+            if isinstance(url, str) and url.strip():
+                links.append((path, label, url.strip()))
+    return links
+
+class LinkCache:
+    """SQLite-backed results by URL; only touched from the event loop's thread.
+
+    endpoint keeps results from a --connect-to stand-in apart from real ones.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_age_days=DEFAULT_MAX_AGE_DAYS, endpoint=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age_days * 86400
+        self.prefix = f"{endpoint} " if endpoint else ""
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS links (
+                url TEXT PRIMARY KEY,
+                state TEXT NOT NULL,
+                status INTEGER,
+                final_url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                checked REAL NOT NULL
+            )""")
+        self.db.commit()
+
+    def get(self, url):
+        row = self.db.execute(
+            "SELECT state, status, final_url, etag, last_modified, checked FROM links WHERE url = ?",
+            (self.prefix + url,)).fetchone()
+        if row is None:
+            return None
+        state, status, final_url, etag, last_modified, checked = row
+        return {"url": url, "state": state, "status": status, "error": None, "final_url": final_url,
+                "etag": etag, "last_modified": last_modified, "checked": checked}
+
+    def is_fresh(self, entry):
+        return time.time() - entry["checked"] < self.max_age
+
+    def put_many(self, results):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO links (url, state, status, final_url, etag, last_modified, checked) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(self.prefix + r["url"], r["state"], r["status"], r["final_url"], r["etag"], r["last_modified"],
+              r["checked"]) for r in results])
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+class HostPool:
+    """The request limit and idle keep-alive connections of one scheme://host:port"""
+
+    def __init__(self, scheme, host, port, limit, timeout, connect_to=None):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connect_to = connect_to
+        self.semaphore = asyncio.Semaphore(limit)
+        self.idle = []
+
+    def acquire(self):
+        if self.idle:
+            metrics.count("link_connections_reused")
+            return self.idle.pop()
+        metrics.count("link_connections_opened")
+        if self.connect_to:
+            # Everything goes to the stand-in over plain HTTP; the Host header keeps the real name
+            return http.client.HTTPConnection(*self.connect_to, timeout=self.timeout)
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def release(self, connection, reusable):
+        if reusable:
+            self.idle.append(connection)
+        else:
+            connection.close()
+
+    def close(self):
+        for connection in self.idle:
+            connection.close()
+        self.idle.clear()
+
+def send(connection, method, target, headers):
+    """One request on a pooled connection; returns (status, headers, connection reusable).
+
+    A kept-alive connection the server has since closed is reopened once.
+    """
+    for attempt in (0, 1):
+        try:
+            connection.request(method, target, headers=headers)
+            response = connection.getresponse()
+            break
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            connection.close()
+            if attempt:
+                raise
+    response.read(MAX_DRAIN_BYTES)
+    reusable = response.isclosed() and not response.will_close
+    return response.status, {name.lower(): value for name, value in response.getheaders()}, reusable
+
+class LinkChecker:
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST, timeout=DEFAULT_TIMEOUT,
+                 cache=None, connect_to=None):
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.cache = cache
+        self.connect_to = connect_to
+        self.pools = {}
+        # Set up per run by check_all_async
+        self.loop = self.slots = self.executor = None
+
+    def pool(self, parts):
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        if key not in self.pools:
+            self.pools[key] = HostPool(parts.scheme, parts.hostname, port, self.per_host, self.timeout,
+                                       self.connect_to)
+        return self.pools[key]
+
+    async def request(self, url, method, headers):
+        parts = urlsplit(url)
+        pool = self.pool(parts)
+        target = urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        headers = {"User-Agent": USER_AGENT, "Host": parts.netloc, **headers}
+        # The host's limit first, so requests queued behind one busy host hold no global slot
+        async with pool.semaphore, self.slots:
+            connection = pool.acquire()
+            try:
+                status, response_headers, reusable = await self.loop.run_in_executor(
+                    self.executor, send, connection, method, target, headers)
+            except BaseException:
+                connection.close()
+                raise
+            pool.release(connection, reusable)
+        metrics.count("link_requests")
+        return status, response_headers
+
+    async def check(self, url):
+        """Result dict for one URL: state is "ok", "broken" or "error" """
+        cached = self.cache.get(url) if self.cache else None
+        if cached and self.cache.is_fresh(cached):
+            return {**cached, "source": "cache"}
+
+        result = {"url": url, "state": "error", "status": None, "error": None, "final_url": url,
+                  "etag": None, "last_modified": None, "checked": time.time(), "source": "network"}
+        current = url
+        try:
+            for _ in range(MAX_REDIRECTS + 1):
+                validators = {}
+                if cached and cached["state"] == "ok" and current == cached["final_url"]:
+                    if cached["etag"]:
+                        validators["If-None-Match"] = cached["etag"]
+                    if cached["last_modified"]:
+                        validators["If-Modified-Since"] = cached["last_modified"]
+
+                status, headers = await self.request(current, "HEAD", validators)
+                if status >= 400:
+                    # Plenty of servers refuse or mishandle HEAD; GET has the final word
+                    status, headers = await self.request(current, "GET", validators)
+
+                if status == 304 and validators:
+                    return {**cached, "checked": result["checked"], "source": "revalidated"}
+                if status in REDIRECT_STATUSES and headers.get("location"):
+                    current = urljoin(current, headers["location"])
+                    continue
+
+                result.update(status=status, final_url=current,
+                              etag=headers.get("etag"), last_modified=headers.get("last-modified"))
+                if 200 <= status < 300:
+                    result["state"] = "ok"
+                elif status == 429 or status >= 500:
+                    # Possibly transient: reported, but checked again next time
+                    result["error"] = f"HTTP {status}"
+                else:
+                    result["state"] = "broken"
+                return result
+            result.update(state="broken", final_url=current, error=f"more than {MAX_REDIRECTS} redirects")
+        except (OSError, http.client.HTTPException, UnicodeError, ValueError) as e:
+            result["error"] = str(e) or type(e).__name__
+        return result
+
+    async def check_all_async(self, urls):
+        """{url: result} for every URL, checked concurrently"""
+        self.loop = asyncio.get_running_loop()
+        self.slots = asyncio.Semaphore(self.concurrency)
+        # Own pool so the default executor's size does not cap the concurrency
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        self.pools = {}
+        try:
+            results = await asyncio.gather(*(self.check(url) for url in urls))
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            for pool in self.pools.values():
+                pool.close()
+
+        if self.cache:
+            self.cache.put_many(
+                [result for result in results if result["state"] != "error" and result["source"] != "cache"])
+        return {result["url"]: result for result in results}
+
+    def check_all(self, urls):
+        return asyncio.run(self.check_all_async(urls))
+
+def check_links(store, checker):
+    """Check every link of a store; returns the report dict"""
+    links = collect_links(store)
+    placeholders = []
+    to_check = []
+    for path, label, url in links:
+        reason = placeholder_reason(url)
+        if reason:
+            placeholders.append({"path": path, "label": label, "url": url, "reason": reason})
+        else:
+            to_check.append((path, label, url))
+
+    urls = list(dict.fromkeys(url for _, _, url in to_check))
+    start = time.perf_counter()
+    results = checker.check_all(urls)
+    elapsed = time.perf_counter() - start
+
+    broken, errors = [], []
+    for path, label, url in to_check:
+        result = results[url]
+        if result["state"] == "ok":
+            continue
+        entry = {"path": path, "label": label, "url": url, "status": result["status"],
+                 "reason": result["error"] or f"HTTP {result['status']}"}
+        (broken if result["state"] == "broken" else errors).append(entry)
+
+    sources = [result["source"] for result in results.values()]
+    metrics.count("links_checked", len(urls))
+    return {
+        "summary": {
+            "links": len(links),
+            "urls": len(urls),
+            "ok": sum(result["state"] == "ok" for result in results.values()),
+            "broken": sum(result["state"] == "broken" for result in results.values()),
+            "errors": sum(result["state"] == "error" for result in results.values()),
+            "placeholders": len(placeholders),
+            "cached": sources.count("cache"),
+            "revalidated": sources.count("revalidated"),
+            "seconds": round(elapsed, 3),
+        },
+        "broken": broken,
+        "errors": errors,
+        "placeholders": placeholders,
+    }
+
+def print_report(report):
+    summary = report["summary"]
+    print(f"🔗 {summary['links']} links, {summary['urls']} distinct URLs checked in {summary['seconds']:.1f}s "
+          f"({summary['cached']} from cache, {summary['revalidated']} revalidated)")
+    print(f"   ✅ {summary['ok']} ok  ❌ {summary['broken']} broken  ⚠️  {summary['errors']} errors  "
+          f"🧩 {summary['placeholders']} placeholders")
+    for title, entries in (("Broken links", report["broken"]), ("Errors (checked again next run)", report["errors"]),
+                           ("Placeholder links", report["placeholders"])):
+        if not entries:
+            continue
+        print(f"\n{title}:")
+        previous = None
+        for entry in entries:
+            if entry["path"] != previous:
+                print(f"  {entry['path']}")
+                previous = entry["path"]
+            print(f"      {entry['label']}: {entry['url']} ({entry['reason']})")
+
+def parse_connect_to(value):
+    host, _, port = value.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"--connect-to expects HOST:PORT, got {value!r}")
+    return host, int(port)
+
+def main(argv=None, workspace=None):
+    """Check every link (a Workspace supplies an already loaded store)"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Check every link in the taxonomy')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Requests in flight overall (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST,
+                        help=f'Requests in flight per host (default: {DEFAULT_PER_HOST})')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT,
+                        help=f'Seconds before a request fails (default: {DEFAULT_TIMEOUT:g})')
+    parser.add_argument('--max-age-days', type=float, default=DEFAULT_MAX_AGE_DAYS,
+                        help=f'Reuse cached results younger than this without a request (default: {DEFAULT_MAX_AGE_DAYS})')
+    parser.add_argument('--no-cache', action='store_true', help='Check every URL without reading or writing the cache')
+    parser.add_argument('--connect-to', metavar='HOST:PORT',
+                        help='Send every request to this address over plain HTTP (e.g. a local stand-in server)')
+    parser.add_argument('--output', help='Also write the report as JSON to this file')
+    parser.add_argument('--data-dir', default='taxonomy-data', help='Taxonomy source directory')
+    args = parser.parse_args(argv)
+
+    start_run("links")
+    connect_to = None
+    if args.connect_to:
+        try:
+            connect_to = parse_connect_to(args.connect_to)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    store = workspace.store if workspace is not None else TaxonomyStore.load(args.data_dir)
+    cache = None if args.no_cache else LinkCache(CACHE_PATH, args.max_age_days, args.connect_to)
+    checker = LinkChecker(args.concurrency, args.per_host, args.timeout, cache, connect_to)
+    try:
+        with metrics.timer("links"):
+            report = check_links(store, checker)
+    finally:
+        if cache:
+            cache.close()
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n📄 Report written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Run-wide timers and counters.
+
+Every utility records into the shared `metrics` instance:
+
+    with metrics.timer("load_store"):      # inclusive wall time + call count per stage
+        ...
+    metrics.count("nodes_visited", n)      # plain counters (bytes, calls, tokens, ...)
+    metrics.observe("api_latency", secs)   # samples reported as percentiles
+
+Commands call start_run(name); when the run is finished (the next
+start_run, finish_run(), or process exit) it is written to .taxonomy-cache/metrics/<name>-<timestamp>.json (the newest
+KEEP_RUNS are kept). Setting TAXONOMY_PROFILE=<stage> also runs that stage
+under cProfile and writes the .prof file and a text summary next to it.
+Recording is thread-safe and cheap enough to leave on.
+"""
+
+import atexit
+import cProfile
+import io
+import json
+import math
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+METRICS_DIR = '.taxonomy-cache/metrics'
+KEEP_RUNS = 50
+PROFILE_ENV = 'TAXONOMY_PROFILE'
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.command = None
+        self.started = time.time()
+        self.stages = {}
+        self.counters = {}
+        self.samples = {}
+        self.profile_stage = os.getenv(PROFILE_ENV) or None
+        self.profiler = None
+        self._profile_depth = 0
+
+    # -------------------------------------------------------------- recording
+
+    @contextmanager
+    def timer(self, stage):
+        # cProfile only sees the thread that enabled it, so worker-thread stages are timed but not profiled
+        profiling = stage == self.profile_stage and threading.current_thread() is threading.main_thread()
+        if profiling:
+            self._start_profile()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiling:
+                self._stop_profile()
+            with self.lock:
+                entry = self.stages.setdefault(stage, {"seconds": 0.0, "calls": 0})
+                entry["seconds"] += elapsed
+                entry["calls"] += 1
+
+    def count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name, value):
+        with self.lock:
+            self.samples.setdefault(name, []).append(value)
+
+    def record_usage(self, usage):
+        """Token counts from a Messages API response's `usage`"""
+        if usage is None:
+            return
+        for field in ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"):
+            value = getattr(usage, field, None)
+            if value:
+                self.count(field, value)
+
+    def _start_profile(self):
+        # Nested timers for the profiled stage share one profiler session
+        self._profile_depth += 1
+        if self._profile_depth == 1:
+            if self.profiler is None:
+                self.profiler = cProfile.Profile()
+            self.profiler.enable()
+
+    def _stop_profile(self):
+        self._profile_depth -= 1
+        if self._profile_depth == 0:
+            self.profiler.disable()
+
+    # ---------------------------------------------------------------- output
+
+    def snapshot(self):
+        with self.lock:
+            latency = {}
+            for name, values in self.samples.items():
+                ordered = sorted(values)
+                latency[name] = {
+                    "count": len(ordered),
+                    "mean": sum(ordered) / len(ordered),
+                    "p50": percentile(ordered, 0.50),
+                    "p90": percentile(ordered, 0.90),
+                    "p99": percentile(ordered, 0.99),
+                    "max": ordered[-1],
+                }
+            return {
+                "command": self.command,
+                "started": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+                "elapsed": time.time() - self.started,
+                "stages": {name: dict(entry) for name, entry in self.stages.items()},
+                "counters": dict(self.counters),
+                "latency": latency,
+                "profiled_stage": self.profile_stage if self.profiler else None,
+            }
+
+    def write(self, path=None):
+        """Write the run's metrics JSON (plus profile output, if any); returns the path"""
+        data = self.snapshot()
+        if path is None:
+            stamp = datetime.fromtimestamp(self.started).strftime("%Y%m%d-%H%M%S")
+            path = Path(METRICS_DIR) / f"{self.command or 'run'}-{stamp}.json"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        if self.profiler is not None:
+            profile_path = path.with_suffix(".prof")
+            self.profiler.dump_stats(profile_path)
+            summary = io.StringIO()
+            pstats.Stats(self.profiler, stream=summary).sort_stats("cumulative").print_stats(30)
+            path.with_suffix(".profile.txt").write_text(summary.getvalue(), encoding="utf-8")
+            data["profile"] = str(profile_path)
+
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        prune_runs(path.parent)
+        return path
+
+    def summary(self):
+        """Short human-readable report of the busiest stages and key counters"""
+        data = self.snapshot()
+        lines = [f"⏱️  {data['command'] or 'run'}: {data['elapsed']:.2f}s"]
+        for name, entry in sorted(data["stages"].items(), key=lambda item: -item[1]["seconds"])[:8]:
+            lines.append(f"    {name:<20} {entry['seconds']:>8.3f}s  ({entry['calls']} calls)")
+        for name, stats in data["latency"].items():
+            lines.append(f"    {name:<20} p50 {stats['p50']:.3f}s  p90 {stats['p90']:.3f}s  max {stats['max']:.3f}s")
+        counters = ", ".join(f"{name}={value:,}" for name, value in sorted(data["counters"].items()))
+        if counters:
+            lines.append(f"    {counters}")
+        return "\n".join(lines)
+
+def prune_runs(metrics_dir, keep=KEEP_RUNS):
+    runs = sorted(Path(metrics_dir).glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for old in runs[:-keep] if len(runs) > keep else []:
+        for sibling in (old, old.with_suffix(".prof"), old.with_suffix(".profile.txt")):
+            sibling.unlink(missing_ok=True)
+
+metrics = Metrics()
+_active_run = None
+_exit_hook = False
+
+def start_run(command, path=None, quiet=False):
+    """Begin a named run, finishing the previous one; written on finish_run() or at exit"""
+    global _active_run, _exit_hook
+    finish_run()
+    if not _exit_hook:
+        atexit.register(finish_run)
+        _exit_hook = True
+    metrics.reset()
+    metrics.command = command
+    _active_run = {"path": path, "quiet": quiet}
+    return metrics
+
+def finish_run():
+    """Write the active run (if any) and print its summary; returns the metrics path"""
+    global _active_run
+    if _active_run is None:
+        return None
+    run, _active_run = _active_run, None
+    written = metrics.write(run["path"])
+    if not run["quiet"]:
+        print(f"\n{metrics.summary()}\n📈 Metrics: {written}")
+    return written
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Show recorded run metrics')
+    parser.add_argument('run', nargs='?', help='Metrics JSON to show (default: the most recent run)')
+
+    args = parser.parse_args(argv)
+
+    runs = sorted(Path(METRICS_DIR).glob("*.json"), key=lambda p: p.stat().st_mtime)
+    target = Path(args.run) if args.run else (runs[-1] if runs else None)
+    if target is None:
+        print(f"No runs recorded in {METRICS_DIR}")
+    else:
+        print(target.read_text(encoding="utf-8"))
+
+if __name__ == "__main__":
+    main()
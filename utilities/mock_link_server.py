@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Local stand-in web server for exercising the link checker offline.
+
+Any Host header is accepted, so `enhance.py links --connect-to` can send
+every link in the taxonomy here. Responses depend on the path:
+
+    /status/<code>...    answers with that status
+    /redirect/<rest>     301 to /<rest>
+    /no-head/...         405 to HEAD, 200 to GET
+    anything else        200
+
+Every 200 carries an ETag and Last-Modified and honours If-None-Match and
+If-Modified-Since with a 304. The server counts requests by method,
+conditional hits, TCP connections and the peak number of requests in
+flight per host, so pooling and per-host limits can be observed.
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LAST_MODIFIED = "Mon, 01 Jan 2024 00:00:00 GMT"
+
+class LinkServerState:
+    """Counters shared by all handler threads"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.methods = Counter()
+        self.not_modified = 0
+        self.connections = 0
+        self.active = Counter()
+        self.peak_per_host = Counter()
+
+    @property
+    def requests(self):
+        return sum(self.methods.values())
+
+    def enter(self, method, host):
+        with self.lock:
+            self.methods[method] += 1
+            self.active[host] += 1
+            self.peak_per_host[host] = max(self.peak_per_host[host], self.active[host])
+
+    def leave(self, host):
+        with self.lock:
+            self.active[host] -= 1
+
+def route(method, path):
+    """(status, extra headers) for a request"""
+    if path.startswith("/status/"):
+        code = path[len("/status/"):].split("/", 1)[0]
+        return (int(code), {}) if code.isdigit() else (400, {})
+    if path.startswith("/redirect/"):
+        return 301, {"Location": "/" + path[len("/redirect/"):]}
+    if path.startswith("/no-head/") and method == "HEAD":
+        return 405, {"Allow": "GET"}
+    return 200, {}
+
+def make_handler(state):
+    class LinkHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def setup(self):
+            super().setup()
+            with state.lock:
+                state.connections += 1
+
+        def respond(self, method):
+            host = self.headers.get("Host", "")
+            state.enter(method, host)
+            try:
+                time.sleep(state.latency)
+                status, headers = route(method, self.path.split("?", 1)[0])
+                body = b""
+                if status == 200:
+                    etag = '"' + hashlib.sha256(f"{host}{self.path}".encode("utf-8")).hexdigest()[:16] + '"'
+                    headers = {"ETag": etag, "Last-Modified": LAST_MODIFIED}
+                    if (self.headers.get("If-None-Match") == etag
+                            or self.headers.get("If-Modified-Since") == LAST_MODIFIED):
+                        status = 304
+                        with state.lock:
+                            state.not_modified += 1
+                    else:
+                        body = f"<html><body>{self.path}</body></html>".encode("utf-8")
+            finally:
+                state.leave(host)
+
+            try:
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if method == "GET" and status != 304:
+                    self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+        def do_HEAD(self):
+            self.respond("HEAD")
+
+        def do_GET(self):
+            self.respond("GET")
+
+    return LinkHandler
+
+def start_link_server(port=0, latency=0.0):
+    """Start the stand-in on a background thread.
+
+    Returns (server, base_url, state); call server.shutdown() when done.
+    """
+    state = LinkServerState(latency)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", state
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a local stand-in web server for the link checker')
+    parser.add_argument('--port', type=int, default=8788, help='Port to listen on (default: 8788)')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds to wait before answering (default: 0.05)')
+
+    args = parser.parse_args()
+
+    server, base_url, state = start_link_server(args.port, args.latency)
+    print(f"Stand-in web server listening on {base_url}")
+    print(f"Check every taxonomy link against it with: python enhance.py links --connect-to 127.0.0.1:{args.port}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\nServed {state.requests} requests over {state.connections} connections "
+              f"({state.not_modified} not modified, peak {max(state.peak_per_host.values(), default=0)} per host)")
+        server.shutdown()
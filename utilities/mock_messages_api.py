@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Messages API so enhancement runs can be exercised offline.
+
+Answers POST /v1/messages with a well-formed message whose text is an
+"enhancements" JSON for every tool listed in the prompt. Latency is
+configurable, and the server counts requests and peak concurrency and
+keeps each request's arrival time so throughput and rate limiting can be
+measured.
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TOOL_LINE = re.compile(r"^- (.+?): ", re.MULTILINE)
+
+def mock_enhancements(prompt):
+    """Deterministic enhancements for the tools listed in an enhance_batch prompt"""
+    tools = TOOL_LINE.findall(prompt.split("Tools to enhance:", 1)[-1].split("For each tool", 1)[0])
+    return {
+        "enhancements": [
+            {
+                "name": name,
+                "description": f"{name} is a creative technology tool used in interactive and media art projects.",
+                "links": {"Official": f"https://example.org/{re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')}"},
+            }
+            for name in tools
+        ]
+    }
+
+class MockState:
+    """Counters shared by all handler threads"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.active = 0
+        self.peak_concurrency = 0
+        # time.monotonic() at the arrival of every request, in order
+        self.arrivals = []
+
+    def enter(self):
+        with self.lock:
+            self.requests += 1
+            self.arrivals.append(time.monotonic())
+            self.active += 1
+            self.peak_concurrency = max(self.peak_concurrency, self.active)
+
+    def leave(self):
+        with self.lock:
+            self.active -= 1
+
+def make_handler(state):
+    class MessagesHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            if not self.path.startswith("/v1/messages"):
+                self.send_error(404)
+                return
+
+            state.enter()
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                prompt = "".join(
+                    block if isinstance(block, str) else block.get("text", "")
+                    for message in request.get("messages", [])
+                    for block in ([message["content"]] if isinstance(message["content"], str) else message["content"])
+                )
+                time.sleep(state.latency)
+
+                text = json.dumps(mock_enhancements(prompt))
+                body = json.dumps({
+                    "id": f"msg_mock_{state.requests}",
+                    "type": "message",
+                    "role": "assistant",
+                    "model": request.get("model", "mock"),
+                    "content": [{"type": "text", "text": text}],
+                    "stop_reason": "end_turn",
+                    "stop_sequence": None,
+                    "usage": {
+                        "input_tokens": (len(prompt) + len(str(request.get("system", "")))) // 4,
+                        "output_tokens": len(text) // 4,
+                    },
+                }).encode("utf-8")
+            finally:
+                state.leave()
+
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # Client went away (e.g. a run was killed mid-call)
+                pass
+
+    return MessagesHandler
+
+def start_mock_server(port=0, latency=0.5):
+    """Start the stand-in on a background thread.
+
+    Returns (server, base_url, state); call server.shutdown() when done.
+    """
+    state = MockState(latency)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}", state
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a local stand-in for the Messages API')
+    parser.add_argument('--port', type=int, default=8787, help='Port to listen on (default: 8787)')
+    parser.add_argument('--latency', type=float, default=0.5, help='Seconds to wait before answering (default: 0.5)')
+
+    args = parser.parse_args()
+
+    server, base_url, state = start_mock_server(args.port, args.latency)
+    print(f"Mock Messages API listening on {base_url}")
+    print(f"Use it with: ANTHROPIC_BASE_URL={base_url} ANTHROPIC_API_KEY=mock python enhance.py batch 5")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\nServed {state.requests} requests (peak concurrency {state.peak_concurrency})")
+        server.shutdown()
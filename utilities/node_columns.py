@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Columnar node analysis.
+
+Extracts the three facts the quality score depends on (description length,
+link presence, child count) into NumPy arrays in a single traversal, then
+scores, thresholds and aggregates every node with vectorized operations.
+Scores match analyze_nodes.quality_score exactly. NumPy is optional for
+the rest of the tools; only this module needs it.
+"""
+
+import json
+import sys
+from array import array
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.append(str(Path(__file__).parent))
+
+from patch_log import load_document
+from path_index import node_name
+from sidecars import flatten_columns
+
+# quality_score's description bands: lengths [0], [1, 20), [20, 50), [50, 100), [100, ...)
+DESCRIPTION_BANDS = [1, 20, 50, 100]
+DESCRIPTION_POINTS = [0, 10, 25, 40, 60]
+LOW_THRESHOLD = 30
+HIGH_THRESHOLD = 60
+
+def require_numpy():
+    if np is None:
+        print("Error: columnar analysis needs NumPy (pip install numpy)")
+        sys.exit(1)
+
+class NodeColumns:
+    """Per-node arrays in preorder: row i of every column describes the same node.
+
+    names/parents are kept so paths can be rebuilt for the few rows that
+    get displayed; category is -1 for the root.
+    """
+
+    def __init__(self, names, parents, categories, category_names, description_lengths, has_links, children_counts):
+        require_numpy()
+        self.names = names
+        self.parents = np.asarray(parents, dtype=np.int32)
+        self.categories = np.asarray(categories, dtype=np.int32)
+        self.category_names = category_names
+        self.description_lengths = np.asarray(description_lengths, dtype=np.int32)
+        self.has_links = np.asarray(has_links, dtype=bool)
+        self.children_counts = np.asarray(children_counts, dtype=np.int32)
+        self._scores = None
+
+    @classmethod
+    def from_store(cls, store):
+        """Columns for a loaded TaxonomyStore (its node table is already in preorder)"""
+        nodes = store.nodes
+        return cls(
+            [node.name for node in nodes],
+            array('i', (node.parent for node in nodes)),
+            array('i', (node.category for node in nodes)),
+            [nodes[top].name for top in store.category_roots],
+            array('i', (node.description_length for node in nodes)),
+            array('b', (node.has_links for node in nodes)),
+            array('i', (len(node.children) for node in nodes)),
+        )
+
+    @classmethod
+    def from_sources(cls, data_dir='taxonomy-data'):
+        """Columns straight from the category files, without building node objects"""
+        data_dir = Path(data_dir)
+        metadata = load_document(data_dir / '_metadata.json')
+        with open(data_dir / '_index.json', 'r', encoding='utf-8') as f:
+            category_index = sorted(json.load(f), key=lambda x: x['order'])
+
+        names, parents, categories = [], array('i'), array('i')
+        description_lengths, has_links, children_counts = array('i'), array('b'), array('i')
+        category_names = []
+
+        def add_tree(root, parent, category):
+            # Hot loop for large taxonomies: everything it touches is a local
+            add_name, add_parent, add_category = names.append, parents.append, categories.append
+            add_length, add_links, add_children = description_lengths.append, has_links.append, children_counts.append
+            stack = [(root, parent)]
+            pop, push = stack.pop, stack.append
+            while stack:
+                node, parent = pop()
+                index = len(names)
+                name = node.get("name", {})
+                add_name(name.get("en", "Unknown") if isinstance(name, dict) else str(name))
+                add_parent(parent)
+                add_category(category)
+                description = node.get("description", "")
+                add_length(len(description.strip()) if description else 0)
+                links = node.get("links", {})
+                add_links(bool(links and any(v.strip() for v in links.values() if v)))
+                children = node.get("children", [])
+                add_children(len(children))
+                for i in range(len(children) - 1, -1, -1):
+                    push((children[i], index))
+
+        add_tree({key: value for key, value in metadata.items() if key != "children"}, -1, -1)
+        for category_info in category_index:
+            filepath = data_dir / category_info['filename']
+            if not filepath.exists():
+                print(f"❌ Missing: {filepath}")
+                continue
+            category_data = load_document(filepath)
+
+            category_names.append(node_name(category_data))
+            children_counts[0] += 1
+            add_tree(category_data, 0, len(category_names) - 1)
+
+        return cls(names, parents, categories, category_names, description_lengths, has_links, children_counts)
+
+    @classmethod
+    def from_analysis(cls, analysis):
+        """Columns, scores included, from the analysis sidecar written by build_taxonomy.py"""
+        data = flatten_columns(analysis)
+        columns = cls(data["names"], data["parents"], data["categories"], data["category_names"],
+                      data["description_lengths"], data["has_links"], data["children_counts"])
+        columns._scores = np.asarray(data["scores"], dtype=np.int16)
+        return columns
+
+    def __len__(self):
+        return len(self.names)
+
+    # --------------------------------------------------------------- scoring
+
+    @property
+    def scores(self):
+        """quality_score for every row"""
+        if self._scores is None:
+            points = np.asarray(DESCRIPTION_POINTS, dtype=np.int16)
+            scores = points[np.digitize(self.description_lengths, DESCRIPTION_BANDS)]
+            scores += 20 * self.has_links
+            scores += 10 * (self.children_counts > 0)
+            scores += 10 * (self.children_counts > 3)
+            self._scores = scores
+        return self._scores
+
+    def quality_counts(self):
+        """(low, medium, high) counts using the report's thresholds"""
+        scores = self.scores
+        low = int(np.count_nonzero(scores < LOW_THRESHOLD))
+        high = int(np.count_nonzero(scores >= HIGH_THRESHOLD))
+        return low, len(scores) - low - high, high
+
+    def ranked(self, low=None, high=None):
+        """Row indices with low <= score < high, lowest score first (preorder among ties)"""
+        scores = self.scores
+        mask = np.ones(len(scores), dtype=bool)
+        if low is not None:
+            mask &= scores >= low
+        if high is not None:
+            mask &= scores < high
+        rows = np.flatnonzero(mask)
+        return rows[np.argsort(scores[rows], kind='stable')]
+
+    def histogram(self):
+        """Node count per score value (scores are multiples of 5)"""
+        counts = np.bincount(self.scores, minlength=101)
+        return {int(score): int(counts[score]) for score in np.flatnonzero(counts)}
+
+    def category_summary(self):
+        """Per top-level category: nodes, mean score, low-quality nodes, missing descriptions and links"""
+        slots = self.categories + 1  # slot 0 is the root
+        size = len(self.category_names) + 1
+        counts = np.bincount(slots, minlength=size)
+        score_sums = np.bincount(slots, weights=self.scores, minlength=size)
+        low = np.bincount(slots, weights=self.scores < LOW_THRESHOLD, minlength=size)
+        no_description = np.bincount(slots, weights=self.description_lengths == 0, minlength=size)
+        no_links = np.bincount(slots, weights=~self.has_links, minlength=size)
+        return [
+            {
+                "category": name,
+                "nodes": int(counts[slot]),
+                "mean_score": float(score_sums[slot] / counts[slot]) if counts[slot] else 0.0,
+                "low_quality": int(low[slot]),
+                "missing_descriptions": int(no_description[slot]),
+                "missing_links": int(no_links[slot]),
+            }
+            for slot, name in enumerate(["root"] + self.category_names)
+        ]
+
+    # --------------------------------------------------------------- records
+
+    def path(self, row):
+        names = []
+        while row >= 0:
+            names.append(self.names[row])
+            row = int(self.parents[row])
+        return "/".join(reversed(names))
+
+    def record(self, row):
+        """The same dict analyze_nodes.analyze_record produces for this node"""
+        row = int(row)
+        description_length = int(self.description_lengths[row])
+        return {
+            "path": self.path(row),
+            "name": self.names[row],
+            "description_length": description_length,
+            "has_meaningful_description": description_length > 50,
+            "has_links": bool(self.has_links[row]),
+            "children_count": int(self.children_counts[row]),
+            "score": int(self.scores[row]),
+        }
+
+    def records(self, rows):
+        return [self.record(row) for row in rows]
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Append-only patch logs next to the taxonomy source files.
+
+Saving an enhancement used to rewrite its whole category file. Instead,
+TaxonomyStore.save_dirty() appends the fields it changed to
+`<name>.patch.jsonl` beside the file, one line per save:
+
+    {"base": "<sha256>", "ops": [{"op": "replace", "path": "/children/3/description", "value": "..."}]}
+
+Ops are the add / replace / remove subset of JSON Patch (RFC 6902) with
+RFC 6901 pointers relative to the file's top object. A source file's
+content is always its base JSON with its log replayed on top
+(load_document); every loader and the build read it that way. A line that
+was cut short by a crash mid-append has no trailing newline and is ignored.
+
+Pointers address nodes by child position, so each line records the sha256
+of the base file it was written against. If the base was edited by hand
+since, its lines are skipped with a warning instead of landing on the
+wrong nodes (the log stays on disk until it is compacted, and compaction
+snapshots it first).
+
+compact() folds a log into its base file (one atomic rewrite) and deletes
+the log. The store does that itself once a log outgrows COMPACT_RATIO of
+its base; `python enhance.py compact` does it for every file at once.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from metrics import metrics, start_run
+from snapshot_store import SnapshotStore
+
+LOG_SUFFIX = '.patch.jsonl'
+# A log bigger than this fraction of its base file is compacted on save
+COMPACT_RATIO = 0.5
+
+def log_path(base):
+    """The patch log of a source file (its .jsonl suffix keeps it out of '*.json' globs)"""
+    base = Path(base)
+    return base.with_name(base.stem + LOG_SUFFIX)
+
+def pointer(tokens):
+    """RFC 6901 pointer for a sequence of keys and list positions"""
+    return "".join("/" + str(token).replace("~", "~0").replace("/", "~1") for token in tokens)
+
+def pointer_tokens(path):
+    if path == "":
+        return []
+    if not path.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer: {path!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in path[1:].split("/")]
+
+def apply_ops(document, ops):
+    """Apply add / replace / remove ops to a parsed document in place; returns the document"""
+    for op in ops:
+        kind = op["op"]
+        tokens = pointer_tokens(op["path"])
+        if not tokens:
+            if kind not in ("add", "replace"):
+                raise ValueError(f"Cannot {kind} the whole document")
+            document = op["value"]
+            continue
+        target = document
+        for token in tokens[:-1]:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        key = tokens[-1]
+        if isinstance(target, list):
+            if kind == "add":
+                target.insert(len(target) if key == "-" else int(key), op["value"])
+            elif kind == "replace":
+                target[int(key)] = op["value"]
+            elif kind == "remove":
+                del target[int(key)]
+            else:
+                raise ValueError(f"Unsupported patch op: {kind}")
+        elif kind == "add" or kind == "replace":
+            if kind == "replace" and key not in target:
+                raise ValueError(f"Cannot replace missing member {op['path']}")
+            target[key] = op["value"]
+        elif kind == "remove":
+            del target[key]
+        else:
+            raise ValueError(f"Unsupported patch op: {kind}")
+    return document
+
+def parse_log(raw):
+    """The records ({"base", "ops"}) of a log's complete lines, oldest first"""
+    lines = raw.split(b"\n")
+    if lines[-1]:
+        # Torn by a crash mid-append; everything before it is intact
+        metrics.count("patch_lines_torn")
+    return [json.loads(line) for line in lines[:-1] if line.strip()]
+
+def base_digest(raw):
+    return hashlib.sha256(raw).hexdigest()
+
+def read_source(base):
+    """(base bytes, log bytes) of a source file; the log part is b"" when it has none"""
+    raw = Path(base).read_bytes()
+    try:
+        log_raw = log_path(base).read_bytes()
+    except FileNotFoundError:
+        log_raw = b""
+    metrics.count("bytes_read", len(raw) + len(log_raw))
+    return raw, log_raw
+
+def parse_source(raw, log_raw=b"", name="source file"):
+    """Parse base bytes and replay the log lines written against exactly these bytes on top"""
+    document = json.loads(raw)
+    if log_raw:
+        with metrics.timer("replay_patches"):
+            digest = base_digest(raw)
+            skipped = 0
+            for record in parse_log(log_raw):
+                if record.get("base") != digest:
+                    skipped += 1
+                    continue
+                document = apply_ops(document, record["ops"])
+            if skipped:
+                metrics.count("patch_lines_skipped", skipped)
+                print(f"⚠️  {name}: skipped {skipped} patch line(s) written against a different version "
+                      f"of the file (edited by hand?); they stay in {log_path(name).name} until compacted")
+    return document
+
+def load_document(base):
+    """A source file's current content: its base JSON plus its patch log"""
+    return parse_source(*read_source(base), name=Path(base).name)
+
+def log_signature(base):
+    """[size, mtime_ns] of a file's patch log, or None without one"""
+    try:
+        stat = os.stat(log_path(base))
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+def append_ops(base, ops, digest=None):
+    """Append one save's ops to the log and flush them to disk; returns the bytes written.
+
+    digest is the sha256 of the base file the ops' positions refer to (the
+    version the caller loaded); by default the file as it is now.
+    """
+    path = log_path(base)
+    if digest is None:
+        digest = base_digest(Path(base).read_bytes())
+    record = json.dumps({"base": digest, "ops": ops}, ensure_ascii=False, separators=(',', ':'))
+    line = (record + "\n").encode('utf-8')
+    with open(path, 'ab') as f:
+        if f.tell():
+            # Drop a torn last line so the new one does not get glued to it
+            with open(path, 'rb') as existing:
+                data = existing.read()
+            if not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+        f.write(line)
+        f.flush()
+        os.fsync(f.fileno())
+    return len(line)
+
+def needs_compaction(base, pending=0):
+    """True once the log (plus `pending` bytes about to be appended) outgrows COMPACT_RATIO of the base"""
+    base = Path(base)
+    signature = log_signature(base)
+    size = (signature[0] if signature else 0) + pending
+    return size > COMPACT_RATIO * base.stat().st_size
+
+def write_base(base, document):
+    """Atomically replace a base file with document (in the repo's indent=2 layout) and drop its log.
+
+    Returns (bytes written, sha256 of the new file). The log only goes once
+    the new base is in place; a log that survived a crash in between no
+    longer matches the new base's digest, so it is never replayed onto it.
+    """
+    base = Path(base)
+    data = json.dumps(document, indent=2, ensure_ascii=False).encode('utf-8')
+    tmp_path = base.with_name(base.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, base)
+    log_path(base).unlink(missing_ok=True)
+    return len(data), base_digest(data)
+
+def compact(base):
+    """Fold a file's patch log into its base; returns (bytes written, sha256 of the new base).
+
+    Without a log nothing is written and the result is (0, None). Lines that
+    do not match the base (see parse_source) are dropped with the log.
+    """
+    if log_signature(base) is None:
+        return 0, None
+    return write_base(base, load_document(base))
+
+def source_files(data_dir):
+    """Every source file that can have a patch log: the metadata and the indexed categories"""
+    data_dir = Path(data_dir)
+    with open(data_dir / '_index.json', 'r', encoding='utf-8') as f:
+        category_index = sorted(json.load(f), key=lambda x: x['order'])
+    return [data_dir / '_metadata.json'] + [data_dir / info['filename'] for info in category_index]
+
+def main(argv=None, workspace=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Fold patch logs into their category files')
+    parser.add_argument('files', nargs='*', help='Source files to compact (default: all of them)')
+    parser.add_argument('--data-dir', default='taxonomy-data', help='Taxonomy source directory')
+    parser.add_argument('--status', action='store_true', help='Only list the pending logs')
+    args = parser.parse_args(argv)
+
+    start_run("compact", quiet=True)
+    files = [Path(name) for name in args.files] or source_files(args.data_dir)
+    logged = [(path, log_signature(path)) for path in files]
+    logged = [(path, signature) for path, signature in logged if signature is not None]
+    if not logged:
+        print("No patch logs to compact")
+        return
+
+    if args.status:
+        for path, (size, _) in logged:
+            print(f"📝 {log_path(path).name}: {size:,} bytes of patches")
+        return
+
+    # Both files of every pair change, so both go into the snapshot like any other write
+    snapshots = SnapshotStore()
+    run = snapshots.begin_run("compact")
+    paths = [file for path, _ in logged for file in (path, log_path(path))]
+    with metrics.timer("snapshot"):
+        run.before(paths)
+    digests = {}
+    for path, (size, _) in logged:
+        with metrics.timer("compact"):
+            written, digests[path] = compact(path)
+        metrics.count("bytes_written", written)
+        print(f"✓ Compacted {path.name} ({size:,} bytes of patches)")
+    with metrics.timer("snapshot"):
+        run.after(paths)
+        snapshots.prune()
+    print(f"📸 Snapshot {run.id} (undo: python enhance.py snapshots restore {run.id})")
+
+    if workspace is not None:
+        # The loaded store still matches the files, but its next patch lines must name the new bases
+        workspace.rebased(digests)
+    print("\nThe merged file is unchanged; no rebuild needed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Persistent index from canonical node paths to their category file and position.
+
+A canonical path is the slash-joined chain of English names from the root,
+e.g. "Creative Tech Taxonomy/Creative Code Frameworks/openFrameworks", the
+same form used in enhancement batches. A position is the list of child
+indices leading from the category's top node to the node.
+"""
+
+import json
+from pathlib import Path
+
+from patch_log import load_document
+
+INDEX_PATH = '.taxonomy-cache/path_index.json'
+INDEX_VERSION = 1
+
+def node_name(node):
+    """English name of a node, matching the batch/analysis tools"""
+    name = node.get("name", {})
+    return name.get("en", "Unknown") if isinstance(name, dict) else str(name)
+
+def category_paths(category_data):
+    """Yield (path, position) for every node in a category, relative to the root.
+
+    Paths here start at the category name; PathIndex prefixes the root name.
+    """
+    stack = [(category_data, node_name(category_data), [])]
+    while stack:
+        node, path, position = stack.pop()
+        yield path, position
+        children = node.get("children", [])
+        for i in range(len(children) - 1, -1, -1):
+            stack.append((children[i], f"{path}/{node_name(children[i])}", position + [i]))
+
+def node_at(category_data, position):
+    """Follow a position (list of child indices) down from the category node"""
+    node = category_data
+    for i in position:
+        node = node["children"][i]
+    return node
+
+class PathIndex:
+    """Canonical path -> [(filename, position), ...] lookup.
+
+    More than one entry for a path means sibling nodes share a name, which
+    is reported as ambiguous rather than guessed.
+    """
+
+    def __init__(self, root_name, entries):
+        self.root_name = root_name
+        self.paths = {}
+        for path, filename, position in entries:
+            self.paths.setdefault(path, []).append((filename, position))
+
+    @classmethod
+    def load(cls, index_path=INDEX_PATH):
+        """Load the index written by build_taxonomy.py, or None if it is missing or outdated"""
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return cls(data["root"], data["entries"])
+
+    @classmethod
+    def from_sources(cls, data_dir='taxonomy-data'):
+        """Build the index in memory straight from the category files"""
+        data_dir = Path(data_dir)
+        root_name = node_name(load_document(data_dir / '_metadata.json'))
+        with open(data_dir / '_index.json', 'r', encoding='utf-8') as f:
+            category_index = sorted(json.load(f), key=lambda x: x['order'])
+
+        entries = [(root_name, '_metadata.json', [])]
+        for category_info in category_index:
+            filepath = data_dir / category_info['filename']
+            if not filepath.exists():
+                continue
+            category_data = load_document(filepath)
+            for path, position in category_paths(category_data):
+                entries.append((f"{root_name}/{path}", category_info['filename'], position))
+        return cls(root_name, entries)
+
+    @classmethod
+    def from_store(cls, store):
+        """Build the index from an already loaded TaxonomyStore"""
+        root_name = store.nodes[0].name
+        entries = [(root_name, '_metadata.json', [])]
+        for category, top in enumerate(store.category_roots):
+            stack = [(top, store.path(top), [])]
+            while stack:
+                index, path, position = stack.pop()
+                entries.append((path, store.files[category], position))
+                children = store.nodes[index].children
+                for i in range(len(children) - 1, -1, -1):
+                    child = children[i]
+                    stack.append((child, f"{path}/{store.nodes[child].name}", position + [i]))
+        return cls(root_name, entries)
+
+    def resolve(self, path):
+        """Return every (filename, position) recorded for an exact canonical path.
+
+        Paths given relative to a category (without the root name) are accepted too.
+        """
+        matches = self.paths.get(path)
+        if matches is None and not path.startswith(f"{self.root_name}/"):
+            matches = self.paths.get(f"{self.root_name}/{path}")
+        return matches or []
+
+def write_path_index(index_path, root_name, category_entries):
+    """Stream the index to disk from per-category (filename, [[path, position], ...]) pairs"""
+    index_path = Path(index_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(index_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"version": INDEX_VERSION, "root": root_name}, ensure_ascii=False)[:-1])
+        f.write(', "entries": [\n')
+        f.write(json.dumps([root_name, '_metadata.json', []], ensure_ascii=False))
+        for filename, paths in category_entries:
+            for path, position in paths:
+                f.write(",\n" + json.dumps([f"{root_name}/{path}", filename, position], ensure_ascii=False))
+        f.write("\n]}\n")
+    tmp_path.replace(index_path)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Persistent cache of parsed enhance_batch responses.
+
+Entries live in a SQLite file under .taxonomy-cache/ and are keyed by a
+sha256 of everything that determines the answer (model, system prompt,
+prompt text, temperature). Old entries expire after max_age_days and the
+least recently used ones are dropped once the file holds more than
+max_bytes of responses.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from metrics import metrics
+
+CACHE_PATH = '.taxonomy-cache/responses.sqlite'
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_MAX_AGE_DAYS = 30
+
+def cache_key(model, system, prompt, temperature, endpoint=None):
+    """sha256 over the request fields; endpoint keeps e.g. a local mock server's answers apart"""
+    parts = [model, system, prompt, repr(temperature)]
+    if endpoint:
+        parts.append(endpoint)
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """SQLite-backed response cache, safe to share between threads"""
+
+    def __init__(self, path=CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.db.commit()
+        self.evict()
+
+    def get(self, key):
+        """Return the cached response for key, or None (counted as a miss)"""
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value FROM responses WHERE key = ? AND created >= ?",
+                (key, now - self.max_age)).fetchone()
+            if row is None:
+                self.misses += 1
+                metrics.count("cache_misses")
+                return None
+            self.hits += 1
+            metrics.count("cache_hits")
+            self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.db.commit()
+        return json.loads(row[0])
+
+    def put(self, key, response):
+        value = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), now, now))
+            self.db.commit()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under max_bytes"""
+        with self.lock:
+            self.db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.max_age,))
+            total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                stale = []
+                for key, size in self.db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+                    if total <= self.max_bytes:
+                        break
+                    stale.append((key,))
+                    total -= size
+                self.db.executemany("DELETE FROM responses WHERE key = ?", stale)
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            entries, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def report(self):
+        stats = self.stats()
+        return (f"💾 Response cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['entries']} entries, {stats['bytes'] / 1024:.1f} KB in {self.path})")
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM responses")
+            self.db.commit()
+
+    def close(self):
+        self.evict()
+        with self.lock:
+            self.db.close()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect or clear the enhancement response cache')
+    parser.add_argument('--clear', action='store_true', help='Delete every cached response')
+    parser.add_argument('--path', default=CACHE_PATH, help=f'Cache file (default: {CACHE_PATH})')
+
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.path)
+    if args.clear:
+        cache.clear()
+        print(f"🗑️  Cleared {cache.path}")
+    stats = cache.stats()
+    print(f"{stats['entries']} cached responses, {stats['bytes'] / 1024:.1f} KB")
+    cache.close()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Full-text search index over the taxonomy, written by build_taxonomy.py.
+
+Every name (all languages in "name"), description and tag is tokenized:
+Latin text into lowercase words, Japanese (kana/kanji) runs into character
+bigrams, so "画像生成" is found by "画像" or "生成" without a dictionary.
+A node id is the node's preorder position in the merged taxonomy (the root
+is 0, then each category in _index.json order), i.e. the same order as
+TaxonomyStore.nodes; the index also stores each node's parent and English
+name so ids map back to canonical paths without loading the tree.
+
+The file is a list of blocks, one for the root and one per category, each
+with ids local to it plus the offset that places them in the taxonomy.
+Inside a block, postings are kept per field ("name", "text") under a
+sorted vocabulary as delta-encoded lists of node ids. build_taxonomy.py
+caches every category's block with its fragment and streams the blocks
+into the file, so unchanged categories are not re-tokenized and the index
+is never held in memory as a whole.
+
+Queries look up their terms in each block's vocabulary (words also match
+as prefixes) and intersect the posting lists, so a search costs about the
+number of matching postings rather than a walk over the tree.
+"""
+
+import json
+import re
+import shutil
+import sys
+import unicodedata
+from bisect import bisect_left
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from path_index import node_name
+
+SEARCH_INDEX_NAME = 'Creative_Tech_Taxonomy_search.json'
+SEARCH_INDEX_PATH = f'public/{SEARCH_INDEX_NAME}'
+SEARCH_INDEX_VERSION = 2
+FIELDS = ("name", "text")
+# A name hit outranks a description/tag hit
+FIELD_WEIGHTS = {"name": 3, "text": 1}
+
+CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"  # kana and kanji
+TOKEN_RE = re.compile(f"([{CJK}]+)|([^\\W_{CJK}]+)")
+CJK_RE = re.compile(f"[{CJK}]")
+
+def tokenize(text):
+    """Lowercase words for Latin text, character bigrams for Japanese runs"""
+    tokens = []
+    for cjk, word in TOKEN_RE.findall(unicodedata.normalize("NFKC", text).casefold()):
+        if word:
+            tokens.append(word)
+        elif len(cjk) == 1:
+            tokens.append(cjk)
+        else:
+            tokens.extend(cjk[i:i + 2] for i in range(len(cjk) - 1))
+    return tokens
+
+def node_fields(node):
+    """(name terms, text terms) of one node dict"""
+    name = node.get("name", {})
+    names = name.values() if isinstance(name, dict) else [name]
+    name_terms = set()
+    for value in names:
+        name_terms.update(tokenize(str(value)))
+    text_terms = set(tokenize(node.get("description") or ""))
+    for tag in node.get("tags") or []:
+        text_terms.update(tokenize(str(tag)))
+    return name_terms, text_terms
+
+def category_entries(category_data):
+    """The search block of one category, with ids local to it (the category node is 0).
+
+    build_taxonomy.py caches this per category and write_search_index
+    places it with an offset, so unchanged categories are not re-tokenized.
+    """
+    names, parents = [], []
+    postings = {field: {} for field in FIELDS}
+    stack = [(category_data, -1)]
+    while stack:
+        node, parent = stack.pop()
+        local_id = len(names)
+        names.append(node_name(node))
+        parents.append(parent)
+        for field, terms in zip(FIELDS, node_fields(node)):
+            for term in terms:
+                postings[field].setdefault(term, []).append(local_id)
+        children = node.get("children", [])
+        for i in range(len(children) - 1, -1, -1):
+            stack.append((children[i], local_id))
+    fields = {}
+    for field in FIELDS:
+        terms = sorted(postings[field])
+        fields[field] = {"terms": terms, "postings": [delta_encode(postings[field][term]) for term in terms]}
+    return {"names": names, "parents": parents, "fields": fields}
+
+def write_search_index(index_path, root, categories):
+    """Stream the index to disk from per-category (node count, cached block path) pairs in _index.json order.
+
+    Each cached block holds the text of category_entries(); the root gets a
+    block of its own.
+    """
+    root_block = category_entries({key: value for key, value in root.items() if key != "children"})
+    index_path = Path(index_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = index_path.with_name(index_path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(f'{{"version":{SEARCH_INDEX_VERSION},"blocks":[')
+        f.write(json.dumps({"offset": 0, "parent": -1, "index": root_block},
+                           ensure_ascii=False, separators=(',', ':')))
+        offset = 1
+        for node_count, block_path in categories:
+            # A category's top node hangs under the root (id 0)
+            f.write(f',{{"offset":{offset},"parent":0,"index":')
+            with open(block_path, 'r', encoding='utf-8') as block:
+                shutil.copyfileobj(block, f)
+            f.write('}')
+            offset += node_count
+        f.write(']}')
+    tmp_path.replace(index_path)
+
+def delta_encode(ids):
+    """Sorted ids as first id plus gaps (small numbers keep the JSON short)"""
+    ids = sorted(ids)
+    return [ids[0]] + [ids[i] - ids[i - 1] for i in range(1, len(ids))]
+
+def delta_decode(gaps):
+    ids = []
+    total = 0
+    for gap in gaps:
+        total += gap
+        ids.append(total)
+    return ids
+
+class SearchIndex:
+    def __init__(self, data):
+        self.names = []
+        self.parents = []
+        # (offset, fields) per block
+        self.blocks = []
+        for block in data["blocks"]:
+            offset, index = block["offset"], block["index"]
+            self.names.extend(index["names"])
+            self.parents.extend(block["parent"] if parent < 0 else parent + offset for parent in index["parents"])
+            self.blocks.append((offset, index["fields"]))
+
+    @classmethod
+    def load(cls, index_path=SEARCH_INDEX_PATH):
+        """Load the index written by build_taxonomy.py, or None if it is missing or outdated"""
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if data.get("version") != SEARCH_INDEX_VERSION:
+            return None
+        return cls(data)
+
+    def __len__(self):
+        return len(self.names)
+
+    def matching_ids(self, field, token, prefix):
+        """Ids whose field contains token (or, with prefix, any term starting with it)"""
+        ids = set()
+        for offset, fields in self.blocks:
+            terms = fields[field]["terms"]
+            postings = fields[field]["postings"]
+            position = bisect_left(terms, token)
+            while position < len(terms) and (terms[position].startswith(token) if prefix
+                                             else terms[position] == token):
+                ids.update(offset + local_id for local_id in delta_decode(postings[position]))
+                if not prefix:
+                    break
+                position += 1
+        return ids
+
+    def search(self, query, limit=20):
+        """Node ids matching every query token, best first, as [(id, score), ...].
+
+        Words match as prefixes; a single kana/kanji matches any bigram it
+        starts. Each token scores FIELD_WEIGHTS for the fields it hit; ties
+        keep tree order.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores = None
+        for token in dict.fromkeys(tokens):
+            # Japanese bigrams must match exactly; words and single kana/kanji match as prefixes
+            prefix = not (len(token) == 2 and CJK_RE.match(token))
+            hits = {}
+            for field in FIELDS:
+                for node_id in self.matching_ids(field, token, prefix):
+                    hits[node_id] = hits.get(node_id, 0) + FIELD_WEIGHTS[field]
+            if scores is None:
+                scores = hits
+            else:
+                scores = {node_id: score + hits[node_id] for node_id, score in scores.items() if node_id in hits}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit] if limit else ranked
+
+    def path(self, node_id):
+        """Canonical path (English names from the root) of a node id"""
+        names = []
+        while node_id >= 0:
+            names.append(self.names[node_id])
+            node_id = self.parents[node_id]
+        return "/".join(reversed(names))
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Search the taxonomy by name, description or tag (English or Japanese)')
+    parser.add_argument('query', nargs='+', help='Words to search for (all must match)')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum results (default: 20, 0 for all)')
+    parser.add_argument('--index', default=SEARCH_INDEX_PATH, help=f'Index file (default: {SEARCH_INDEX_PATH})')
+
+    args = parser.parse_args(argv)
+
+    index = SearchIndex.load(args.index)
+    if index is None:
+        print(f"Search index not found at {args.index} - run 'python build_taxonomy.py' first")
+        sys.exit(1)
+
+    query = " ".join(args.query)
+    results = index.search(query, limit=args.limit)
+    print(f"🔎 {len(results)} result(s) for '{query}'")
+    for node_id, score in results:
+        print(f"  [{node_id}] {index.path(node_id)} (score {score})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Analysis and planning data precomputed by build_taxonomy.py.
+
+While the build parses a changed category it also computes, in the same
+traversal, what `enhance.py analyze` and `enhance.py plan` would otherwise
+walk the taxonomy for (see category_facts):
+
+- the quality facts and score of every node, as columns in preorder
+- the category's aggregates: node count, score sum and histogram, low
+  quality nodes, missing descriptions and links
+- the enhancement candidates (nodes with a short description or without
+  links) with their paths, subtree sizes and current content
+
+Columns and candidates are cached as serialized text per category, like
+the merged file's fragments; the aggregates ride in the build manifest.
+At the end of the build write_sidecars() splices them into two files:
+
+- analysis.json: {"root", "histogram", "quality_counts", "categories"
+  (the NodeColumns.category_summary() rows), "columns": [root block,
+  category blocks...]}
+- candidates.json: {"root", "categories": [[category name, index of its
+  first node, candidate rows], ...]}
+
+Block-local parents, candidate indices and paths (which start at the
+category name, as in path_index.py) are resolved by the loaders. Both files
+record the size and mtime of the sources they were built from;
+load_sidecar() returns None once any of them changed, so the tools fall
+back to reading the sources instead of using stale numbers. Patch logs are
+recorded as sources too (None when a file has none), so an enhancement
+appended to a log invalidates them like an edit of the file itself.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from analyze_nodes import quality_score
+from path_index import node_name
+
+ANALYSIS_PATH = '.taxonomy-cache/analysis.json'
+CANDIDATES_PATH = '.taxonomy-cache/candidates.json'
+SIDECAR_VERSION = 2
+# batch_nodes_by_category enhances nodes with a shorter description or without links
+CANDIDATE_DESCRIPTION_LENGTH = 50
+# The analysis report's low / high quality thresholds
+LOW_THRESHOLD = 30
+HIGH_THRESHOLD = 60
+# Fields of a candidate row
+CANDIDATE_FIELDS = ("index", "path", "parent", "name", "description", "links",
+                    "description_length", "has_links", "children_count", "subtree_size")
+CHILDREN_COUNT = CANDIDATE_FIELDS.index("children_count")
+SUBTREE_SIZE = CANDIDATE_FIELDS.index("subtree_size")
+
+def category_facts(category_data):
+    """(columns, candidate rows, summary) for one category, in a single preorder traversal.
+
+    columns["parents"] are local to the category (-1 for its top node);
+    candidate paths start at the category name, and "" stands for the root.
+    """
+    names, parents, description_lengths, has_links, children_counts, scores = [], [], [], [], [], []
+    paths, details = [], []
+    stack = [(category_data, -1)]
+    while stack:
+        node, parent = stack.pop()
+        index = len(names)
+        name = node_name(node)
+        names.append(name)
+        parents.append(parent)
+        paths.append(f"{paths[parent]}/{name}" if parent >= 0 else name)
+        description = node.get("description", "")
+        description_length = len(description.strip()) if description else 0
+        description_lengths.append(description_length)
+        links = node.get("links", {})
+        linked = bool(links and any(v.strip() for v in links.values() if v))
+        has_links.append(int(linked))
+        children = node.get("children", [])
+        children_counts.append(len(children))
+        scores.append(quality_score(description_length, linked, len(children)))
+        if description_length < CANDIDATE_DESCRIPTION_LENGTH or not linked:
+            details.append((index, description, links))
+        for i in range(len(children) - 1, -1, -1):
+            stack.append((children[i], index))
+
+    subtree_sizes = [1] * len(names)
+    for index in range(len(names) - 1, 0, -1):
+        subtree_sizes[parents[index]] += subtree_sizes[index]
+    columns = {
+        "names": names,
+        "parents": parents,
+        "description_lengths": description_lengths,
+        "has_links": has_links,
+        "children_counts": children_counts,
+        "scores": scores,
+    }
+    candidates = [
+        [index, paths[index], paths[parents[index]] if parents[index] >= 0 else "", names[index], description,
+         links, description_lengths[index], bool(has_links[index]), children_counts[index], subtree_sizes[index]]
+        for index, description, links in details
+    ]
+    return columns, candidates, summarize(columns)
+
+def summarize(columns):
+    """Aggregates of one block of columns; merged across categories by write_sidecars"""
+    scores = columns["scores"]
+    histogram = {}
+    for score in scores:
+        histogram[score] = histogram.get(score, 0) + 1
+    return {
+        "nodes": len(scores),
+        "score_sum": sum(scores),
+        "low_quality": sum(score < LOW_THRESHOLD for score in scores),
+        "high_quality": sum(score >= HIGH_THRESHOLD for score in scores),
+        "missing_descriptions": sum(length == 0 for length in columns["description_lengths"]),
+        "missing_links": len(scores) - sum(columns["has_links"]),
+        # [score, count] pairs: the manifest is JSON, so int keys would not survive it
+        "histogram": sorted(histogram.items()),
+    }
+
+def source_signature(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+def write_spliced(path, parts):
+    """Write an iterable of text parts to path atomically"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for part in parts:
+            f.write(part)
+    tmp_path.replace(path)
+
+def write_sidecars(cache_dir, data_dir, root, categories, sources):
+    """Splice analysis.json and candidates.json from the build's per-category outputs.
+
+    categories lists (category name, summary, columns path, candidates path)
+    in _index.json order, where the paths hold the cached text of
+    category_facts' columns and candidates. sources maps each source
+    filename (and patch log name) to the [size, mtime_ns] it had when it was
+    read for this build, or None if it was missing.
+    """
+    category_count = len(categories)
+    node_count = 1 + sum(summary["nodes"] for _, summary, _, _ in categories)
+    # The root is laid out on its own; its child count is the number of categories
+    columns, candidates, _ = category_facts({key: value for key, value in root.items() if key != "children"})
+    columns["children_counts"][0] = category_count
+    columns["scores"][0] = quality_score(columns["description_lengths"][0], columns["has_links"][0], category_count)
+    for row in candidates:
+        row[1:3] = ["", None]
+        row[CHILDREN_COUNT] = category_count
+        row[SUBTREE_SIZE] = node_count
+    root_summary = summarize(columns)
+
+    histogram = {}
+    rows = []
+    for name, summary in [("root", root_summary)] + [(name, summary) for name, summary, _, _ in categories]:
+        for score, count in summary["histogram"]:
+            histogram[score] = histogram.get(score, 0) + count
+        rows.append({
+            "category": name,
+            "nodes": summary["nodes"],
+            "mean_score": summary["score_sum"] / summary["nodes"] if summary["nodes"] else 0.0,
+            "low_quality": summary["low_quality"],
+            "missing_descriptions": summary["missing_descriptions"],
+            "missing_links": summary["missing_links"],
+        })
+    low = root_summary["low_quality"] + sum(summary["low_quality"] for _, summary, _, _ in categories)
+    high = root_summary["high_quality"] + sum(summary["high_quality"] for _, summary, _, _ in categories)
+
+    header = dumps({
+        "version": SIDECAR_VERSION,
+        "data_dir": str(Path(data_dir).resolve()),
+        "sources": sources,
+        "root": node_name(root),
+    })[:-1]
+    cache_dir = Path(cache_dir)
+
+    def analysis_parts():
+        yield header
+        yield f',"histogram":{dumps([[score, histogram[score]] for score in sorted(histogram)])}'
+        yield f',"quality_counts":{dumps([low, node_count - low - high, high])}'
+        yield f',"categories":{dumps(rows)}'
+        yield f',"columns":[{dumps(columns)}'
+        for _, _, columns_path, _ in categories:
+            yield ','
+            yield Path(columns_path).read_text(encoding='utf-8')
+        yield ']}'
+
+    def candidate_parts():
+        yield header
+        yield f',"categories":[{dumps(["root", 0, candidates])}'
+        start = 1
+        for name, summary, _, candidates_path in categories:
+            yield f',[{dumps(name)},{start},'
+            yield Path(candidates_path).read_text(encoding='utf-8')
+            yield ']'
+            start += summary["nodes"]
+        yield ']}'
+
+    write_spliced(cache_dir / Path(ANALYSIS_PATH).name, analysis_parts())
+    write_spliced(cache_dir / Path(CANDIDATES_PATH).name, candidate_parts())
+
+def load_sidecar(path, data_dir):
+    """A sidecar's data, or None if it is missing, outdated or the sources changed since it was built"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if data.get("version") != SIDECAR_VERSION or data.get("data_dir") != str(Path(data_dir).resolve()):
+        return None
+    for filename, signature in data["sources"].items():
+        path = Path(data_dir) / filename
+        # None records a category that was missing at build time
+        if (source_signature(path) if path.exists() else None) != signature:
+            return None
+    return data
+
+def flatten_columns(analysis):
+    """analysis.json's column blocks as one set of preorder columns (NodeColumns' arguments plus scores)"""
+    blocks = analysis["columns"]
+    names, parents, categories = [], [], []
+    description_lengths, has_links, children_counts, scores = [], [], [], []
+    for category, block in enumerate(blocks, -1):
+        offset = len(names)
+        # The root's block has no parent; a category's top node hangs off the root
+        top_parent = -1 if category < 0 else 0
+        names.extend(block["names"])
+        parents.extend(parent + offset if parent >= 0 else top_parent for parent in block["parents"])
+        categories.extend([category] * len(block["names"]))
+        description_lengths.extend(block["description_lengths"])
+        has_links.extend(block["has_links"])
+        children_counts.extend(block["children_counts"])
+        scores.extend(block["scores"])
+    category_names = [block["names"][0] for block in blocks[1:]]
+    return {
+        "names": names,
+        "parents": parents,
+        "categories": categories,
+        "category_names": category_names,
+        "description_lengths": description_lengths,
+        "has_links": has_links,
+        "children_counts": children_counts,
+        "scores": scores,
+    }
+
+def analysis_records(analysis):
+    """The analyze_nodes.analyze_record dict of every node, from analysis.json"""
+    columns = flatten_columns(analysis)
+    parents = columns["parents"]
+    records = []
+    paths = []
+    for index, name in enumerate(columns["names"]):
+        parent = parents[index]
+        path = f"{paths[parent]}/{name}" if parent >= 0 else name
+        paths.append(path)
+        description_length = columns["description_lengths"][index]
+        records.append({
+            "path": path,
+            "name": name,
+            "description_length": description_length,
+            "has_meaningful_description": description_length > 50,
+            "has_links": bool(columns["has_links"][index]),
+            "children_count": columns["children_counts"][index],
+            "score": columns["scores"][index],
+        })
+    return records
+
+class CandidateNode:
+    """The parts of a store Node the planner reads, for a node from candidates.json"""
+
+    __slots__ = ("name", "description", "links", "description_length", "has_links")
+
+    def __init__(self, name, description, links, description_length, has_links):
+        self.name = name
+        self.description = description
+        self.links = links
+        self.description_length = description_length
+        self.has_links = has_links
+
+class CandidateSidecar:
+    """candidates.json, accepted by efficient_enhance's planning functions in place of a store"""
+
+    def __init__(self, data):
+        self.root_name = data["root"]
+        self.categories = data["categories"]
+
+    @classmethod
+    def load(cls, data_dir, path=CANDIDATES_PATH):
+        data = load_sidecar(path, data_dir)
+        return cls(data) if data is not None else None
+
+    def full_path(self, path):
+        return f"{self.root_name}/{path}" if path else self.root_name
+
+    def __iter__(self):
+        """(category, index, path, parent path, CandidateNode, children count, subtree size) in preorder"""
+        for category, start, rows in self.categories:
+            for (index, path, parent, name, description, links,
+                 description_length, has_links, children_count, subtree_size) in rows:
+                yield (category, start + index, self.full_path(path),
+                       "" if parent is None else self.full_path(parent),
+                       CandidateNode(name, description, links, description_length, has_links),
+                       children_count, subtree_size)
+
+    def __len__(self):
+        return sum(len(rows) for _, _, rows in self.categories)
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Content-addressed snapshots of the taxonomy source files.
+
+Before a run writes category files or their patch logs, their current
+bytes are stored under .taxonomy-snapshots/objects/ by sha256, so each
+distinct version of a file is kept once however many runs saw it (gzipped
+unless compress=False).
+Every run that writes files leaves a log in runs/<run id>.json mapping each
+file to its "before" and "after" digests, which is all a restore needs: one
+log read and one object read, however many snapshots exist.
+
+Runs beyond the retention policy (the newest KEEP_RUNS, optionally only
+those younger than max_age_days) are dropped after each run, together with
+the objects no remaining run refers to.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from metrics import metrics
+
+SNAPSHOT_DIR = '.taxonomy-snapshots'
+KEEP_RUNS = 50
+COMPRESS_LEVEL = 6
+
+def write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+class SnapshotRun:
+    """The files one run changed; saved to its log after every record so a crash mid-write is still restorable"""
+
+    def __init__(self, store, run_id, command):
+        self.store = store
+        self.id = run_id
+        self.log = {
+            "id": run_id,
+            "command": command,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "files": {},
+        }
+
+    def record(self, path, when):
+        """Store the current bytes of path (None if it does not exist) as its `when` version"""
+        path = Path(path)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            digest = None
+        else:
+            digest = self.store.put(data)
+        self.log["files"].setdefault(str(path), {"before": None, "after": None})[when] = digest
+        return digest
+
+    def before(self, paths):
+        """Snapshot files about to be rewritten"""
+        for path in paths:
+            self.record(path, "before")
+        self.save()
+
+    def after(self, paths):
+        """Snapshot the rewritten files"""
+        for path in paths:
+            self.record(path, "after")
+        self.save()
+
+    def save(self):
+        write_atomic(self.store.run_path(self.id), json.dumps(self.log, indent=2).encode("utf-8"))
+
+class SnapshotStore:
+    def __init__(self, root=SNAPSHOT_DIR, compress=True):
+        self.root = Path(root)
+        self.compress = compress
+
+    # ------------------------------------------------------------ objects
+
+    def object_path(self, digest, compressed):
+        return self.root / 'objects' / digest[:2] / (digest + ('.json.gz' if compressed else '.json'))
+
+    def find(self, digest):
+        """Path of the stored object for digest, or None"""
+        for compressed in (True, False):
+            path = self.object_path(digest, compressed)
+            if path.exists():
+                return path
+        return None
+
+    def put(self, data):
+        """Store bytes once; returns their sha256"""
+        digest = hashlib.sha256(data).hexdigest()
+        if self.find(digest) is None:
+            stored = gzip.compress(data, COMPRESS_LEVEL, mtime=0) if self.compress else data
+            write_atomic(self.object_path(digest, self.compress), stored)
+            metrics.count("snapshot_bytes_written", len(stored))
+        else:
+            metrics.count("snapshot_objects_reused")
+        return digest
+
+    def get(self, digest):
+        path = self.find(digest)
+        if path is None:
+            raise KeyError(f"snapshot object {digest} is missing")
+        data = path.read_bytes()
+        return gzip.decompress(data) if path.suffix == '.gz' else data
+
+    # --------------------------------------------------------------- runs
+
+    def run_path(self, run_id):
+        return self.root / 'runs' / f"{run_id}.json"
+
+    def begin_run(self, command):
+        """A new run named like the metrics files: <command>-<timestamp>"""
+        base = f"{command or 'run'}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        run_id = base
+        suffix = 1
+        while self.run_path(run_id).exists():
+            suffix += 1
+            run_id = f"{base}-{suffix}"
+        return SnapshotRun(self, run_id, command)
+
+    def load_run(self, run_id):
+        try:
+            return json.loads(self.run_path(run_id).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise KeyError(f"no snapshot run {run_id}") from None
+
+    def runs(self):
+        """Run logs, oldest first"""
+        paths = sorted((self.root / 'runs').glob('*.json'), key=lambda p: p.stat().st_mtime)
+        return [json.loads(path.read_text(encoding="utf-8")) for path in paths]
+
+    def restore(self, run_id, files=None, version="before", output_dir=None):
+        """Write the `version` ("before" or "after") of a run's files back in place (or under output_dir).
+
+        In place, a file that did not exist in that version is removed, and
+        the restore is itself recorded as a "restore" run so it can be undone.
+        Returns the paths written or removed.
+        """
+        log = self.load_run(run_id)
+        selected = files or list(log["files"])
+        for name in selected:
+            if name not in log["files"]:
+                raise KeyError(f"{name} is not part of run {run_id}")
+        # Read every version first so a missing object leaves the files untouched
+        contents = {name: None if log["files"][name][version] is None else self.get(log["files"][name][version])
+                    for name in selected}
+
+        if output_dir:
+            restored = []
+            for name, data in contents.items():
+                if data is not None:
+                    target = Path(output_dir) / Path(name).name
+                    write_atomic(target, data)
+                    restored.append(target)
+            return restored
+
+        run = self.begin_run("restore")
+        run.before(selected)
+        for name, data in contents.items():
+            if data is None:
+                Path(name).unlink(missing_ok=True)
+            else:
+                write_atomic(Path(name), data)
+        run.after(selected)
+        return [Path(name) for name in selected]
+
+    def prune(self, keep=KEEP_RUNS, max_age_days=None):
+        """Drop runs outside the retention policy, then objects no remaining run refers to.
+
+        Returns (runs removed, objects removed).
+        """
+        paths = sorted((self.root / 'runs').glob('*.json'), key=lambda p: p.stat().st_mtime)
+        expired = paths[:max(len(paths) - keep, 0)]
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            expired += [path for path in paths if path not in expired and path.stat().st_mtime < cutoff]
+        for path in expired:
+            path.unlink()
+
+        referenced = set()
+        for log in self.runs():
+            for versions in log["files"].values():
+                referenced.update(digest for digest in versions.values() if digest)
+        removed_objects = 0
+        for path in (self.root / 'objects').glob('*/*'):
+            if path.name.split('.')[0] not in referenced:
+                path.unlink()
+                removed_objects += 1
+                if not any(path.parent.iterdir()):
+                    path.parent.rmdir()
+        return len(expired), removed_objects
+
+    def size(self):
+        """(object count, bytes on disk)"""
+        objects = list((self.root / 'objects').glob('*/*'))
+        return len(objects), sum(path.stat().st_size for path in objects)
+
+def print_runs(store):
+    runs = store.runs()
+    if not runs:
+        print(f"No snapshots in {store.root}")
+        return
+    for log in runs:
+        print(f"📸 {log['id']} ({log['time']}): {len(log['files'])} file(s)")
+    objects, size = store.size()
+    print(f"\n{len(runs)} runs, {objects} distinct file versions, {size:,} bytes")
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='List, restore and prune source file snapshots')
+    parser.add_argument('--dir', default=SNAPSHOT_DIR, help=f'Snapshot directory (default: {SNAPSHOT_DIR})')
+    commands = parser.add_subparsers(dest='command')
+    commands.add_parser('list', help='List recorded runs (default)')
+    show = commands.add_parser('show', help="Show a run's files and digests")
+    show.add_argument('run')
+    restore = commands.add_parser('restore', help='Put files back as they were before (or after) a run')
+    restore.add_argument('run')
+    restore.add_argument('files', nargs='*', help='Files to restore, as listed by show (default: all)')
+    restore.add_argument('--after', action='store_true', help='Restore the version the run wrote instead')
+    restore.add_argument('--output-dir', help='Write the restored files here instead of in place')
+    prune = commands.add_parser('prune', help='Apply a retention policy and drop unreferenced versions')
+    prune.add_argument('--keep', type=int, default=KEEP_RUNS, help=f'Newest runs to keep (default: {KEEP_RUNS})')
+    prune.add_argument('--max-age-days', type=float, help='Also drop runs older than this')
+
+    args = parser.parse_args(argv)
+    store = SnapshotStore(args.dir)
+    try:
+        if args.command == 'show':
+            log = store.load_run(args.run)
+            print(f"📸 {log['id']} ({log['time']}, {log['command']})")
+            for name, versions in log["files"].items():
+                before = (versions["before"] or "-")[:12]
+                after = (versions["after"] or "-")[:12]
+                print(f"    {name}: {before} -> {after}")
+        elif args.command == 'restore':
+            version = "after" if args.after else "before"
+            for path in store.restore(args.run, args.files, version, args.output_dir):
+                print(f"✓ Restored {path} ({version} {args.run})")
+            if not args.output_dir:
+                print("Run 'python build_taxonomy.py --incremental' to rebuild the merged file")
+        elif args.command == 'prune':
+            runs, objects = store.prune(args.keep, args.max_age_days)
+            print(f"🗑️  Removed {runs} runs and {objects} unreferenced file versions")
+        else:
+            print_runs(store)
+    except KeyError as e:
+        print(f"❌ {e.args[0]}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Generate seeded synthetic taxonomies shaped like taxonomy-data/ for benchmarking.
+"""
+
+import json
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from patch_log import LOG_SUFFIX
+
+# Roughly the current taxonomy: 910 nodes over 12 categories
+NODES_PER_CATEGORY = 76
+
+WORDS = [
+    "interactive", "realtime", "shader", "sensor", "projection", "mapping", "audio", "video",
+    "network", "protocol", "framework", "library", "engine", "camera", "depth", "tracking",
+    "lighting", "control", "fabrication", "printer", "laser", "robot", "model", "neural",
+    "generative", "synthesis", "display", "panel", "wireless", "serial", "plugin", "toolkit",
+]
+
+# Names that recur across categories in the real data (used with duplicate_ratio)
+COMMON_NAMES = ["Related Concepts", "Examples", "Tools", "Arduino", "Raspberry Pi", "Unity", "TouchDesigner"]
+
+JA_WORDS = ["インタラクティブ", "センサー", "映像", "音響", "照明", "制御", "生成", "表示"]
+
+class Profile:
+    """Content mix of generated nodes. The defaults reproduce the original generator byte for byte."""
+
+    def __init__(self, link_ratio=0.4, ja_ratio=0.0, duplicate_ratio=0.0):
+        self.link_ratio = link_ratio
+        self.ja_ratio = ja_ratio
+        self.duplicate_ratio = duplicate_ratio
+
+DEFAULT_PROFILE = Profile()
+
+def random_name(rng, profile=DEFAULT_PROFILE):
+    if profile.duplicate_ratio and rng.random() < profile.duplicate_ratio:
+        return rng.choice(COMMON_NAMES)
+    return " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 3)))
+
+def random_description(rng):
+    """Mix of empty, short and full descriptions, like the real data"""
+    roll = rng.random()
+    if roll < 0.25:
+        return ""
+    word_count = rng.randint(2, 6) if roll < 0.5 else rng.randint(8, 22)
+    return " ".join(rng.choice(WORDS) for _ in range(word_count)).capitalize() + "."
+
+def random_links(rng, name, profile=DEFAULT_PROFILE):
+    if rng.random() < 1 - profile.link_ratio:
+        return {"Link": ""}
+    slug = name.lower().replace(" ", "-")
+    return {"Official": f"https://example.org/{slug}"}
+
+def make_node(rng, name=None, profile=DEFAULT_PROFILE):
+    name = name or random_name(rng, profile)
+    names = {"en": name}
+    if profile.ja_ratio and rng.random() < profile.ja_ratio:
+        names["ja"] = "".join(rng.choice(JA_WORDS) for _ in range(rng.randint(1, 3)))
+    return {
+        "name": names,
+        "description": random_description(rng),
+        "tags": [],
+        "links": random_links(rng, name, profile),
+    }
+
+def generate_category(rng, name, node_count, max_depth=5, fanout=8, profile=DEFAULT_PROFILE):
+    """Build one category tree of exactly node_count nodes (including the category itself)"""
+    category = make_node(rng, name, profile)
+    max_depth = max(1, max_depth)
+    remaining = node_count - 1
+    frontier = [(category, 0)]
+    expandable = []
+
+    while remaining > 0:
+        next_frontier = []
+        for parent, depth in frontier:
+            if remaining <= 0:
+                break
+            if depth >= max_depth:
+                continue
+            child_count = min(remaining, rng.randint(1, fanout))
+            children = [make_node(rng, profile=profile) for _ in range(child_count)]
+            parent.setdefault("children", []).extend(children)
+            remaining -= child_count
+            next_frontier.extend((child, depth + 1) for child in children)
+        expandable.extend(item for item in next_frontier if item[1] < max_depth)
+        # Depth limit reached before the budget: widen the shallower levels instead
+        frontier = next_frontier or expandable or [(category, 0)]
+
+    return category
+
+def generate_taxonomy(out_dir, total_nodes=910, categories=None, max_depth=5, fanout=8, seed=42,
+                      profile=DEFAULT_PROFILE):
+    """Write _metadata.json, _index.json and category files for a synthetic taxonomy.
+
+    The category count defaults to total_nodes / NODES_PER_CATEGORY so scaling
+    the taxonomy adds categories of realistic size rather than giant ones.
+    Returns the number of nodes written (excluding the root).
+    """
+    rng = random.Random(seed)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    if categories is None:
+        categories = max(1, round(total_nodes / NODES_PER_CATEGORY))
+    # Patch logs left from an earlier dataset would be replayed onto the new files
+    for stale_log in out_dir.glob(f'*{LOG_SUFFIX}'):
+        stale_log.unlink()
+
+    with open(out_dir / '_metadata.json', 'w', encoding='utf-8') as f:
+        json.dump({
+            "name": {"en": "Synthetic Taxonomy", "ja": "合成分類"},
+            "description": "Generated for benchmarking.",
+            "tags": [],
+            "links": {"Link": ""},
+        }, f, indent=2, ensure_ascii=False)
+
+    index = []
+    written = 0
+    for i in range(categories):
+        node_count = total_nodes // categories + (1 if i < total_nodes % categories else 0)
+        name = f"Category {i + 1}"
+        filename = f"category-{i + 1}.json"
+        category = generate_category(rng, name, node_count, max_depth, fanout, profile)
+
+        with open(out_dir / filename, 'w', encoding='utf-8') as f:
+            json.dump(category, f, indent=2, ensure_ascii=False)
+
+        index.append({"name": name, "filename": filename, "order": i})
+        written += node_count
+
+    with open(out_dir / '_index.json', 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2)
+
+    return written
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate a synthetic taxonomy-data/ directory')
+    parser.add_argument('out_dir', help='Directory to write the category files into')
+    parser.add_argument('--nodes', type=int, default=910, help='Total node count (default: 910)')
+    parser.add_argument('--categories', type=int, help='Category count (default: nodes / 76)')
+    parser.add_argument('--max-depth', type=int, default=5, help='Maximum depth below a category (default: 5)')
+    parser.add_argument('--fanout', type=int, default=8, help='Maximum children per node (default: 8)')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+    parser.add_argument('--link-ratio', type=float, default=0.4, help='Share of nodes with a real link (default: 0.4)')
+    parser.add_argument('--ja-ratio', type=float, default=0.0, help='Share of nodes with a Japanese name (default: 0)')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.0,
+                        help='Share of nodes named after common cross-category names (default: 0)')
+
+    args = parser.parse_args()
+
+    profile = Profile(args.link_ratio, args.ja_ratio, args.duplicate_ratio)
+    count = generate_taxonomy(args.out_dir, args.nodes, args.categories, args.max_depth, args.fanout, args.seed,
+                              profile)
+    print(f"Generated {count:,} nodes in {args.out_dir}")
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Shared in-memory taxonomy store.
+
+Loads the taxonomy once into a flat node table (preorder, parent/child links
+as integer indices, interned names) that every utility can traverse, look
+up and mutate, and records changed fields in each category file's patch
+log (see patch_log.py).
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from metrics import metrics
+import patch_log
+
+DATA_DIR = 'taxonomy-data'
+METADATA_FILE = '_metadata.json'
+FIELDS = ("name", "description", "tags", "links", "children")
+
+# Most nodes carry these exact defaults; rows share one object instead of a copy each.
+# Field values are read-only - always replace them through TaxonomyStore.set_fields.
+SHARED_TAGS = []
+SHARED_LINKS = {"Link": ""}
+
+class Node:
+    """One row of the node table. Parent/children are indices into TaxonomyStore.nodes."""
+
+    __slots__ = ("name", "names", "description", "tags", "links", "extra",
+                 "keys", "parent", "children", "category")
+
+    def __init__(self, data, parent, category, keys):
+        name = data.get("name", {})
+        if isinstance(name, dict):
+            self.name = sys.intern(name.get("en", "Unknown"))
+            # Only keep the full dict when it holds more than the English name
+            self.names = None if list(name) == ["en"] else name
+        else:
+            self.name = sys.intern(str(name))
+            self.names = name
+        self.description = data.get("description", "")
+        tags = data.get("tags", [])
+        self.tags = SHARED_TAGS if tags == SHARED_TAGS else tags
+        links = data.get("links", {})
+        self.links = SHARED_LINKS if links == SHARED_LINKS else links
+        extra = {key: value for key, value in data.items() if key not in FIELDS}
+        self.extra = extra or None
+        self.keys = keys
+        self.parent = parent
+        self.children = []
+        self.category = category
+
+    @property
+    def has_links(self):
+        links = self.links
+        return bool(links and any(v.strip() for v in links.values() if v))
+
+    @property
+    def description_length(self):
+        return len(self.description.strip()) if self.description else 0
+
+    def name_value(self):
+        """The name as it appears in the JSON files"""
+        if self.names is not None:
+            return self.names
+        return {"en": self.name}
+
+class TaxonomyStore:
+    """Flat, array-backed view of the whole taxonomy.
+
+    nodes[0] is the root. files[i] is the source file of category i and
+    category_roots[i] the index of its top node; Node.category points into
+    both (-1 for the root, which lives in _metadata.json).
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.files = []
+        self.category_roots = []
+        self.dirty = set()
+        # category -> {(node index, key): [op, value]} not yet saved
+        self.changes = {}
+        # category -> sha256 of the base file the node positions were loaded from
+        self.base_digests = {}
+        self.data_dir = None
+        self._keys = {}
+        self._path_table = None
+
+    # ------------------------------------------------------------------ loading
+
+    @classmethod
+    def load(cls, data_dir=DATA_DIR):
+        """Load _metadata.json plus every category file listed in _index.json"""
+        store = cls()
+        store.data_dir = Path(data_dir)
+
+        with metrics.timer("load_store"):
+            metadata, store.base_digests[-1] = read_source_file(store.data_dir / METADATA_FILE)
+            store._add_tree(metadata, parent=-1, category=-1)
+            category_index = sorted(read_json(store.data_dir / '_index.json'), key=lambda x: x['order'])
+
+            for category_info in category_index:
+                filepath = store.data_dir / category_info['filename']
+                try:
+                    category_data, digest = read_source_file(filepath)
+                except FileNotFoundError:
+                    print(f"❌ Missing: {filepath}")
+                    continue
+                store.base_digests[len(store.files)] = digest
+                store.add_category(category_info['filename'], category_data)
+
+        metrics.count("nodes_loaded", len(store.nodes))
+        return store
+
+    @classmethod
+    def from_tree(cls, tree):
+        """Build a store from an already merged tree (e.g. public/Creative_Tech_Taxonomy_data.json)"""
+        store = cls()
+        store._add_tree({key: value for key, value in tree.items() if key != "children"}, -1, -1)
+        for category_data in tree.get("children", []):
+            store.add_category(None, category_data)
+        return store
+
+    @classmethod
+    def from_file(cls, data_file):
+        with open(data_file, 'r', encoding='utf-8') as f:
+            return cls.from_tree(json.load(f))
+
+    def add_category(self, filename, category_data):
+        """Append a category subtree under the root"""
+        category = len(self.files)
+        self.files.append(filename)
+        self.category_roots.append(len(self.nodes))
+        self._add_tree(category_data, parent=0, category=category)
+        self._path_table = None
+
+    def _intern_keys(self, data):
+        keys = tuple(data.keys())
+        return self._keys.setdefault(keys, keys)
+
+    def _add_tree(self, data, parent, category):
+        """Append a subtree in preorder without recursion"""
+        stack = [(data, parent)]
+        while stack:
+            node_data, parent_index = stack.pop()
+            index = len(self.nodes)
+            self.nodes.append(Node(node_data, parent_index, category, self._intern_keys(node_data)))
+            if parent_index >= 0:
+                self.nodes[parent_index].children.append(index)
+            children = node_data.get("children", [])
+            for i in range(len(children) - 1, -1, -1):
+                stack.append((children[i], index))
+
+    # ---------------------------------------------------------------- traversal
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def walk(self, start=0):
+        """Yield (index, path) in preorder, building each path once from its parent's"""
+        stack = [(start, self.path(start))]
+        visited = 0
+        try:
+            while stack:
+                index, path = stack.pop()
+                visited += 1
+                yield index, path
+                children = self.nodes[index].children
+                for i in range(len(children) - 1, -1, -1):
+                    child = children[i]
+                    stack.append((child, f"{path}/{self.nodes[child].name}"))
+        finally:
+            metrics.count("nodes_visited", visited)
+
+    def subtree_sizes(self):
+        """Number of nodes in each node's subtree (itself included), by index"""
+        sizes = [1] * len(self.nodes)
+        # Children always come after their parent in the preorder table
+        for index in range(len(self.nodes) - 1, 0, -1):
+            parent = self.nodes[index].parent
+            if parent >= 0:
+                sizes[parent] += sizes[index]
+        return sizes
+
+    def path(self, index):
+        """Canonical path of a node: English names from the root, joined with '/'"""
+        names = []
+        while index >= 0:
+            node = self.nodes[index]
+            names.append(node.name)
+            index = node.parent
+        return "/".join(reversed(names))
+
+    def category_name(self, index):
+        """Name of the top-level category a node belongs to ("root" for the root itself)"""
+        category = self.nodes[index].category
+        if category < 0:
+            return "root"
+        return self.nodes[self.category_roots[category]].name
+
+    # ------------------------------------------------------------------- lookup
+
+    def find(self, path):
+        """All node indices whose canonical path equals path"""
+        if self._path_table is None:
+            self._path_table = {}
+            for index, node_path in self.walk():
+                self._path_table.setdefault(node_path, []).append(index)
+        return self._path_table.get(path, [])
+
+    def node_at(self, filename, position):
+        """Follow a path-index position (child indices) down from a category's top node"""
+        if filename == METADATA_FILE:
+            return 0
+        index = self.category_roots[self.files.index(filename)]
+        for i in position:
+            index = self.nodes[index].children[i]
+        return index
+
+    # ----------------------------------------------------------------- mutation
+
+    def set_fields(self, index, **fields):
+        """Update description/links/tags of a node and mark its category file dirty"""
+        node = self.nodes[index]
+        changes = self.changes.setdefault(node.category, {})
+        for key, value in fields.items():
+            setattr(node, key, value)
+            change = changes.setdefault((index, key), ["replace" if key in node.keys else "add", None])
+            change[1] = value
+            if key not in node.keys:
+                node.keys = self._intern_keys(dict.fromkeys(node.keys + (key,)))
+        self.dirty.add(node.category)
+
+    def to_dict(self, index=0):
+        """Rebuild the nested JSON for a subtree, keeping each node's original key order"""
+        result = None
+        stack = [(index, None)]
+        while stack:
+            node_index, parent_children = stack.pop()
+            node = self.nodes[node_index]
+            values = {
+                "name": node.name_value(),
+                "description": node.description,
+                "tags": node.tags,
+                "links": node.links,
+            }
+            data = {}
+            for key in node.keys:
+                if key == "children":
+                    data["children"] = [None] * len(node.children)
+                elif key in values:
+                    data[key] = values[key]
+                else:
+                    data[key] = node.extra[key]
+            if node.children and "children" not in data:
+                data["children"] = [None] * len(node.children)
+
+            if parent_children is None:
+                result = data
+            else:
+                parent_children[0][parent_children[1]] = data
+            for position, child in enumerate(node.children):
+                stack.append((child, (data["children"], position)))
+        return result
+
+    def category_dict(self, category):
+        return self.to_dict(self.category_roots[category])
+
+    def source_path(self, category):
+        """Source file of a category (-1: the metadata file)"""
+        filename = METADATA_FILE if category < 0 else self.files[category]
+        if self.data_dir is None or filename is None:
+            raise ValueError("Store was not loaded from category files; nothing to save to")
+        return self.data_dir / filename
+
+    def rebase(self, path, digest):
+        """Note that a source file was rewritten with the same content (e.g. compacted)
+
+        Later patch lines must carry the new file's digest, or loading skips them.
+        Files outside this store's data directory are ignored.
+        """
+        path = Path(path)
+        if self.data_dir is None or path.parent.resolve() != self.data_dir.resolve():
+            return
+        if path.name == METADATA_FILE:
+            self.base_digests[-1] = digest
+        elif path.name in self.files:
+            self.base_digests[self.files.index(path.name)] = digest
+
+    def dirty_paths(self):
+        """Source files and patch logs save_dirty() may write, in the same order"""
+        paths = []
+        for category in sorted(self.dirty):
+            filepath = self.source_path(category)
+            paths += [filepath, patch_log.log_path(filepath)]
+        return paths
+
+    def pointer(self, index):
+        """JSON pointer of a node inside its source file"""
+        category = self.nodes[index].category
+        top = 0 if category < 0 else self.category_roots[category]
+        tokens = []
+        while index != top:
+            parent = self.nodes[index].parent
+            tokens += [self.nodes[parent].children.index(index), "children"]
+            index = parent
+        return patch_log.pointer(reversed(tokens))
+
+    def save_dirty(self):
+        """Append every modified category's changed fields to its patch log.
+
+        A log that would outgrow patch_log.COMPACT_RATIO of its file is
+        folded in instead: the whole file is rewritten and the log removed.
+        Returns the list of (filename, path) of the source files updated.
+        """
+        written = []
+        for category in sorted(self.dirty):
+            filepath = self.source_path(category)
+            ops = [
+                {"op": op, "path": f"{self.pointer(index)}/{key}", "value": value}
+                for (index, key), (op, value) in self.changes.get(category, {}).items()
+            ]
+            pending = len(json.dumps(ops, ensure_ascii=False).encode('utf-8'))
+            if patch_log.needs_compaction(filepath, pending):
+                data = self.to_dict(0) if category < 0 else self.category_dict(category)
+                if category < 0:
+                    data.pop("children", None)
+                size, self.base_digests[category] = patch_log.write_base(filepath, data)
+                metrics.count("bytes_written", size)
+                metrics.count("patch_logs_compacted")
+            else:
+                size = patch_log.append_ops(filepath, ops, self.base_digests.get(category))
+                metrics.count("bytes_written", size)
+            written.append((filepath.name, filepath))
+        self.dirty.clear()
+        self.changes.clear()
+        return written
+
+def read_json(path):
+    """json.load a file, counting bytes read and parse time"""
+    with metrics.timer("parse_json"):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        metrics.count("bytes_read", len(raw))
+        return json.loads(raw)
+
+def read_source_file(path):
+    """(content with the patch log replayed, sha256 of the base file) of a source file"""
+    with metrics.timer("parse_json"):
+        raw, log_raw = patch_log.read_source(path)
+        return patch_log.parse_source(raw, log_raw, Path(path).name), patch_log.base_digest(raw)
+
+def coerce_store(source):
+    """Accept a TaxonomyStore, a merged tree dict or a path to a merged JSON file"""
+    if isinstance(source, TaxonomyStore):
+        return source
+    if isinstance(source, dict):
+        return TaxonomyStore.from_tree(source)
+    return TaxonomyStore.from_file(source)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Build-time tidy-tree layout for the visualizer.
+
+tidy_tree() is a port of d3.tree() (Buchheim et al.'s linear-time
+Reingold-Tilford/Walker algorithm, as implemented in d3-hierarchy) with
+d3's default separation: 1 between siblings, 2 between cousins. It works
+on a tree's shape only, given as the child count of every node in preorder,
+so build_taxonomy.py can cache one small shape per category.
+
+The layout depends only on which nodes are visible. Within a layout a
+subtree keeps its shape wherever it is placed, so write_layout() stores
+each category's fully expanded subtree once ("subtrees", relative to the
+category node) plus where the categories sit in two states:
+
+- "default":  at most one category open (the first paint, or a single
+  category expanded one level or with Shift+click). Collapsed siblings have
+  nothing below depth 1 to collide with, so opening one category never
+  moves the others.
+- "expanded": everything expanded ("Expand all").
+
+x values are in pixels for NODE_SIZE; y is always depth * NODE_SIZE[1].
+"""
+
+import json
+from pathlib import Path
+
+LAYOUT_NAME = 'Creative_Tech_Taxonomy_layout.json'
+LAYOUT_VERSION = 1
+# d3.tree().nodeSize([dx, dy]) in taxonomy_tree_visualizer.js: fontSize * 3, fontSize * linebreakThreshold
+NODE_SIZE = (54, 360)
+
+def tree_shape(node):
+    """Child count of every node under node (inclusive), in preorder"""
+    counts = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        children = node.get("children") or []
+        counts.append(len(children))
+        stack.extend(reversed(children))
+    return counts
+
+def tree_links(counts):
+    """(children, parents) for a preorder shape; children[v] is None for leaves"""
+    children = [[] if count else None for count in counts]
+    parents = [-1] * len(counts)
+    open_nodes = []  # [node, children still to come]
+    for node, count in enumerate(counts):
+        if node:
+            if not open_nodes:
+                raise ValueError("shape has more than one root")
+            entry = open_nodes[-1]
+            parents[node] = entry[0]
+            children[entry[0]].append(node)
+            entry[1] -= 1
+            if not entry[1]:
+                open_nodes.pop()
+        if count:
+            open_nodes.append([node, count])
+    if open_nodes:
+        raise ValueError("shape is missing children")
+    return children, parents
+
+def tidy_tree(counts):
+    """x of every node (preorder, in node widths, root at 0) as laid out by d3.tree()"""
+    if not counts:
+        return []
+    children, parents = tree_links(counts)
+    n = len(counts)
+    number = [0] * n  # position among siblings
+    for kids in children:
+        if kids:
+            for i, kid in enumerate(kids):
+                number[kid] = i
+    prelim = [0.0] * n
+    mod = [0.0] * n
+    change = [0.0] * n
+    shift = [0.0] * n
+    thread = [None] * n
+    ancestor = list(range(n))
+    default_ancestor = [None] * n
+
+    def separation(a, b):
+        return 1 if parents[a] == parents[b] else 2
+
+    def next_left(v):
+        return children[v][0] if children[v] else thread[v]
+
+    def next_right(v):
+        return children[v][-1] if children[v] else thread[v]
+
+    def move_subtree(wm, wp, amount):
+        step = amount / (number[wp] - number[wm])
+        change[wp] -= step
+        shift[wp] += amount
+        change[wm] += step
+        prelim[wp] += amount
+        mod[wp] += amount
+
+    def execute_shifts(v):
+        total = 0.0
+        step = 0.0
+        for w in reversed(children[v]):
+            prelim[w] += total
+            mod[w] += total
+            step += change[w]
+            total += shift[w] + step
+
+    def apportion(v, w, default):
+        vip = vop = v
+        vim = w
+        vom = children[parents[v]][0]
+        sip, sop, sim, som = mod[vip], mod[vop], mod[vim], mod[vom]
+        while True:
+            vim = next_right(vim)
+            vip = next_left(vip)
+            if vim is None or vip is None:
+                break
+            vom = next_left(vom)
+            vop = next_right(vop)
+            ancestor[vop] = v
+            amount = prelim[vim] + sim - prelim[vip] - sip + separation(vim, vip)
+            if amount > 0:
+                owner = ancestor[vim] if parents[ancestor[vim]] == parents[v] else default
+                move_subtree(owner, v, amount)
+                sip += amount
+                sop += amount
+            sim += mod[vim]
+            sip += mod[vip]
+            som += mod[vom]
+            sop += mod[vop]
+        if vim is not None and next_right(vop) is None:
+            thread[vop] = vim
+            mod[vop] += sim - sop
+        if vip is not None and next_left(vom) is None:
+            thread[vom] = vip
+            mod[vom] += sip - som
+            default = v
+        return default
+
+    # First walk in postorder, left to right
+    order = []
+    stack = [0]
+    while stack:
+        v = stack.pop()
+        order.append(v)
+        if children[v]:
+            stack.extend(children[v])
+    for v in reversed(order):
+        w = children[parents[v]][number[v] - 1] if v and number[v] else None
+        if children[v]:
+            execute_shifts(v)
+            midpoint = (prelim[children[v][0]] + prelim[children[v][-1]]) / 2
+            if w is not None:
+                prelim[v] = prelim[w] + separation(v, w)
+                mod[v] = prelim[v] - midpoint
+            else:
+                prelim[v] = midpoint
+        elif w is not None:
+            prelim[v] = prelim[w] + separation(v, w)
+        if v:
+            parent = parents[v]
+            if w is not None:
+                default_ancestor[parent] = apportion(v, w, default_ancestor[parent] or children[parent][0])
+
+    # Second walk in preorder (node indices are preorder)
+    x = [0.0] * n
+    mod[0] -= prelim[0]
+    for v in range(1, n):
+        x[v] = prelim[v] + mod[parents[v]]
+        mod[v] += mod[parents[v]]
+    return x
+
+def write_layout(layout_path, category_shapes, node_size=NODE_SIZE):
+    """Precompute the visualizer's layout for [(shard key, shape), ...] in _index.json order"""
+    dx = node_size[0]
+    keys = [key for key, _ in category_shapes]
+    counts = [len(category_shapes)]
+    starts = []
+    for _, shape in category_shapes:
+        starts.append(len(counts))
+        counts.extend(shape)
+    x = tidy_tree(counts)
+    collapsed = tidy_tree([len(category_shapes)] + [0] * len(category_shapes))
+
+    def pixels(values):
+        return [round(value * dx, 2) for value in values]
+
+    layout = {
+        "version": LAYOUT_VERSION,
+        "nodeSize": list(node_size),
+        "categories": keys,
+        "default": pixels(collapsed[1:]),
+        "expanded": pixels(x[start] for start in starts),
+        "subtrees": [pixels(value - x[start] for value in x[start:start + len(shape)])
+                     for start, (_, shape) in zip(starts, category_shapes)],
+    }
+
+    layout_path = Path(layout_path)
+    layout_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = layout_path.with_name(layout_path.name + '.tmp')
+    tmp_path.write_text(json.dumps(layout, separators=(',', ':')), encoding='utf-8')
+    tmp_path.replace(layout_path)
+    return layout
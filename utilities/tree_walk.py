@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Iterative traversal of nested taxonomy dicts.
+
+walk() yields one Visit per node in preorder using an explicit stack, so
+trees deeper than Python's recursion limit are fine. It is lazy: consumers
+can break out early, prune a subtree, or chain it into generator pipelines
+without any intermediate lists. Paths are only built for visits whose
+.path is actually read.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from metrics import metrics
+from path_index import node_name
+
+class Visit:
+    """A node reached by walk(): the node dict plus its position in the tree"""
+
+    __slots__ = ("node", "parent", "depth", "position", "_base", "_path", "_pruned")
+
+    def __init__(self, node, parent, depth, position, base=""):
+        self.node = node
+        self.parent = parent
+        self.depth = depth
+        self.position = position
+        self._base = base
+        self._path = None
+        self._pruned = False
+
+    @property
+    def name(self):
+        return node_name(self.node)
+
+    @property
+    def parent_path(self):
+        return self.parent.path if self.parent is not None else self._base
+
+    @property
+    def path(self):
+        """Slash-joined English names from the walk's root (after the base path), built on first use"""
+        if self._path is None:
+            # Resolve unbuilt ancestors top-down without recursing
+            chain = []
+            visit = self
+            while visit is not None and visit._path is None:
+                chain.append(visit)
+                visit = visit.parent
+            for visit in reversed(chain):
+                parent_path = visit.parent._path if visit.parent is not None else visit._base
+                visit._path = f"{parent_path}/{visit.name}" if parent_path else visit.name
+        return self._path
+
+    @property
+    def children(self):
+        return self.node.get("children", [])
+
+    def prune(self):
+        """Do not descend into this node's children"""
+        self._pruned = True
+
+def walk(root, base_path=""):
+    """Yield a Visit for every node under root (inclusive) in preorder.
+
+    base_path is prefixed to every path, e.g. the root name when walking a
+    single category file. Call visit.prune() before advancing to skip its
+    subtree.
+    """
+    stack = [Visit(root, None, 0, 0, base_path)]
+    visited = 0
+    try:
+        while stack:
+            visit = stack.pop()
+            visited += 1
+            yield visit
+            if visit._pruned:
+                continue
+            children = visit.node.get("children", [])
+            for i in range(len(children) - 1, -1, -1):
+                stack.append(Visit(children[i], visit, visit.depth + 1, i, base_path))
+    finally:
+        metrics.count("nodes_visited", visited)
+
+def map_tree(root, transform):
+    """Build a transformed copy of a tree without recursion.
+
+    transform(node) returns the new dict for a node (without children);
+    nodes that have a "children" list get a transformed "children" list
+    appended in the same order.
+    """
+    result = None
+    stack = [(root, None)]
+    while stack:
+        node, siblings = stack.pop()
+        new_node = transform(node)
+        if siblings is None:
+            result = new_node
+        else:
+            siblings.append(new_node)
+        children = node.get("children")
+        if isinstance(children, list):
+            new_node["children"] = []
+            for child in reversed(children):
+                stack.append((child, new_node["children"]))
+    return result
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+A loaded taxonomy kept warm between commands.
+
+enhance.py's shell mode runs every command against one Workspace: the
+TaxonomyStore, the path-index resolver and the columnar analysis arrays are
+built on first use and reused until the source files change on disk (a
+cheap stat of each file is checked before every command). Commands that
+write the sources through the shared store call saved() afterwards, so the
+in-memory copy stays current without a reload.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent))
+
+from patch_log import LOG_SUFFIX
+from taxonomy_store import DATA_DIR, TaxonomyStore
+
+class Workspace:
+    def __init__(self, data_dir=DATA_DIR):
+        self.data_dir = Path(data_dir)
+        self._store = None
+        self._resolver = None
+        self._columns = None
+        self._signature = None
+
+    def signature(self):
+        """(name, mtime, size) of every source file and patch log, in a stable order"""
+        entries = []
+        paths = list(self.data_dir.glob('*.json')) + list(self.data_dir.glob(f'*{LOG_SUFFIX}'))
+        for path in sorted(paths):
+            if path.stem.endswith('_backup'):
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Deleted between glob and stat (an editor's atomic save, compact dropping a log)
+                continue
+            entries.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(entries)
+
+    def refresh(self):
+        """Drop everything loaded if the sources were edited outside this workspace"""
+        if self._store is not None and self.signature() != self._signature:
+            print("🔄 Source files changed - reloading taxonomy")
+            self.reset()
+
+    def reset(self):
+        self._store = self._resolver = self._columns = None
+
+    def saved(self):
+        """The shared store was just written back to disk: keep it, rebuild derived data lazily"""
+        self._columns = None
+        if self._store is not None:
+            self._signature = self.signature()
+
+    def rebased(self, digests):
+        """Source files were rewritten without changing their content ({path: new sha256})"""
+        if self._store is not None:
+            for path, digest in digests.items():
+                self._store.rebase(path, digest)
+        self.saved()
+
+    @property
+    def store(self):
+        if self._store is None:
+            self._store = TaxonomyStore.load(self.data_dir)
+            self._signature = self.signature()
+        return self._store
+
+    @property
+    def resolver(self):
+        if self._resolver is None:
+            from apply_enhancements import TargetResolver
+            self._resolver = TargetResolver(self.store)
+        return self._resolver
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            import node_columns
+            node_columns.require_numpy()
+            self._columns = node_columns.NodeColumns.from_store(self.store)
+        return self._columns
+
+    def describe(self):
+        if self._store is None:
+            return f"{self.data_dir} (not loaded)"
+        loaded = ["store"] + [name for name, value in (("path index", self._resolver),
+                                                       ("columns", self._columns)) if value is not None]
+        return f"{self.data_dir}: {len(self._store.nodes):,} nodes, {len(self._store.files)} files ({', '.join(loaded)})"